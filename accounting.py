@@ -0,0 +1,150 @@
+import logging
+
+
+def fee_in_quote(fee, price, base_currency="BTC"):
+    """Converts a ccxt fee structure ({'cost': x, 'currency': 'USDT'}) to quote currency."""
+    if not fee or fee.get("cost") is None:
+        return 0.0
+    cost = float(fee["cost"])
+    return cost * price if fee.get("currency") == base_currency else cost
+
+
+class PositionAccountant:
+    """Average-cost position and P&L accounting, updated in O(1) per fill and per price mark.
+
+    Quantities are in base currency (BTC), money in quote currency (USDT). The position is signed,
+    so margin sells beyond the held inventory are tracked as a short.
+    """
+
+    def __init__(self):
+        self.position = 0.0
+        self.avg_entry_price = 0.0
+        self.mark_price = None
+        self.realized_pnl = 0.0
+        self.fees_paid = 0.0
+        self.turnover = 0.0
+        self.fills = 0
+        self.peak_equity = 0.0
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+
+    def seed(self, position, price):
+        """Sets the opening inventory (e.g. the balance held at bot start) valued at `price`."""
+        self.position = float(position)
+        self.avg_entry_price = float(price) if self.position else 0.0
+        self.mark(price)
+
+    def state(self):
+        """Raw field values for checkpoints."""
+        return dict(vars(self))
+
+    def restore(self, state):
+        for name, value in state.items():
+            if name in vars(self):
+                setattr(self, name, value)
+
+    # --- Updates ---
+    def adjust_position(self, delta, price):
+        """Books an external balance change (deposit, withdrawal, missed fill) at `price` without P&L."""
+        new_position = self.position + delta
+        same_side = (self.position > 0) == (new_position > 0)
+        if abs(new_position) < 1e-12:
+            self.avg_entry_price = 0.0
+            new_position = 0.0
+        elif self.position == 0 or (same_side and abs(new_position) > abs(self.position)):
+            self.avg_entry_price = (self.position * self.avg_entry_price + delta * price) / new_position
+        elif not same_side:
+            self.avg_entry_price = price
+        self.position = new_position
+        self.mark(price)
+
+    def on_fill(self, side, amount, price, fee=0.0):
+        """Applies a fill and returns the P&L realized by it (before fees)."""
+        amount = float(amount)
+        price = float(price)
+        if amount <= 0 or price <= 0:
+            return 0.0
+        signed = amount if side.lower() == "buy" else -amount
+
+        realized = 0.0
+        if self.position == 0 or (self.position > 0) == (signed > 0):
+            # Opening or adding: blend the average entry price
+            new_position = self.position + signed
+            self.avg_entry_price = (self.position * self.avg_entry_price + signed * price) / new_position
+            self.position = new_position
+        else:
+            # Reducing, closing or flipping
+            closed = min(abs(signed), abs(self.position))
+            direction = 1.0 if self.position > 0 else -1.0
+            realized = (price - self.avg_entry_price) * closed * direction
+            self.position += signed
+            if abs(self.position) < 1e-12:
+                self.position = 0.0
+                self.avg_entry_price = 0.0
+            elif (self.position > 0) != (direction > 0):
+                self.avg_entry_price = price  # Flipped: the remainder opens at the fill price
+
+        self.realized_pnl += realized
+        self.fees_paid += float(fee)
+        self.turnover += amount * price
+        self.fills += 1
+        self.mark(price)
+        return realized
+
+    def mark(self, price):
+        """Marks the position to `price` and updates the drawdown tracker."""
+        if not price:
+            return
+        self.mark_price = float(price)
+        equity = self.net_pnl
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+        self.drawdown = self.peak_equity - equity
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+
+    # --- Derived values ---
+    @property
+    def unrealized_pnl(self):
+        if self.mark_price is None or not self.position:
+            return 0.0
+        return (self.mark_price - self.avg_entry_price) * self.position
+
+    @property
+    def net_pnl(self):
+        return self.realized_pnl + self.unrealized_pnl - self.fees_paid
+
+    @property
+    def exposure(self):
+        return self.position * (self.mark_price or self.avg_entry_price)
+
+    def snapshot(self):
+        return {
+            "position_btc": round(self.position, 8),
+            "avg_entry_price": round(self.avg_entry_price, 2),
+            "mark_price": round(self.mark_price, 2) if self.mark_price else None,
+            "realized_pnl": round(self.realized_pnl, 4),
+            "unrealized_pnl": round(self.unrealized_pnl, 4) or 0.0,
+            "fees_paid": round(self.fees_paid, 4),
+            "net_pnl": round(self.net_pnl, 4),
+            "exposure_usdt": round(self.exposure, 2),
+            "turnover_usdt": round(self.turnover, 2),
+            "fills": self.fills,
+            "drawdown": round(self.drawdown, 4),
+            "max_drawdown": round(self.max_drawdown, 4),
+        }
+
+    # --- Rebuild ---
+    def rebuild(self, fills):
+        """Replays fill records (dicts with type, amount, price and optional fee) in order."""
+        count = 0
+        for fill in fills:
+            side = str(fill.get("type", "")).lower()
+            if side not in ("buy", "sell"):
+                continue
+            try:
+                self.on_fill(side, fill["amount"], fill["price"], float(fill.get("fee") or 0))
+                count += 1
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(f"Skipping unreadable fill during rebuild: {e}")
+        return count
@@ -0,0 +1,265 @@
+"""Compressed, time-partitioned archive of rotated transaction_history.txt rows.
+
+The bot keeps only the newest rows in transaction_history.txt; older ones are moved here by
+`rotate_logs` instead of being discarded. Rows are stored verbatim (the log's text format) in one
+gzip segment per UTC month, `transactions-YYYY-MM.log.gz`. Each rotation appends one gzip member
+to the segments it touches (gzip readers treat concatenated members as one stream), so a segment
+is never rewritten.
+
+`index.json` holds a small entry per segment: time range, row count, counts per category, traded
+base/quote per side, realized P&L and the compressed size. The size is only advanced after the
+member is written and synced, so a rotation interrupted mid-write leaves bytes past the indexed
+size that readers ignore and the next append overwrites.
+
+Range queries and reports read the index first and decompress only the segments that overlap the
+range; `report()` takes the totals of segments lying wholly inside the range straight from the
+index and only replays the rows of the (at most two) partly covered ones.
+
+Realized P&L is average-cost (accounting.PositionAccountant) over the archived fills alone,
+starting flat at the first archived row, with the accountant state carried from one rotation to
+the next. Each segment records its opening state so a partly covered one can be replayed.
+
+The bot writes the archive and the server reads it; the index is replaced atomically and readers
+reload it when it changes.
+"""
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from accounting import PositionAccountant
+from core import parse_transaction_line
+from transaction_store import parse_timestamp, transaction_category
+
+INDEX_FILE = "index.json"
+SEGMENT_FORMAT = "transactions-{}.log.gz"
+TOTALS = ("buy_base", "buy_quote", "sell_base", "sell_quote", "realized_pnl")
+
+
+def partition_key(timestamp):
+    """Segment of a row: its UTC month, 'YYYY-MM' (timestamps are 'YYYY-mm-dd HH:MM:SS')."""
+    return timestamp[:7]
+
+
+def fill_side(tx):
+    """'buy' or 'sell' for BUY / SELL / PARTIAL * rows that moved funds, else None."""
+    t_type = tx.type.upper()
+    if t_type.startswith("PARTIAL "):
+        t_type = t_type[len("PARTIAL "):]
+    if t_type in ("BUY", "SELL") and tx.amount > 0:
+        return t_type.lower()
+    return None
+
+
+def _empty_totals():
+    return {"count": 0, "by_type": {}, **{name: 0.0 for name in TOTALS}}
+
+
+def _add_row(totals, tx, accountant):
+    """Counts `tx` into `totals`; fills also go through `accountant`."""
+    totals["count"] += 1
+    category = transaction_category(tx)
+    totals["by_type"][category] = totals["by_type"].get(category, 0) + 1
+    side = fill_side(tx)
+    if side is not None:
+        totals[f"{side}_base"] += tx.amount
+        totals[f"{side}_quote"] += tx.total_value
+        totals["realized_pnl"] += accountant.on_fill(side, tx.amount, tx.price)
+
+
+def _merge_totals(into, other):
+    into["count"] += other["count"]
+    for category, n in other["by_type"].items():
+        into["by_type"][category] = into["by_type"].get(category, 0) + n
+    for name in TOTALS:
+        into[name] += other[name]
+
+
+class TransactionArchive:
+    """Monthly gzip segments of transaction log rows plus their index; see the module docstring."""
+
+    def __init__(self, directory, compresslevel=6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_mtime = None
+
+    # --- Index ---
+    def _load_index(self):
+        """The current index, reloaded when another process has replaced it."""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            index = {"segments": {}, "accountant": None}
+            if mtime is not None:
+                try:
+                    with open(self.index_path, "r", encoding="utf-8") as f:
+                        index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Error reading archive index: {e}")
+            for entry in index["segments"].values():
+                entry["start_ts"] = parse_timestamp(entry["start"])
+                entry["end_ts"] = parse_timestamp(entry["end"])
+            self._index = index
+            self._index_mtime = mtime
+        return self._index
+
+    def _save_index(self, index):
+        stored = {"segments": {key: {k: v for k, v in entry.items() if k not in ("start_ts", "end_ts")}
+                               for key, entry in index["segments"].items()},
+                  "accountant": index["accountant"]}
+        fd, tmp_path = tempfile.mkstemp(prefix="index.", suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def segments(self, start=None, end=None):
+        """Index entries (oldest first) of the segments overlapping [start, end)."""
+        with self._lock:
+            index = self._load_index()
+            lo = parse_timestamp(start, default=0.0) if start is not None else None
+            hi = parse_timestamp(end, default=float("inf")) if end is not None else None
+            return [{"segment": key, **entry} for key, entry in sorted(index["segments"].items())
+                    if (lo is None or entry["end_ts"] >= lo) and (hi is None or entry["start_ts"] < hi)]
+
+    # --- Writing ---
+    def append(self, lines):
+        """Archives transaction log lines (oldest first); returns the number archived.
+
+        Lines that do not parse as transactions are kept in the segment of the row before them
+        (or of the first parsed row) but are not counted in the index.
+        """
+        groups = {}
+        key = None
+        orphans = []
+        for line in lines:
+            if not line.strip():
+                continue
+            line = line if line.endswith("\n") else line + "\n"
+            tx = parse_transaction_line(line)
+            if tx is not None:
+                key = partition_key(tx.timestamp)
+            if key is None:
+                orphans.append(line)
+                continue
+            if orphans:
+                groups.setdefault(key, []).extend((orphan, None) for orphan in orphans)
+                orphans = []
+            groups.setdefault(key, []).append((line, tx))
+        if orphans:
+            logging.warning(f"Archiving skipped {len(orphans)} unparseable transaction lines")
+        if not groups:
+            return 0
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            index = self._load_index()
+            accountant = PositionAccountant()
+            if index["accountant"]:
+                accountant.restore(index["accountant"])
+            for key in sorted(groups):
+                rows = groups[key]
+                entry = index["segments"].get(key)
+                if entry is None:
+                    entry = {"file": SEGMENT_FORMAT.format(key), "bytes": 0, "start": None, "end": None,
+                             "opening": {"position": accountant.position,
+                                         "avg_entry_price": accountant.avg_entry_price},
+                             **_empty_totals()}
+                added = _empty_totals()
+                for _, tx in rows:
+                    if tx is not None:
+                        _add_row(added, tx, accountant)
+                        entry["start"] = entry["start"] or tx.timestamp
+                        entry["end"] = tx.timestamp
+                entry["bytes"] = self._write_member(entry["file"], entry["bytes"],
+                                                    "".join(line for line, _ in rows).encode("utf-8"))
+                _merge_totals(entry, added)
+                entry["start_ts"] = parse_timestamp(entry["start"])
+                entry["end_ts"] = parse_timestamp(entry["end"])
+                index["segments"][key] = entry
+            index["accountant"] = accountant.state()
+            self._save_index(index)
+        return sum(len(rows) for rows in groups.values())
+
+    def _write_member(self, name, size, data):
+        """Writes one gzip member at `size` (dropping anything an interrupted append left there); returns the new size."""
+        path = os.path.join(self.directory, name)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(size)
+            f.truncate()
+            f.write(gzip.compress(data, self.compresslevel))
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    # --- Reading ---
+    def _read_segment(self, entry):
+        with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            data = f.read(entry["bytes"])
+        return gzip.decompress(data).decode("utf-8").splitlines()
+
+    def _rows(self, entry):
+        return [tx for tx in map(parse_transaction_line, self._read_segment(entry)) if tx is not None]
+
+    def query(self, start=None, end=None, types=None, exclude=None, limit=None):
+        """Archived transactions in [start, end), oldest first, filtered like /api/transactions.
+
+        Returns (transactions, segments decompressed); with `limit` it stops after that many rows.
+        """
+        lo = parse_timestamp(start, default=0.0) if start is not None else float("-inf")
+        hi = parse_timestamp(end, default=float("inf")) if end is not None else float("inf")
+        selected = {t.upper() for t in types} if types else None
+        excluded = {t.upper() for t in exclude} if exclude else set()
+        result = []
+        segments = self.segments(start, end)
+        read = 0
+        for entry in segments:
+            if selected is not None and not selected & set(entry["by_type"]):
+                continue
+            read += 1
+            whole = lo <= entry["start_ts"] and entry["end_ts"] < hi
+            for tx in self._rows(entry):
+                category = transaction_category(tx)
+                if (selected is not None and category not in selected) or category in excluded:
+                    continue
+                if not whole and not lo <= parse_timestamp(tx.timestamp, default=lo) < hi:
+                    continue
+                result.append(tx)
+                if limit is not None and len(result) >= limit:
+                    return result, read
+        return result, read
+
+    def report(self, start=None, end=None):
+        """Totals over [start, end): counts per category, traded base/quote per side and realized P&L.
+
+        Segments wholly inside the range come from the index; only partly covered ones are read.
+        """
+        lo = parse_timestamp(start, default=0.0) if start is not None else float("-inf")
+        hi = parse_timestamp(end, default=float("inf")) if end is not None else float("inf")
+        totals = _empty_totals()
+        segments = self.segments(start, end)
+        read = 0
+        for entry in segments:
+            if lo <= entry["start_ts"] and entry["end_ts"] < hi:
+                _merge_totals(totals, entry)
+                continue
+            read += 1
+            accountant = PositionAccountant()
+            accountant.restore(entry["opening"])
+            for tx in self._rows(entry):
+                ts = parse_timestamp(tx.timestamp, default=lo)
+                if ts >= hi:
+                    break
+                if ts >= lo:
+                    _add_row(totals, tx, accountant)
+                elif (side := fill_side(tx)) is not None:
+                    accountant.on_fill(side, tx.amount, tx.price)  # Keeps the average cost for later rows
+        return {"start": start, "end": end, **totals, "net_quote": totals["sell_quote"] - totals["buy_quote"],
+                "segments": len(segments), "segments_read": read}
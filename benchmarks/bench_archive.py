@@ -0,0 +1,94 @@
+"""Archived transaction history: size on disk and the cost of range reports and queries.
+
+Archives N synthetic transaction log rows (one every `--interval` seconds, fixed seed) into
+monthly segments the way rotate_logs does, in rotations of `--batch` rows, then compares:
+
+- a one-month report and query through the archive index (decompressing overlapping segments only)
+- the same report done by parsing an uncompressed log of the whole history
+- a report over the whole history, which the index answers without decompressing anything
+
+    python benchmarks/bench_archive.py [--rows 500000] [--interval 60] [--batch 2000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import TransactionArchive  # noqa: E402
+from core import read_transaction_log  # noqa: E402
+from transaction_store import parse_timestamp  # noqa: E402
+
+START = 1_767_225_600  # 2026-01-01 00:00:00 UTC
+TYPES = ("BUY", "SELL", "BUY", "SELL", "FAILED BUY", "FAILED PRICE CHANGE")
+
+
+def log_lines(n, interval, seed=7):
+    rng = random.Random(seed)
+    price = 90_000.0
+    for i in range(n):
+        price *= 1 + rng.gauss(0, 0.001)
+        t_type = TYPES[rng.randrange(len(TYPES))]
+        amount = 0.0 if t_type.startswith("FAILED") else 0.001
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(START + i * interval))
+        yield (f"{ts} | {t_type} | Amount: {amount:.8f} BTC | Price: {price:.2f} USDT | "
+               f"Total: {amount * price:.2f} USDT | Order ID: {i:024x}\n")
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--interval", type=int, default=60, help="seconds between rows")
+    parser.add_argument("--batch", type=int, default=2000, help="rows archived per rotation")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-archive-")
+    try:
+        lines = list(log_lines(args.rows, args.interval))
+        plain_path = os.path.join(directory, "transaction_history.txt")
+        with open(plain_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        archive = TransactionArchive(os.path.join(directory, "archive"))
+        _, archive_ms = timed(lambda: [archive.append(lines[i:i + args.batch])
+                                       for i in range(0, len(lines), args.batch)])
+        segments = archive.segments()
+        archived_bytes = sum(entry["bytes"] for entry in segments)
+        plain_bytes = os.path.getsize(plain_path)
+        print(f"{args.rows:,} rows in {len(segments)} monthly segments: {archived_bytes / 2**20:.1f} MiB "
+              f"vs {plain_bytes / 2**20:.1f} MiB plain ({plain_bytes / archived_bytes:.1f}x); "
+              f"archived in {archive_ms:.0f} ms ({args.batch}-row rotations)")
+
+        middle = (len(segments) - 1) // 2
+        month = segments[middle]
+        start = f"{month['segment']}-01 00:00:00"
+        end = segments[middle + 1]["start"] if middle + 1 < len(segments) else None
+        report, report_ms = timed(lambda: archive.report(start, end))
+        (rows, read), query_ms = timed(lambda: archive.query(start, end))
+
+        def scan():
+            lo, hi = parse_timestamp(start), parse_timestamp(end, default=float("inf"))
+            return sum(1 for tx in read_transaction_log(plain_path) if lo <= parse_timestamp(tx.timestamp) < hi)
+
+        scanned, scan_ms = timed(scan)
+        print(f"one month ({month['segment']}): report {report_ms:.1f} ms, query {query_ms:.0f} ms "
+              f"({read} of {len(segments)} segments read) | full log scan {scan_ms:.0f} ms "
+              f"| rows {report['count']:,} / {len(rows):,} / {scanned:,}")
+        whole, whole_ms = timed(lambda: archive.report())
+        print(f"whole history: report {whole_ms:.1f} ms ({whole['segments_read']} segments read), "
+              f"{whole['count']:,} rows, realized P&L {whole['realized_pnl']:.2f} USDT")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
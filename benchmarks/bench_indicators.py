@@ -0,0 +1,75 @@
+"""Verifies the incremental indicators against their NumPy batch versions and times both.
+
+Feeds a synthetic BTC tick series (random walk with flat stretches and volatility bursts) through
+each incremental indicator one tick at a time, compares every output with the batch series and
+exits non-zero on any mismatch beyond float rounding.
+
+    python benchmarks/bench_indicators.py [--ticks 1000000] [--window 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicators  # noqa: E402
+
+RTOL = 1e-9  # Incremental and batch sums round in a different order; this is far below any signal
+
+
+def synthetic_ticks(n, seed=1):
+    rng = np.random.default_rng(seed)
+    vol = np.where(rng.random(n) < 0.01, 5e-4, 5e-5)  # Occasional bursts
+    returns = rng.normal(0, vol)
+    returns[rng.random(n) < 0.3] = 0.0  # Unchanged ticks, as on a quiet book
+    prices = np.round(100_000 * np.cumprod(1 + returns), 1)  # KuCoin tick size
+    volumes = rng.exponential(0.05, n)
+    return prices, volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ticks", type=int, default=1_000_000)
+    parser.add_argument("--window", type=int, default=300)
+    args = parser.parse_args()
+    prices, volumes = synthetic_ticks(args.ticks)
+    w = args.window
+    price_list, volume_list = prices.tolist(), volumes.tolist()
+
+    cases = [
+        ("EMA", indicators.EMA(w), lambda ind, i: ind.update(price_list[i]),
+         lambda: indicators.ema(prices, w)),
+        ("RollingVolatility", indicators.RollingVolatility(w), lambda ind, i: ind.update(price_list[i]),
+         lambda: indicators.rolling_volatility(prices, w)),
+        ("VWAP", indicators.VWAP(w), lambda ind, i: ind.update(price_list[i], volume_list[i]),
+         lambda: indicators.vwap(prices, w, volumes)),
+        ("RSI", indicators.RSI(w), lambda ind, i: ind.update(price_list[i]),
+         lambda: indicators.rsi(prices, w)),
+        ("ZScore", indicators.ZScore(w), lambda ind, i: ind.update(price_list[i]),
+         lambda: indicators.zscore(prices, w)),
+    ]
+    failed = False
+    for name, indicator, step, batch in cases:
+        started = time.perf_counter()
+        live = np.array([np.nan if (v := step(indicator, i)) is None else v for i in range(args.ticks)])
+        live_s = time.perf_counter() - started
+        started = time.perf_counter()
+        expected = batch()
+        batch_s = time.perf_counter() - started
+
+        same_nan = np.array_equal(np.isnan(live), np.isnan(expected))
+        mask = ~np.isnan(expected)
+        scale = np.maximum(np.abs(expected[mask]), np.abs(expected[mask]).mean())
+        max_rel = float(np.max(np.abs(live[mask] - expected[mask]) / scale)) if mask.any() else 0.0
+        ok = same_nan and max_rel <= RTOL
+        failed |= not ok
+        print(f"{name:>17}: {'OK ' if ok else 'MISMATCH'} max rel diff {max_rel:.1e} | incremental "
+              f"{live_s / args.ticks * 1e6:.2f} us/tick | batch {batch_s * 1000:.0f} ms total")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmarks TelegramNotifier against the local Telegram stub.
+
+A producer thread (standing in for the trading loop) emits bursts of fill notifications while
+the notifier delivers them to the stub. Reports how long notify() blocks the producer, how many
+events per second get delivered, and how many HTTP messages the coalescing produced.
+
+    python benchmarks/bench_notifier.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notifier import TelegramNotifier  # noqa: E402
+from telegram_stub import TelegramStub  # noqa: E402
+
+
+def producer(notifier, events, burst, pause, timings):
+    for i in range(events):
+        t0 = time.perf_counter()
+        notifier.notify(f"🟢 BUY 0.00001500 BTC @ 88185.00 USDT | fill #{i}")
+        timings.append(time.perf_counter() - t0)
+        if i % burst == burst - 1:
+            time.sleep(pause)
+
+
+async def bench(events=20000, burst=500, pause=0.05, rate_per_chat=20.0, latency_ms=20.0):
+    stub = TelegramStub(rate_per_chat=rate_per_chat, latency_ms=latency_ms)
+    base_url = await stub.start()
+    notifier = TelegramNotifier("TOKEN", 42, api_base=base_url, max_queue=50000,
+                                coalesce_window=0.2, min_interval=1.05 / rate_per_chat)
+    await notifier.start()
+
+    timings = []
+    started = time.perf_counter()
+    thread = threading.Thread(target=producer, args=(notifier, events, burst, pause, timings))
+    thread.start()
+    await asyncio.to_thread(thread.join)
+    await notifier.stop(drain_timeout=120)
+    elapsed = time.perf_counter() - started
+    await stub.stop()
+
+    timings_us = sorted(t * 1e6 for t in timings)
+    print(f"events {events:,} in {elapsed:.2f}s -> {events / elapsed:,.0f} events/s delivered")
+    print(f"notify() blocking: median {statistics.median(timings_us):.1f} us | "
+          f"p99 {timings_us[int(len(timings_us) * 0.99)]:.1f} us | max {timings_us[-1]:.1f} us")
+    print(f"HTTP messages {len(stub.messages)} (coalesced {notifier.stats['coalesced']:,}) | "
+          f"429s {stub.rate_limited} | dropped {notifier.stats['dropped']} | errors {notifier.stats['errors']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench())
@@ -0,0 +1,70 @@
+"""Measures how many L2 updates per second OrderBook sustains.
+
+Replays a synthetic KuCoin-style level2 stream (a few changes per message, concentrated near the
+touch like real BTC-USDT traffic, ~10% deletions) over a 500-level snapshot, then times the
+quote reads the trading loop does per tick.
+
+    python benchmarks/bench_order_book.py [--messages 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_book import OrderBook  # noqa: E402
+
+
+def synthetic_stream(messages, mid, tick, seed):
+    rng = random.Random(seed)
+    sequence = 1
+    stream = []
+    for _ in range(messages):
+        start = sequence
+        changes = {"bids": [], "asks": []}
+        for _ in range(rng.randint(1, 4)):
+            side = rng.choice(("bids", "asks"))
+            offset = int(rng.expovariate(1 / 20)) + (1 if side == "asks" else 0)
+            price = round(mid - offset * tick if side == "bids" else mid + offset * tick, 1)
+            size = 0.0 if rng.random() < 0.1 else round(rng.uniform(0.001, 2), 6)
+            changes[side].append([price, size, sequence])
+            sequence += 1
+        stream.append((start, sequence - 1, changes))
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--levels", type=int, default=500)
+    args = parser.parse_args()
+
+    mid, tick = 100_000.0, 0.1
+    book = OrderBook("BTC/USDT", max_levels=args.levels)
+    book.apply_snapshot([[mid - i * tick, 1.0] for i in range(args.levels)],
+                        [[mid + (i + 1) * tick, 1.0] for i in range(args.levels)], 0)
+    stream = synthetic_stream(args.messages, mid, tick, seed=1)
+    changes = sum(len(c["bids"]) + len(c["asks"]) for _, _, c in stream)
+
+    started = time.perf_counter()
+    for start, end, c in stream:
+        book.apply_changes(start, end, c["bids"], c["asks"])
+    elapsed = time.perf_counter() - started
+    print(f"{args.messages:,} messages ({changes:,} level changes) in {elapsed:.2f}s -> "
+          f"{args.messages / elapsed:,.0f} msgs/s, {changes / elapsed:,.0f} changes/s "
+          f"({elapsed / changes * 1e6:.2f} us/change); levels bid {len(book.bids)} ask {len(book.asks)}")
+
+    reads = 100_000
+    started = time.perf_counter()
+    for _ in range(reads):
+        book.mid, book.spread_bps, book.microprice(3)
+        book.fill_estimate("buy", 0.5)
+        book.fill_estimate("sell", 0.5)
+    elapsed = time.perf_counter() - started
+    print(f"quote (mid, spread, microprice, 2 fill estimates): {elapsed / reads * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Memory and serialization cost of transaction rows as dicts, slotted records and NumPy arrays.
+
+Builds N transactions (the shape of transaction_history.txt rows: timestamp string, interned
+type, three floats, a 24-character order ID) in each representation and reports the bytes per
+record measured with tracemalloc, including the field values, plus the time to build them and to
+encode them as JSON rows or columns.
+
+    python benchmarks/bench_records.py [--records 1000000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import Transaction, array_columns, columns, json_default, to_array  # noqa: E402
+
+TYPES = ("BUY", "SELL", "FAILED BUY", "FAILED SELL", "FAILED PRICE CHANGE")
+
+
+def fresh_values(n):
+    """Field tuples with newly allocated strings and floats, as when rows are parsed from a file."""
+    for i in range(n):
+        yield (f"2026-01-{1 + i // 86400 % 28:02d} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+               TYPES[i % len(TYPES)], 0.000015 + i * 1e-12, 88_000.0 + i % 1000, 1.32 + i % 7, f"{i:024x}")
+
+
+def measure(build):
+    """(result, bytes it still holds) for build(); tracemalloc makes the build itself slow, so it is not timed."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.records
+    fields = Transaction.FIELDS[:-1]
+
+    dicts, dict_bytes = measure(lambda: [dict(zip(fields, values)) for values in fresh_values(n)])
+    del dicts
+    records, record_bytes = measure(lambda: [Transaction(*values) for values in fresh_values(n)])
+    array, array_bytes = measure(lambda: to_array(records))
+
+    print(f"{n:,} transactions")
+    for label, held in (("dict", dict_bytes), ("slotted record", record_bytes), ("structured array", array_bytes)):
+        print(f"  {label:>16}: {held / n:7.1f} bytes/record | {held / 2**20:8.1f} MiB")
+    print(f"  (array itemsize {array.dtype.itemsize} bytes, converted from the records without truncation)")
+
+    sample = records[:100_000]
+    _, rows_s = timed(lambda: json.dumps(sample, default=json_default))
+    _, cols_s = timed(lambda: json.dumps(columns(sample)))
+    _, array_cols_s = timed(lambda: json.dumps(array_columns(array[:len(sample)])))
+    print(f"JSON for {len(sample):,} records: rows {rows_s * 1000:.0f} ms | columns {cols_s * 1000:.0f} ms | "
+          f"array columns {array_cols_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
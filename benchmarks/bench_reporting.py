@@ -0,0 +1,49 @@
+"""Benchmarks ReportEngine window queries against history length.
+
+Feeds one equity mark per second and a fill every 10 s, then times reports for a 4 h window,
+a 7 day window and all history. Query time should stay flat as history grows.
+
+    python benchmarks/bench_reporting.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reporting import ReportEngine  # noqa: E402
+
+T0 = 1_700_000_000
+
+
+def build(days):
+    random.seed(7)
+    engine = ReportEngine(bucket_seconds=60)
+    equity = 0.0
+    started = time.perf_counter()
+    for second in range(0, days * 86400, 1):
+        ts = T0 + second
+        equity += random.gauss(0, 0.001)
+        engine.on_equity(ts, equity)
+        if second % 10 == 0:
+            side = "buy" if second % 20 else "sell"
+            engine.on_fill(ts, side, 0.00001, 100_000.0, 100_005.0, 0.001,
+                           random.gauss(0, 0.01) if side == "sell" else 0.0, random.expovariate(1 / 150))
+    return engine, (time.perf_counter() - started) / (days * 86400) * 1e6
+
+
+def bench(days, queries=1000):
+    engine, ingest_us = build(days)
+    end = T0 + days * 86400
+    for label, window in (("4h", 4 * 3600), ("7d", 7 * 86400), ("all", None)):
+        t0 = time.perf_counter()
+        for _ in range(queries):
+            engine.report(None if window is None else end - window, end)
+        query_ms = (time.perf_counter() - t0) / queries * 1e3
+        print(f"history {days:>3} d | ingest {ingest_us:5.2f} us/event | {label:>3} window report {query_ms:6.3f} ms")
+
+
+if __name__ == "__main__":
+    for days in (1, 7):
+        bench(days)
@@ -0,0 +1,100 @@
+"""Best-price routing across simulated venues: decision latency and cost savings.
+
+Builds several SimulatedExchange venues whose spreads, depth and taker fees differ. Their mids follow
+one shared random walk, each offset by its own basis plus a little noise (fixed seeds). The same
+alternating buy/sell market orders are routed through exchanges.Router; each order is executed on
+the chosen venue and, for comparison, on an identical copy of the primary venue, so the savings are
+realized fills rather than book estimates.
+
+Reports routing decision latency (local book walks only) and book refresh time, how often each
+venue was chosen, and the cost saved against always trading on the primary venue, in USDT and bps.
+
+    python benchmarks/bench_routing.py [--orders 2000] [--amount 0.05] [--venues 4]
+"""
+import argparse
+import copy
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exchanges import ConsolidatedBook, Router, Venue, VenueAdapter  # noqa: E402
+from simulator import SimulatedExchange  # noqa: E402
+
+# name, basis to the common mid (bps), spread, level size, taker fee
+VENUE_SPECS = (
+    ("kucoin", 0.0, 1.0, 0.05, 0.001),
+    ("binance", -1.5, 0.2, 0.2, 0.001),
+    ("okx", 1.0, 0.5, 0.1, 0.0008),
+    ("kraken", 0.5, 2.0, 0.03, 0.0026),
+    ("bybit", -0.5, 0.4, 0.08, 0.001),
+)
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def fill_cost(order, side):
+    """Signed quote cost of a filled order, fees included (positive = paid)."""
+    return order["cost"] + order["fee"]["cost"] if side == "buy" else -(order["cost"] - order["fee"]["cost"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--amount", type=float, default=0.05, help="BTC per order")
+    parser.add_argument("--venues", type=int, default=4, help=f"1-{len(VENUE_SPECS)} venues, primary first")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--basis-noise-bps", type=float, default=0.5, help="per-order noise on each venue's basis")
+    args = parser.parse_args()
+
+    market = SimulatedExchange(seed=args.seed)  # Only its mid is used: the price all venues track
+    noise = random.Random(args.seed)
+    exchanges, adapters, basis = {}, [], {}
+    for name, basis_bps, spread, level_size, taker_fee in VENUE_SPECS[:args.venues]:
+        exchange = SimulatedExchange(mid=market.mid, spread=spread, level_size=level_size, taker_fee=taker_fee,
+                                     volatility_bps=0.0, balances={"BTC": 1e6, "USDT": 1e12})
+        exchanges[name] = exchange
+        basis[name] = basis_bps
+        adapters.append(VenueAdapter(Venue(name, taker_fee=taker_fee), exchange, "BTC/USDT", depth=20,
+                                     clock=exchange.monotonic))
+    primary = VENUE_SPECS[0][0]
+    baseline = copy.deepcopy(exchanges[primary])  # Same book as the primary; always gets the order
+    router = Router(ConsolidatedBook(adapters, max_age=1.0), primary)
+
+    decisions_us, refresh_ms = [], []
+    routed_cost = baseline_cost = notional = 0.0
+    for i in range(args.orders):
+        for name, exchange in exchanges.items():
+            exchange.mid = market.mid * (1 + (basis[name] + noise.gauss(0, args.basis_noise_bps)) / 1e4)
+        baseline.mid = exchanges[primary].mid
+        side = "buy" if i % 2 == 0 else "sell"
+        route = router.route(side, args.amount)
+        decisions_us.append(route["decision_us"])
+        refresh_ms.append(route["refresh_ms"])
+        order = exchanges[route["venue"]].create_order("BTC/USDT", "market", side, args.amount)
+        reference = baseline.create_order("BTC/USDT", "market", side, args.amount)
+        routed_cost += fill_cost(order, side)
+        baseline_cost += fill_cost(reference, side)
+        notional += reference["cost"]
+        for exchange in (market, *exchanges.values(), baseline):
+            exchange.advance(1.0)
+
+    decisions_us.sort()
+    snapshot = router.snapshot()
+    saved = baseline_cost - routed_cost
+    print(f"{args.orders} orders of {args.amount} BTC across {list(exchanges)} (primary {primary})")
+    print(f"decision latency: p50 {percentile(decisions_us, 0.5):.1f} us | p95 {percentile(decisions_us, 0.95):.1f} us"
+          f" | p99 {percentile(decisions_us, 0.99):.1f} us | max {decisions_us[-1]:.1f} us")
+    print(f"book refresh (in-process venues): median {statistics.median(refresh_ms):.2f} ms")
+    print(f"venue choice: {snapshot['by_venue']} | rerouted {snapshot['rerouted']} | fallbacks {snapshot['fallbacks']}")
+    print(f"realized cost vs always {primary}: saved {saved:.2f} USDT on {notional:,.0f} USDT notional "
+          f"({saved / notional * 1e4:.2f} bps); router estimate {snapshot['saved_quote']:.2f} USDT")
+    router.book.close()
+
+
+if __name__ == "__main__":
+    main()
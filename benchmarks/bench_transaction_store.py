@@ -0,0 +1,66 @@
+"""Benchmarks the per-push cost of /update_data transaction ingestion.
+
+Compares the legacy approach (rebuild a set of every order_id, extend an unbounded list)
+with TransactionStore at 10k and 1M retained transactions. The bot pushes its last 20
+transactions every 5 s, so each simulated push carries 19 known rows and 1 new row.
+
+    python benchmarks/bench_transaction_store.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transaction_store import TransactionStore  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+
+def make_tx(i):
+    return {
+        "timestamp": (START + timedelta(seconds=5 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+        "type": "BUY" if i % 2 else "SELL",
+        "amount": "0.00001500",
+        "price": "88185.00",
+        "total_value": "1.32",
+        "order_id": f"order-{i}",
+    }
+
+
+def legacy_update(transactions, batch):
+    existing = {tx['order_id'] for tx in transactions}
+    transactions.extend(tx for tx in batch if tx['order_id'] not in existing)
+
+
+def bench(retained, pushes):
+    history = [make_tx(i) for i in range(retained)]
+    batches = [[make_tx(i) for i in range(retained + p - 19, retained + p + 1)] for p in range(pushes)]
+
+    store = TransactionStore(capacity=retained)
+    store.extend(history)
+    t0 = time.perf_counter()
+    for batch in batches:
+        store.extend(batch)
+    store_us = (time.perf_counter() - t0) / pushes * 1e6
+
+    legacy = list(history)
+    legacy_pushes = max(1, pushes // 100) if retained >= 1_000_000 else pushes
+    t0 = time.perf_counter()
+    for batch in batches[:legacy_pushes]:
+        legacy_update(legacy, batch)
+    legacy_us = (time.perf_counter() - t0) / legacy_pushes * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(pushes):
+        store.query(start=history[retained // 2]["timestamp"], limit=20)
+    query_us = (time.perf_counter() - t0) / pushes * 1e6
+
+    print(f"{retained:>9,} retained | store push {store_us:9.1f} us | legacy push {legacy_us:11.1f} us "
+          f"| time-range page {query_us:7.1f} us | len={len(store):,}")
+
+
+if __name__ == "__main__":
+    for retained in (10_000, 1_000_000):
+        bench(retained, pushes=1000)
@@ -0,0 +1,294 @@
+"""End-to-end benchmark suite: bot decision loop, server endpoints, transaction log and startup.
+
+Runs fully offline. bot.py and server.py are imported with dummy credentials and a temporary
+DATA_DIR, the bot trades against SimulatedExchange, and the real Flask app is served by
+werkzeug on a local port. Results are written as JSON; --compare flags metrics that regressed
+beyond --tolerance against a previous run (exit status 1).
+
+    python benchmarks/run_suite.py --output bench.json
+    python benchmarks/run_suite.py --quick --compare bench.json
+
+Metric names end in their unit: *_per_s is better when higher, *_ms / *_us / *_s when lower.
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Offline environment, set before bot/server are imported; explicit values win over any .env file
+DATA_DIR = tempfile.mkdtemp(prefix="bench-suite-")
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+BENCH_ENV = {
+    "ENVIRONMENT": "LOCAL",
+    "DATA_DIR": DATA_DIR,
+    "KUCOIN_API_KEY": "bench-key",
+    "KUCOIN_API_SECRET": "bench-secret",
+    "KUCOIN_API_PASSPHRASE": "bench-passphrase",
+    "TELEGRAM_BOT_TOKEN": "0:bench",
+    "TELEGRAM_CHAT_ID": "1",
+    "TELEGRAM_API_BASE": "http://127.0.0.1:9",
+    "TELEGRAM_COMMANDS": "0",
+    "ORDER_BOOK_FEED": "0",
+    "EXECUTION_MODE": "market",
+    "STRATEGY": "threshold",
+    "STRATEGY_PARAMS": "{}",
+    "BOT_IPC_SOCKET": os.path.join(DATA_DIR, "bot.sock"),
+}
+os.environ.update(BENCH_ENV)
+
+from simulator import SimulatedExchange  # noqa: E402
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]  # noqa: E731
+    return {"p50_ms": round(pick(0.5), 3), "p95_ms": round(pick(0.95), 3), "p99_ms": round(pick(0.99), 3)}
+
+
+# --- Bot decision loop ---
+def bench_decision_loop(bot, ticks):
+    """check_price_change per tick against the simulator; server pushes are stubbed out."""
+    pushes = []
+    bot.send_data_to_server = lambda *args, **kwargs: pushes.append(args) or (True, 200, "")
+    results = {}
+    for label, trading in (("monitor", False), ("trading", True)):
+        exchange = SimulatedExchange(seed=11, volatility_bps=1.0, balances={"BTC": 0.01, "USDT": 1000.0})
+        bot.execution_engine.sleep = exchange.sleep
+        bot.execution_engine.clock = exchange.monotonic
+        bot.risk_engine.max_orders_per_second = bot.risk_engine.max_notional_per_minute = None
+        bot.strategy.reset()
+        bot.exchange_session.mark_ok()
+        fills_before = len(bot.fill_store)
+        elapsed = 0.0
+        for _ in range(ticks):
+            exchange.advance(1.0)
+            if trading:
+                bot.last_trade_time = 0  # Lift the 5 s wall-clock cooldown so every signal trades
+                bot.trading_blocked_until = 0
+            else:
+                bot.trading_paused.set()
+            started = time.perf_counter()
+            bot.check_price_change(exchange)
+            elapsed += time.perf_counter() - started
+        bot.trading_paused.clear()
+        results[label] = {"ticks": ticks, "ticks_per_s": round(ticks / elapsed, 1),
+                          "tick_us": round(elapsed / ticks * 1e6, 2), "fills": len(bot.fill_store) - fills_before}
+    results["server_pushes"] = len(pushes)
+    return results
+
+
+# --- Server endpoints ---
+def serve(app):
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def hammer(request, requests_total, concurrency):
+    """Runs `request(session, i)` requests_total times over `concurrency` threads; latency stats."""
+    import requests
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        response = request(local.session, i)
+        latency = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(requests_total)))
+    elapsed = time.perf_counter() - started
+    return {"requests": requests_total, "concurrency": concurrency,
+            "requests_per_s": round(requests_total / elapsed, 1), **percentiles(latencies)}
+
+
+def update_payload(bot, i, rows=20):
+    """A /update_data body like the bot's, with one new transaction per push."""
+    from schema import SCHEMA_VERSION
+    price_data, balances = bot.live_sections()
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    transactions = [{"timestamp": (start + timedelta(seconds=5 * n)).strftime('%Y-%m-%d %H:%M:%S'),
+                     "type": "BUY" if n % 2 else "SELL", "amount": 0.000015, "price": 88185.0,
+                     "total_value": 1.32, "order_id": f"bench-{n}"} for n in range(i, i + rows)]
+    return {"schema": SCHEMA_VERSION, "price_data": price_data, "balances": balances, "transactions": transactions,
+            "accounting": bot.accountant.snapshot(), "risk": bot.risk_engine.metrics()}
+
+
+def bench_server(bot, server, requests_total, levels):
+    from core import StateServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server.exchange_session.factory = lambda config: SimulatedExchange(seed=3)
+    http, base = serve(server.app)
+    headers = {"KC-API-KEY": server.KUCOIN_API_KEY}
+    results = {}
+    try:
+        for concurrency in levels:
+            results[f"update_data_c{concurrency}"] = hammer(
+                lambda s, i: s.post(f"{base}/update_data", json=update_payload(bot, i + concurrency * requests_total),
+                                    headers=headers),
+                requests_total, concurrency)
+            # Without the bot's socket /api/data falls back to the cached exchange probe
+            results[f"api_data_fallback_c{concurrency}"] = hammer(
+                lambda s, i: s.get(f"{base}/api/data"), requests_total, concurrency)
+            state_server = StateServer(server.settings.ipc_socket, {"state": bot.ipc_state})
+            state_server.start()
+            try:
+                results[f"api_data_ipc_c{concurrency}"] = hammer(
+                    lambda s, i: s.get(f"{base}/api/data"), requests_total, concurrency)
+            finally:
+                state_server.stop()
+            results[f"api_transactions_c{concurrency}"] = hammer(
+                lambda s, i: s.get(f"{base}/api/transactions?exclude=FAILED&limit=20"), requests_total, concurrency)
+    finally:
+        http.shutdown()
+    return results
+
+
+# --- Transaction log ---
+def bench_transaction_log(sizes):
+    from core import read_transaction_log
+    start = datetime(2025, 1, 1)
+    results = {}
+    for lines in sizes:
+        path = os.path.join(DATA_DIR, f"transaction_history_{lines}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(lines):
+                ts = (start + timedelta(seconds=5 * i)).strftime('%Y-%m-%d %H:%M:%S')
+                f.write(f"{ts} | {'BUY' if i % 2 else 'SELL'} | Amount: 0.00001500 BTC | Price: 88185.00 USDT | "
+                        f"Total: 1.32 USDT | Order ID: order-{i}\n")
+        started = time.perf_counter()
+        full = read_transaction_log(path)
+        full_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(100):
+            read_transaction_log(path, limit=20)
+        tail_ms = (time.perf_counter() - started) * 10
+        assert len(full) == lines
+        results[str(lines)] = {"full_parse_s": round(full_s, 4), "lines_per_s": round(lines / full_s, 1),
+                               "tail20_ms": round(tail_ms, 3), "bytes": os.path.getsize(path)}
+        os.unlink(path)
+    return results
+
+
+# --- Startup ---
+def bench_startup(repeats):
+    results = {}
+    env = dict(os.environ, **BENCH_ENV)
+    for module in ("bot", "server"):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - started)
+        results[module] = {"import_s": round(statistics.median(timings), 4)}
+    return results
+
+
+# --- Comparison ---
+def flatten(tree, prefix=""):
+    for key, value in tree.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(current, baseline, tolerance):
+    """Prints changes per metric; returns the names that regressed by more than `tolerance`."""
+    old = dict(flatten(baseline["results"]))
+    regressions = []
+    for name, value in flatten(current["results"]):
+        unit = name.rsplit("_", 1)[-1]
+        if name not in old or not old[name] or unit not in ("s", "ms", "us"):
+            continue
+        higher_is_better = name.endswith("_per_s")
+        change = (value - old[name]) / old[name]
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<55} {old[name]:>12g} -> {value:>12g} ({change * 100:+6.1f}%) {flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change counted as a regression")
+    parser.add_argument("--only", nargs="*", choices=("loop", "server", "log", "startup"))
+    args = parser.parse_args()
+    sections = set(args.only or ("loop", "server", "log", "startup"))
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with contextlib.redirect_stdout(io.StringIO()):  # bot.py prints every log line
+        import bot
+        import server
+
+    results = {}
+    if "loop" in sections:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["decision_loop"] = bench_decision_loop(bot, 2_000 if args.quick else 20_000)
+    if "server" in sections:
+        if "price" not in bot.state_cache:  # Payloads are built from the bot's latest tick
+            with contextlib.redirect_stdout(io.StringIO()):
+                bench_decision_loop(bot, 10)
+        results["server"] = bench_server(bot, server, 200 if args.quick else 2_000, (1, 8) if args.quick else (1, 8, 32))
+    if "log" in sections:
+        results["transaction_log"] = bench_transaction_log((10_000, 100_000) if args.quick
+                                                           else (10_000, 100_000, 1_000_000))
+    if "startup" in sections:
+        results["startup"] = bench_startup(1 if args.quick else 3)
+
+    report = {
+        "meta": {"created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+                 "python": platform.python_version(), "platform": platform.platform(), "quick": args.quick},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Local stand-in for the Telegram Bot API (sendMessage / sendDocument).
+
+Enforces a per-chat rate limit with 429 + retry_after like Telegram does, and can add latency.
+Point the bot at it with TELEGRAM_API_BASE=http://127.0.0.1:8081.
+
+    python benchmarks/telegram_stub.py --port 8081 --rate 1 --latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+
+class TelegramStub:
+    def __init__(self, rate_per_chat=1.0, latency_ms=0.0):
+        self.rate_per_chat = rate_per_chat
+        self.latency_ms = latency_ms
+        self.messages = []
+        self.documents = []
+        self.rate_limited = 0
+        self._last_by_chat = {}
+        self.app = web.Application(client_max_size=50 * 1024 * 1024)
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    async def handle(self, request):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        method = request.match_info["method"]
+        if method == "sendMessage":
+            payload = await request.json()
+        elif method == "sendDocument":
+            payload = dict(await request.post())
+        else:
+            return web.json_response({"ok": False, "description": "Not Found"}, status=404)
+
+        chat_id = str(payload.get("chat_id"))
+        now = time.monotonic()
+        if self.rate_per_chat and now - self._last_by_chat.get(chat_id, -1e9) < 1 / self.rate_per_chat:
+            self.rate_limited += 1
+            return web.json_response({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                      "parameters": {"retry_after": 1}}, status=429)
+        self._last_by_chat[chat_id] = now
+        (self.messages if method == "sendMessage" else self.documents).append(payload)
+        return web.json_response({"ok": True, "result": {"message_id": len(self.messages) + len(self.documents)}})
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts the stub and returns its base URL."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second per chat (0 = unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = TelegramStub(args.rate, args.latency_ms)
+    web.run_app(stub.app, host="127.0.0.1", port=args.port)
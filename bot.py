@@ -4,37 +4,73 @@ import re
 import sys
 import time
 import json
+import signal
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-import ccxt
+import urllib.parse
 import requests
-from dotenv import load_dotenv
-from pytz import timezone as pytz_timezone
 import asyncio
 
-from telegram import Bot
-from telegram.error import TelegramError  # Importing TelegramError from the telegram.error module
-
-from telegram_bot import send_data_to_telegram
+from telegram_bot import create_notifier, send_data_to_telegram
+from telegram_commands import CommandInterface
+from accounting import PositionAccountant, fee_in_quote
+from archive import TransactionArchive
+from reporting import ReportEngine, format_report, window_report
+from transaction_store import TransactionStore
+from checkpoint import atomic_write_json, load_checkpoint, save_checkpoint
+from clock import ExchangeClock, LatencyStats, LatencyTrace
+from core import (TRANSACTION_LOG, ExchangeSession, LatestPusher, SharedTicker, StateServer, load_settings,
+                  read_transaction_log)
+from exchanges import VENUES, ConsolidatedBook, Router, Venue, VenueAdapter, create_client
+from execution import ExecutionEngine
+from liveness import ALERT, KILL, Heartbeat, Watchdog, thresholds_from_env
+from ohlcv import OhlcvCache, load_candles, timeframe_ms
+from order_book import KucoinBookFeed
+from strategy import create_strategy
+from records import Order, Tick, Transaction
+from risk import RiskEngine, limits_from_env
+from runtime_config import ConfigError, RuntimeConfig
+from schema import SCHEMA_VERSION, number
 
 # --- Environment Configuration ---
-MIN_BTC_AMOUNT = 0.00001      # Minimum BTC amount for orders
-TRADE_AMOUNT_USD = 1.3        # Trade amount in USD
 TRADE_PAIR = 'BTC/USDT'
 
 # Initialize global variables
-last_price = None
 last_trade_time = time.time()
 last_data_sent_time = 0     # Throttles data updates to the server
-
-# Load environment variables and ensure DATA_DIR exists
-load_dotenv()
-
-DATA_DIR = os.getenv("DATA_DIR", "./data")
-os.makedirs(DATA_DIR, exist_ok=True)
+open_orders = {}            # Submitted orders whose fill has not been booked yet, by order ID
+trading_paused = threading.Event()  # Set via Telegram /pause: keep monitoring, place no orders
+state_cache = {}            # Latest tick values (price, balances) read by Telegram commands
+trading_blocked_until = 0   # Set by strategy rejects: no new orders until then, monitoring continues
+last_order_error = None     # Why the last create_market_order call returned None
+recent_transactions = deque(maxlen=20)  # Last transaction rows, sent with each server update
+executed_commands = OrderedDict()  # Server trade commands handled, by command ID (result, or None while executing)
+last_ticker_ts = None       # Exchange timestamp (ms) of the last ticker
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.Formatter.converter = time.gmtime  # Log times in UTC, like the transaction log and information.txt
 logger = logging.getLogger(__name__)
 
+# --- Load Environment Configuration ---
+# .env, then .env.server (ENVIRONMENT=SERVER) or .env.local; shared with server.py through core.py
+settings = load_settings()
+DATA_DIR = settings.data_dir
+KUCOIN_API_KEY = settings.api_key
+SERVER_PORT = settings.server_port
+ACCOUNT_NAME = os.getenv("ACCOUNT_NAME")  # Set by supervisor.py in multi-account mode; tags server updates
+
+# --- Runtime Configuration ---
+# Tunables reloaded without a restart from BOT_CONFIG (default DATA_DIR/config.json) or the server's
+# POST /config; apply_config rebinds these globals between ticks (runtime_config.py)
+runtime_config = RuntimeConfig(os.getenv("BOT_CONFIG") or os.path.join(DATA_DIR, "config.json"),
+                               audit_path=os.path.join(DATA_DIR, "config_audit.jsonl"))
+MIN_BTC_AMOUNT = runtime_config["min_btc_amount"]      # Minimum BTC amount for orders
+TRADE_AMOUNT_USD = runtime_config["trade_amount_usd"]  # Trade amount in USD
+TRADE_COOLDOWN = runtime_config["trade_cooldown"]      # Seconds between trades
+SUMMARY_PERIOD = runtime_config["summary_period"]      # Periodic summary report interval in seconds (4 hours)
+CONFIG_POLL_INTERVAL = float(os.getenv("CONFIG_POLL_INTERVAL", 2))  # Seconds between config file checks
+
 # Check if environment variables are loaded correctly
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -47,76 +83,155 @@ print(f"Telegram Chat ID: {CHAT_ID}")
 if not TOKEN or not CHAT_ID:
     raise ValueError("Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID in environment variables.")
 
-# Initialize the bot
-bot = Bot(token=TOKEN)
-
-
-###########################################################################
-# --- Async Telegram Functions ---
-async def send_file(file_path):
-    """Sends a file to the Telegram chat."""
-    try:
-        # Check if the file exists and is not empty
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            logger.warning(f"File {file_path} does not exist or is empty.")
-            return
-
-        # Send the file asynchronously
-        with open(file_path, 'rb') as file:
-            await bot.send_document(chat_id=CHAT_ID, document=file)
-
-        logger.info(f"File {file_path} sent successfully.")
-    except TelegramError as e:
-        logger.error(f"Failed to send file: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-
-async def send_data_to_telegram():
-    """Sends the trading summary report to Telegram."""
-    summary_file_path = os.path.join(DATA_DIR, "trading_summary_report.txt")
-    if os.path.exists(summary_file_path) and os.path.getsize(summary_file_path) > 0:
-        try:
-            await send_file(summary_file_path)
-        except Exception as e:
-            logger.error(f"Error reading or sending the file: {e}")
+# Telegram notifications (summary reports, trade and alert messages) go through one queued worker
+notifier = create_notifier(
+    max_queue=int(os.getenv("TELEGRAM_QUEUE_SIZE", 1000)),
+    coalesce_window=float(os.getenv("TELEGRAM_COALESCE_SECONDS", 2)),
+)
+TELEGRAM_COMMANDS = os.getenv("TELEGRAM_COMMANDS", "1") == "1"  # Serve /status, /pnl, /trades, /pause, /resume
+
+
+
+# --- Accounting State ---
+FILL_RETENTION = int(os.getenv("FILL_RETENTION", 100000))  # Fills kept for accounting rebuilds
+fill_store = TransactionStore(FILL_RETENTION, os.path.join(DATA_DIR, "fills.jsonl"))
+accountant = PositionAccountant()
+# Report buckets older than REPORT_RETENTION seconds are merged into REPORT_FOLD_SECONDS buckets
+report_engine = ReportEngine(bucket_seconds=int(os.getenv("REPORT_BUCKET_SECONDS", 60)),
+                             fold_seconds=int(os.getenv("REPORT_FOLD_SECONDS", 3600)),
+                             retention=float(os.getenv("REPORT_RETENTION", 7 * 86400)))
+
+# --- Checkpointing ---
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "checkpoint.json")
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", 5))  # Seconds between periodic checkpoints
+last_checkpoint_time = 0
+
+# --- Order Execution ---
+# KuCoin orders and balances use the cross margin account (exchanges.VENUES)
+PRIMARY_VENUE = VENUES["kucoin"]
+
+# "market" keeps the taker-only behaviour; "post_only" works a limit order at the touch, repricing
+# as the book moves, and falls back to a market order after EXECUTION_MAX_WAIT seconds
+execution_engine = ExecutionEngine(
+    TRADE_PAIR,
+    mode=os.getenv("EXECUTION_MODE", "market"),
+    order_params=PRIMARY_VENUE.order_params,
+    max_wait=float(os.getenv("EXECUTION_MAX_WAIT", 10)),
+    poll_interval=float(os.getenv("EXECUTION_POLL_INTERVAL", 0.5)),
+    reprice_ticks=int(os.getenv("EXECUTION_REPRICE_TICKS", 1)),
+    tick_size=float(os.getenv("EXECUTION_TICK_SIZE", 0.1)),
+    min_amount=MIN_BTC_AMOUNT,
+)
+
+# --- Pre-trade Risk ---
+# Every order passes RiskEngine.admit(); RISK_* env vars set the limits (empty = off)
+risk_engine = RiskEngine(**limits_from_env(os.getenv, {"MAX_ORDERS_PER_SECOND": 2, "MAX_NOTIONAL_PER_MINUTE": 100}))
+
+# --- Liveness Watchdog ---
+# The trading loop beats "loop" every iteration and "tick"/"decision" per processed price; a watchdog thread
+# checks their ages every WATCHDOG_INTERVAL seconds (liveness.py). WATCHDOG_* thresholds (empty = off)
+# alert on Telegram, and a loop stalled past WATCHDOG_LOOP_KILL_S engages the kill switch until /unkill.
+# server.py polls the same state over the state socket for GET /health.
+WATCHDOG_INTERVAL = float(os.getenv("WATCHDOG_INTERVAL", 0.25))
+heartbeat = Heartbeat()
+heartbeat.gauge("open_orders", lambda: len(open_orders))
+heartbeat.gauge("config_pending", lambda: len(runtime_config.pending))
+heartbeat.gauge("notifications", lambda: notifier.queue_depth)
+
+def escalate(action, message, snapshot):
+    """Watchdog escalation hook; runs on the watchdog thread."""
+    if action == KILL:
+        risk_engine.engage_kill_switch(f"watchdog: {message}")
+        notifier.notify(f"🛑 Watchdog: {message}. Kill switch engaged; /unkill to release.")
+    elif action == ALERT:
+        notifier.notify(f"🚨 Watchdog: {message} (open orders {snapshot['queues'].get('open_orders')})")
     else:
-        logger.warning(f"Summary file {summary_file_path} is empty or does not exist.")
-
-async def loop_send_summary():
-    """Loops to send trading summary at regular intervals (4 hours)."""
-    while True:
+        notifier.notify(f"✅ Watchdog: {message}")
+
+# The execution engine beats "loop" around each exchange request while an order is worked, so a
+# healthy loop never goes LOOP_ALERT_S without a beat; TICK/DECISION_ALERT_S leave room for a 10 s
+# post-only order and its market fallback between two ticks
+watchdog = Watchdog(heartbeat, thresholds_from_env(os.getenv, {"LOOP_ALERT_S": 5, "LOOP_KILL_S": 60,
+                                                               "TICK_ALERT_S": 15, "DECISION_ALERT_S": 15,
+                                                               "OPEN_ORDERS_ALERT": 5}),
+                    escalate, interval=WATCHDOG_INTERVAL)
+
+# --- Strategy ---
+# Trading decisions come from a strategy plugin (strategy.py): "threshold" is the fixed-percentage rule,
+# "adaptive" scales thresholds, slippage guard and size with realized volatility. STRATEGY_PARAMS is a
+# JSON object of constructor overrides, e.g. {"window": 600, "size_limits": [0.5, 3]}
+strategy = create_strategy(os.getenv("STRATEGY", "threshold"), trade_amount_usd=TRADE_AMOUNT_USD,
+                           **json.loads(os.getenv("STRATEGY_PARAMS") or "{}"))
+strategy_defaults = {}  # Constructor values of attributes overridden by the strategy_params setting
+
+
+def check_config(values):
+    """Extra validation for a candidate config: strategy_params must name numeric strategy attributes."""
+    errors = []
+    for name, value in values["strategy_params"].items():
+        current = strategy_defaults.get(name, getattr(strategy, name, None))
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            errors.append(f"strategy_params.{name}: not a numeric setting of the {strategy.name} strategy")
+            continue
         try:
-            await send_data_to_telegram()  # Send the trading summary report
-            await asyncio.sleep(14400)  # Sleep for 4 hours (14400 seconds) before the next iteration
-        except Exception as e:
-            logger.error(f"Error in loop: {e}")
-            await asyncio.sleep(30)  # Retry every 30 seconds in case of error
-###########################################################################
+            if number(value, f"strategy_params.{name}") is None:
+                errors.append(f"strategy_params.{name}: a value is required")
+        except ValueError as e:
+            errors.append(str(e))
+    return errors
+
+
+def apply_strategy_params(params):
+    """Sets overridden strategy attributes and restores the constructor value of any no longer listed."""
+    for name in list(strategy_defaults):
+        if name not in params:
+            setattr(strategy, name, strategy_defaults.pop(name))
+    for name, value in params.items():
+        strategy_defaults.setdefault(name, getattr(strategy, name))
+        setattr(strategy, name, float(value))
+
+
+def apply_config(changes):
+    """RuntimeConfig listener, run on the trading thread between ticks."""
+    global MIN_BTC_AMOUNT, TRADE_AMOUNT_USD, TRADE_COOLDOWN, SUMMARY_PERIOD
+    if "trade_amount_usd" in changes:
+        TRADE_AMOUNT_USD = strategy.trade_amount_usd = changes["trade_amount_usd"][1]
+    if "min_btc_amount" in changes:
+        MIN_BTC_AMOUNT = execution_engine.min_amount = changes["min_btc_amount"][1]
+        for engine in venue_engines.values():
+            engine.min_amount = MIN_BTC_AMOUNT
+    if "trade_cooldown" in changes:
+        TRADE_COOLDOWN = changes["trade_cooldown"][1]
+    if "summary_period" in changes:
+        SUMMARY_PERIOD = changes["summary_period"][1]
+    if "strategy_params" in changes:
+        apply_strategy_params(changes["strategy_params"][1])
+
+
+def config_update(changes, source="server"):
+    """State socket handler for the server's POST /config: stages `changes` or reports why not."""
+    try:
+        return {"staged": runtime_config.update(changes, source=source), "version": runtime_config.version}
+    except ConfigError as e:
+        return {"errors": e.errors}
 
 
-# --- Load Environment Configuration ---
-def load_environment():
-    env = os.environ.get('ENVIRONMENT', 'LOCAL').upper()
-    env_file = '.env.server' if env == 'SERVER' else '.env.local'
-    default_data_dir = '/home/ubuntu/bot5/data' if env == 'SERVER' else 'data'
-    try:
-        load_dotenv(env_file)
-        logging.info(f"Loaded {env_file}")
-    except Exception as e:
-        logging.warning(f"Could not load {env_file}: {e}")
-    global DATA_DIR, KUCOIN_API_KEY, KUCOIN_API_SECRET, KUCOIN_API_PASSPHRASE, SERVER_PORT
-    DATA_DIR = os.getenv('DATA_DIR', default_data_dir)
-    os.makedirs(DATA_DIR, exist_ok=True)
-    KUCOIN_API_KEY = os.getenv("KUCOIN_API_KEY")
-    KUCOIN_API_SECRET = os.getenv("KUCOIN_API_SECRET")
-    KUCOIN_API_PASSPHRASE = os.getenv("KUCOIN_API_PASSPHRASE")
-    SERVER_PORT = os.getenv("SERVER_PORT", "5000")
-    if not all([KUCOIN_API_KEY, KUCOIN_API_SECRET, KUCOIN_API_PASSPHRASE]):
-        logging.error("Missing KuCoin API credentials. Exiting.")
-        sys.exit(1)
-    logging.info(f"Env: {env}, DATA_DIR={DATA_DIR}, PORT={SERVER_PORT}")
+runtime_config.validator = check_config
+runtime_config.listeners.append(apply_config)
+if (config_errors := check_config(runtime_config.values)):  # Startup overrides, now that the strategy exists
+    logging.error(f"Ignoring strategy_params: {'; '.join(config_errors)}")
+    runtime_config.values = {**runtime_config.values, "strategy_params": {}}
+apply_strategy_params(runtime_config["strategy_params"])
 
-load_environment()
+# Indicator warm-up from cached candles (ohlcv.py) so the strategy does not start cold; an empty
+# WARMUP_TIMEFRAME disables it. WARMUP_TICK_SECONDS is the live loop's tick spacing.
+WARMUP_TIMEFRAME = os.getenv("WARMUP_TIMEFRAME", "1m")
+WARMUP_BARS = int(os.getenv("WARMUP_BARS", 500))
+WARMUP_TICK_SECONDS = float(os.getenv("WARMUP_TICK_SECONDS", 1))
+
+# --- Local Order Book ---
+ORDER_BOOK_FEED = os.getenv("ORDER_BOOK_FEED", "1") == "1"  # Spread/depth-aware triggers from the L2 stream
+book_feed = None
 
 
 # --- Example BTC Balance Extraction ---
@@ -126,18 +241,6 @@ else:
     logging.warning("BTC Balance not found")
 
 
-def check_connection_status(exchange) -> str:
-    if exchange is None:
-        return "Disconnected"
-    try:
-        exchange.fetch_balance()  # Example API call
-        return "Connected"
-    except Exception as e:
-        logging.error(f"API connection error: {e}")
-        return "Disconnected"
-
-
-
 # --- Utility Functions ---
 def get_public_ip():
     try:
@@ -176,17 +279,27 @@ def serialize_datetime(v):
 
 
 
-def send_data_to_server(price_data, balances, transactions, retries=3, timeout=10):
+def send_data_to_server(price_data, balances, transactions, retries=3, timeout=10, accounting=None, risk=None,
+                        latency=None):
     ip = get_public_ip()  # Will return Ngrok URL if running Ngrok
     if not ip:
         logging.error("No public IP available.")
         return False, None, "No public IP"
     url = f"http://{ip}:{SERVER_PORT}/update_data"  # Use Ngrok URL if available
     data = {
+        "schema": SCHEMA_VERSION,  # Plain numbers; units and precision are defined in schema.py
         "price_data": {k: serialize_datetime(v) for k, v in price_data.items()},
         "balances": {k: serialize_datetime(v) for k, v in balances.items()},
-        "transactions": [{k: serialize_datetime(v) for k, v in tx.items()} for tx in transactions]
+        "transactions": [tx.to_dict() for tx in transactions]  # records.Transaction rows, already JSON types
     }
+    if ACCOUNT_NAME:
+        data["account"] = ACCOUNT_NAME
+    if accounting is not None:
+        data["accounting"] = accounting
+    if risk is not None:
+        data["risk"] = risk
+    if latency is not None:
+        data["latency"] = latency
     headers = {'KC-API-KEY': KUCOIN_API_KEY, 'Content-Type': 'application/json'}
     for attempt in range(retries):
         try:
@@ -205,56 +318,43 @@ def send_data_to_server(price_data, balances, transactions, retries=3, timeout=1
         time.sleep(min(5 * (attempt + 1), 30))  # Exponential backoff for retries
     return False, None, "Max retries reached"
 
+def push_live_update(update):
+    """server_push worker: sends one dashboard update and logs when balances or price changed."""
+    success, _, _ = send_data_to_server(update["price_data"], update["balances"], update["transactions"],
+                                        accounting=update.get("accounting"), risk=update.get("risk"),
+                                        latency=update.get("latency"))
+    last_sent_data = update.get("last_sent_data")
+    if success and last_sent_data and last_sent_data != getattr(push_live_update, "last_sent_data", None):
+        btc_balance, usdt_balance, current_price = last_sent_data
+        log_message(f"Data updated: BTC {btc_balance:.8f}, USDT {usdt_balance:.2f}, Price {current_price:.2f}")
+        push_live_update.last_sent_data = last_sent_data
+    return success
+
+# /update_data pushes run on their own thread (latest snapshot wins): with retries and backoff a
+# slow or unreachable server can take about a minute per push, which must not stall the trading loop
+server_push = LatestPusher(push_live_update, name="server-push")
+
 
 
 def get_transactions_from_file():
-    file_path = os.path.join(DATA_DIR, "transaction_history.txt")
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        # Only keep the last 20 transactions
-        txs = []
-        for line in lines[-20:]:
-            parts = line.strip().split(" | ")
-            if len(parts) == 6:
-                ts, t_type, amt_str, price_str, total_str, order_str = parts
-                amt = amt_str.split(": ")[1].split()[0]
-                price = price_str.split(": ")[1].split()[0]
-                total = total_str.split(": ")[1].split()[0]
-                order_id = order_str.split(": ")[1]
-                txs.append({"timestamp": ts, "type": t_type, "amount": amt,
-                            "price": price, "total_value": total, "order_id": order_id})
-        return txs
-    except FileNotFoundError:
-        logging.info("transaction_history.txt not found, starting empty.")
-        return []
-    except Exception as e:
-        logging.error(f"Error reading transactions: {e}")
-        return []
+    return read_transaction_log(os.path.join(DATA_DIR, TRANSACTION_LOG), limit=20)
 
 # --- Exchange Connection ---
+# One client per process; its health comes from the balance/ticker calls made every loop anyway
+exchange_session = ExchangeSession(settings, ccxt_id=PRIMARY_VENUE.ccxt_id)
+
+# Offset to the exchange's clock from fetch_time round trips; every log, file and fill timestamp
+# is exchange-synchronized UTC, and ticks/orders carry latency traces (clock.py)
+CLOCK_SYNC_INTERVAL = float(os.getenv("CLOCK_SYNC_INTERVAL", 60))  # Seconds between offset samples
+exchange_clock = ExchangeClock(lambda: exchange_session.connect().fetch_time())
+latency_stats = LatencyStats()
+
 def connect_to_exchange():
     """Connect to KuCoin Exchange"""
-    try:
-        exchange = ccxt.kucoin({
-            'apiKey': os.getenv("KUCOIN_API_KEY"),
-            'secret': os.getenv("KUCOIN_API_SECRET"),
-            'password': os.getenv("KUCOIN_API_PASSPHRASE"),
-        })
-        exchange.load_markets()
-        return exchange
-    except Exception as e:
-        logger.error(f"KuCoin connection error: {e}")
-        return None
+    return exchange_session.connect()
 
 def check_api_connection(exchange):
-    try:
-        exchange.fetch_balance()
-        logging.debug("API Connection Successful")  # Changed from INFO to DEBUG to reduce log spam
-        return "Connected"
-    except Exception as e:
-        logging.error(f"API connection error: {e}")
-        return "Disconnected"
+    return exchange_session.status()
 
 
 # --- Margin Balance ---
@@ -263,39 +363,141 @@ def get_margin_balance(exchange):
         logging.error("Exchange is not connected. Cannot fetch margin balance.")
         return None, None
     try:
-        balance = exchange.fetch_balance({'type': 'margin'})
+        balance = exchange.fetch_balance(PRIMARY_VENUE.balance_params)
         btc_balance = float(balance.get('BTC', {}).get('free', 0))
         usdt_balance = float(balance.get('USDT', {}).get('free', 0))
+        exchange_session.mark_ok()
+        if order_router is not None:
+            # Routed fills land on every venue, so the bot's balances are the sum over all of them
+            primary = order_router.venues[order_router.primary]
+            primary.balances = (btc_balance, usdt_balance)
+            others = [adapter for adapter in order_router.venues.values() if adapter is not primary]
+            order_router.book.refresh_balances(others)
+            for adapter in others:
+                if adapter.balances is not None:
+                    btc_balance += adapter.balances[0]
+                    usdt_balance += adapter.balances[1]
         logging.info(f"[BALANCE] BTC: {btc_balance:.8f} BTC | USDT: {usdt_balance:.2f} USDT")
         return btc_balance, usdt_balance
     except Exception as e:
         logging.error(f"Error getting margin balance: {e}")
+        exchange_session.mark_failed(e)
         return None, None
 
 
+# --- Multi-venue Routing ---
+# ROUTE_VENUES lists extra exchanges.VENUES names (e.g. "binance,okx"); every order then goes to whichever of
+# KuCoin and those venues has the best effective price after taker fees. Credentials come from
+# <NAME>_API_KEY/_API_SECRET/_API_PASSWORD, fee tiers from <NAME>_TAKER_FEE/_MAKER_FEE. Empty = KuCoin only.
+ROUTE_VENUES = [name.strip().lower() for name in os.getenv("ROUTE_VENUES", "").split(",") if name.strip()]
+ROUTE_MAX_BOOK_AGE = float(os.getenv("ROUTE_MAX_BOOK_AGE", 2))  # Seconds a venue's book counts for the BBO
+order_router = None
+venue_engines = {}  # Venue name -> ExecutionEngine with that venue's order params
+
+def venue_from_env(name):
+    venue = VENUES[name]
+    prefix = name.upper()
+    return Venue(name, venue.ccxt_id, venue.order_params, venue.balance_params,
+                 taker_fee=float(os.getenv(f"{prefix}_TAKER_FEE", venue.taker_fee)),
+                 maker_fee=float(os.getenv(f"{prefix}_MAKER_FEE", venue.maker_fee)))
+
+def setup_routing(exchange):
+    """Connects the ROUTE_VENUES and builds the router; venues that fail to connect are left out."""
+    global order_router
+    if not ROUTE_VENUES:
+        return
+    adapters = [VenueAdapter(venue_from_env(PRIMARY_VENUE.name), exchange, TRADE_PAIR)]
+    for name in ROUTE_VENUES:
+        if name == PRIMARY_VENUE.name:
+            continue
+        if name not in VENUES:
+            logging.error(f"Unknown venue {name!r} in ROUTE_VENUES; expected one of {sorted(VENUES)}")
+            continue
+        prefix = name.upper()
+        try:
+            client = create_client(VENUES[name], os.getenv(f"{prefix}_API_KEY"), os.getenv(f"{prefix}_API_SECRET"),
+                                   os.getenv(f"{prefix}_API_PASSWORD"))
+        except Exception as e:
+            logging.error(f"Could not connect to {name}: {e}; not routing there")
+            continue
+        adapters.append(VenueAdapter(venue_from_env(name), client, TRADE_PAIR))
+    order_router = Router(ConsolidatedBook(adapters, max_age=ROUTE_MAX_BOOK_AGE), PRIMARY_VENUE.name)
+    for adapter in adapters:
+        if adapter.name == PRIMARY_VENUE.name:
+            engine = execution_engine
+        else:
+            engine = ExecutionEngine(TRADE_PAIR, mode=execution_engine.mode, order_params=adapter.order_params,
+                                     max_wait=execution_engine.max_wait, poll_interval=execution_engine.poll_interval,
+                                     reprice_ticks=execution_engine.reprice_ticks, tick_size=execution_engine.tick_size,
+                                     min_amount=MIN_BTC_AMOUNT)
+            engine.stats = execution_engine.stats  # One set of execution stats across venues
+        venue_engines[adapter.name] = engine
+    logging.info(f"Routing orders across {list(order_router.venues)}")
+
+
 # --- Trading Functions ---
+# In multi-account mode the supervisor fetches the ticker once for all accounts into shared memory;
+# a ticker older than SHARED_TICKER_MAX_AGE seconds falls back to this process's own request
+MARKET_DATA_SHM = os.getenv("MARKET_DATA_SHM")
+SHARED_TICKER_MAX_AGE = float(os.getenv("SHARED_TICKER_MAX_AGE", 3))
+shared_ticker = None
+if MARKET_DATA_SHM:
+    try:
+        shared_ticker = SharedTicker(MARKET_DATA_SHM)
+    except FileNotFoundError:
+        logging.warning(f"Shared market data {MARKET_DATA_SHM} not found; fetching tickers directly.")
+
 def get_current_price(exchange):
+    global last_ticker_ts
+    if shared_ticker is not None and (ticker := shared_ticker.read(max_age=SHARED_TICKER_MAX_AGE)):
+        last_ticker_ts = ticker['timestamp']
+        return ticker['last']
     try:
-        return exchange.fetch_ticker(TRADE_PAIR)['last']
+        ticker = exchange.fetch_ticker(TRADE_PAIR)
+        exchange_session.mark_ok()
+        last_ticker_ts = ticker.get('timestamp')  # Exchange time of the tick, for the feed latency stage
+        return ticker['last']
     except Exception as e:
         logging.error(f"Current price error: {e}")
+        exchange_session.mark_failed(e)
         return None
 
-def rotate_logs(max_lines=500):
-    file_path = os.path.join(DATA_DIR, "transaction_history.txt")
-    if os.path.exists(file_path):
-        try:
+# transaction_history.txt keeps the newest TRANSACTION_LOG_KEEP rows; once it grows past
+# TRANSACTION_LOG_ROTATE_BYTES the older rows move to compressed monthly segments (archive.py)
+TRANSACTION_LOG_KEEP = int(os.getenv("TRANSACTION_LOG_KEEP", 500))
+TRANSACTION_LOG_ROTATE_BYTES = int(os.getenv("TRANSACTION_LOG_ROTATE_BYTES", 256 * 1024))
+transaction_archive = TransactionArchive(os.path.join(DATA_DIR, "archive"))
+transaction_log_lock = threading.Lock()  # Rotation rewrites the log; appends must not land in between
+
+def rotate_logs(keep=TRANSACTION_LOG_KEEP):
+    """Archives all but the newest `keep` transaction rows once the log passes the size limit.
+
+    Called with every log message, so below the limit it costs one stat() and reads nothing.
+    """
+    file_path = os.path.join(DATA_DIR, TRANSACTION_LOG)
+    try:
+        if os.path.getsize(file_path) < TRANSACTION_LOG_ROTATE_BYTES:
+            return
+    except OSError:
+        return
+    try:
+        with transaction_log_lock:
             with open(file_path, "r", encoding="utf-8") as f:
                 lines = f.readlines()
-            if len(lines) > max_lines:
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.writelines(lines[-max_lines:])  # Only keep the most recent 500 lines
-        except Exception as e:
-            logging.error(f"Rotate logs error: {e}")
+            if len(lines) <= keep:
+                return
+            archived = transaction_archive.append(lines[:-keep])  # Synced before the log is cut
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines[-keep:])
+            os.replace(tmp_path, file_path)
+        logging.info(f"Archived {archived} transaction rows to {transaction_archive.directory}")
+    except Exception as e:
+        logging.error(f"Rotate logs error: {e}")
 
 def log_message(message, level="info"):
     rotate_logs()
-    ts = datetime.now(pytz_timezone('UTC')).strftime('%Y-%m-%d %H:%M:%S')
+    ts = exchange_clock.utc_string()
     entry = f"{ts} | {message}"
     getattr(logging, level)(entry)
     print(entry)
@@ -304,19 +506,177 @@ def log_message(message, level="info"):
 
 def log_transaction(t_type, amount, price, total, order_id="N/A"):
     try:
-        ts = datetime.now(pytz_timezone('UTC')).strftime('%Y-%m-%d %H:%M:%S')
+        ts = exchange_clock.utc_string()
         amount_str = f"{float(amount):.8f}"
         price_str = f"{float(price):.2f}"
-        total_str = f"{float(total)::.2f}"
+        total_str = f"{float(total):.2f}"
         entry = f"{ts} | {t_type} | Amount: {amount_str} BTC | Price: {price_str} USDT | Total: {total_str} USDT | Order ID: {order_id}\n"
-        with open(os.path.join(DATA_DIR, "transaction_history.txt"), 'a', encoding="utf-8") as f:
+        with transaction_log_lock, open(os.path.join(DATA_DIR, TRANSACTION_LOG), 'a', encoding="utf-8") as f:
             f.write(entry)
+        recent_transactions.append(Transaction(ts, t_type, float(amount), float(price), float(total), order_id))
+        if t_type.startswith("FAILED"):
+            notifier.notify(f"⚠️ {t_type}: {order_id}")
     except Exception as e:
         logging.error(f"Logging transaction error: {e}")
 
+def record_fill(order_type, filled, price, fee, order_id, trigger_price=None, latency_ms=None, trace=None):
+    """Applies a fill to the accountant and report engine and journals it for rebuilds.
+
+    With a `trace` the record carries the tick-to-fill timestamps and their latency breakdown.
+    """
+    now = exchange_clock.now_ms() / 1000
+    realized = accountant.on_fill(order_type, filled, price, fee)
+    report_engine.on_fill(now, order_type, filled, price, trigger_price, fee, realized, latency_ms)
+    report_engine.on_equity(now, accountant.net_pnl)
+    notifier.notify(f"{'🟢' if order_type.lower() == 'buy' else '🔴'} {order_type.upper()} {float(filled):.8f} BTC "
+                    f"@ {float(price):.2f} USDT | realized {realized:+.4f} | net P&L {accountant.net_pnl:+.4f} USDT")
+    fill = {
+        "timestamp": exchange_clock.utc_string(),
+        "ts": now,
+        "type": order_type.upper(),
+        "amount": filled,
+        "price": price,
+        "total_value": filled * price,
+        "fee": fee,
+        "realized_pnl": realized,
+        "trigger_price": trigger_price,
+        "latency_ms": latency_ms,
+        "equity": accountant.net_pnl,
+        "order_id": order_id,
+    }
+    if trace is not None:
+        fill["timeline"] = trace.timestamps()
+        fill["latency"] = trace.breakdown()
+        latency_stats.record(fill["latency"])
+        logging.info(f"Latency {order_type.upper()} {order_id}: " +
+                     ", ".join(f"{stage} {ms:.1f}" for stage, ms in fill["latency"].items()) + " ms")
+    fill_store.add(fill)
+    strategy.on_fill(fill)
+    return realized
+
+def rebuild_accounting(checkpoint=None):
+    """Restores the accountant from a checkpoint (or the opening balance in information.txt) and replays newer fills."""
+    started = time.perf_counter()
+    fills = fill_store.latest(len(fill_store))
+    if checkpoint:
+        accountant.restore(checkpoint["accounting"])
+        replay = fill_store.since(checkpoint.get("fill_seq", -1))
+    else:
+        info_file = os.path.join(DATA_DIR, "information.txt")
+        try:
+            with open(info_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            accountant.seed(float(data.get("initial_btc") or 0), float(data.get("bot_start_price") or 0))
+        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+            logging.warning(f"No opening balance for accounting ({e}), starting flat.")
+        replay = fills
+    # Fills the replay needs that the ring (FILL_RETENTION) has already evicted
+    missing = fill_store.first_seq - (checkpoint.get("fill_seq", -1) + 1 if checkpoint else 0)
+    if missing > 0:
+        message = (f"Accounting rebuild is incomplete: {missing} older fills were evicted (FILL_RETENTION "
+                   f"{FILL_RETENTION}), so position and realized P&L exclude them")
+        logging.error(message)
+        notifier.notify(f"⚠️ {message}")
+    count = accountant.rebuild(replay)
+    report_engine.rebuild(fills)
+    logging.info(f"Accounting rebuilt ({count} fills replayed) in {(time.perf_counter() - started) * 1000:.1f} ms: "
+                 f"{accountant.snapshot()}")
+
+# --- State Checkpoints ---
+def save_state_checkpoint():
+    """Atomically persists strategy, accounting and open order state."""
+    global last_checkpoint_time
+    try:
+        save_checkpoint(CHECKPOINT_FILE, {
+            "saved_at": time.time(),
+            "strategy": {"name": strategy.name, "state": strategy.state(), "last_trade_time": last_trade_time,
+                         "paused": trading_paused.is_set()},
+            "accounting": accountant.state(),
+            "risk": risk_engine.state(),
+            "fill_seq": fill_store.last_seq,
+            "open_orders": open_orders,
+            "commands": executed_commands,
+        })
+        last_checkpoint_time = time.time()
+    except Exception as e:
+        logging.error(f"Checkpoint error: {e}")
+
+def resume_from_checkpoint(exchange, current_price):
+    """Restores state from the last checkpoint and reconciles it with the exchange. Returns False if there is none."""
+    global last_trade_time
+    started = time.perf_counter()
+    checkpoint = load_checkpoint(CHECKPOINT_FILE)
+    if not checkpoint:
+        return False
+
+    saved = checkpoint.get("strategy", {})
+    if saved.get("name", strategy.name) == strategy.name:
+        # Older checkpoints only stored the threshold base price as "last_price"
+        strategy.restore(saved.get("state") or {"base_price": saved.get("last_price")}, current_price)
+    last_trade_time = saved.get("last_trade_time", last_trade_time)
+    if saved.get("paused"):
+        trading_paused.set()  # A /pause survives restarts until /resume
+    risk_engine.restore(checkpoint.get("risk") or {})  # An engaged kill switch survives restarts too
+    executed_commands.update(checkpoint.get("commands") or {})
+    rebuild_accounting(checkpoint)
+    logging.info(f"Resumed from checkpoint saved {time.time() - checkpoint.get('saved_at', 0):.0f}s ago "
+                 f"in {(time.perf_counter() - started) * 1000:.1f} ms (base price {strategy.base_price})")
+
+    reconcile_with_exchange(exchange, current_price, checkpoint)
+    save_state_checkpoint()
+    return True
+
+def venue_client(name, exchange):
+    """Client of the venue an order was routed to; the primary `exchange` for older checkpoints."""
+    if order_router is not None and name in order_router.venues:
+        return order_router.venues[name].client
+    return exchange
+
+def reconcile_with_exchange(exchange, current_price, checkpoint):
+    """Books fills of orders that were in flight at the checkpoint and aligns the position with the balance."""
+    booked = {str(f.get("order_id")) for f in fill_store.since(checkpoint.get("fill_seq", -1))}
+    for order_id, pending in (checkpoint.get("open_orders") or {}).items():
+        if order_id in booked:
+            continue
+        pending = Order.from_dict(pending)
+        try:
+            details = venue_client(pending.venue, exchange).fetch_order(order_id, TRADE_PAIR)
+        except Exception as e:
+            logging.error(f"Could not reconcile order {order_id}: {e}")
+            open_orders[order_id] = pending
+            continue
+        filled = float(details.get('filled') or 0)
+        if filled > 0:
+            fill_price = float(details.get('average') or details.get('price') or current_price)
+            log_message(f"Reconciled in-flight {pending.side.upper()} {order_id}: {filled:.8f} BTC at {fill_price:.2f}")
+            log_transaction(pending.side.upper(), filled, fill_price, filled * fill_price, order_id)
+            record_fill(pending.side, filled, fill_price, fee_in_quote(details.get('fee'), fill_price), order_id,
+                        pending.trigger_price)
+        if details.get('status') == 'open':
+            open_orders[order_id] = pending
+
+    clients = {name: adapter.client for name, adapter in order_router.venues.items()} if order_router else \
+        {PRIMARY_VENUE.name: exchange}
+    for name, client in clients.items():
+        try:
+            exchange_open = client.fetch_open_orders(TRADE_PAIR)
+            unknown = [o['id'] for o in exchange_open if o['id'] not in open_orders]
+            if unknown:
+                logging.warning(f"{name} has open orders not tracked by the bot: {unknown}")
+        except Exception as e:
+            logging.error(f"Could not fetch open orders from {name}: {e}")
+
+    btc_balance, _ = get_margin_balance(exchange)
+    if btc_balance is not None:
+        delta = btc_balance - accountant.position
+        if abs(delta) >= MIN_BTC_AMOUNT:
+            logging.warning(f"Position {accountant.position:.8f} BTC differs from balance {btc_balance:.8f} BTC; "
+                            f"booking {delta:+.8f} BTC at {current_price:.2f}")
+            accountant.adjust_position(delta, current_price)
+
 def can_trade():
     global last_trade_time
-    return (time.time() - last_trade_time) >= 5
+    return (time.time() - last_trade_time) >= TRADE_COOLDOWN
 
 def reset_last_trade_time():
     global last_trade_time
@@ -325,57 +685,108 @@ def reset_last_trade_time():
 
 
 
-def create_market_order(exchange, order_type, amount_usd=None, amount_btc=None):
-    """Create a market order on KuCoin"""
-    global last_price
+def create_market_order(exchange, order_type, amount_usd=None, amount_btc=None, trigger_price=None, trace=None):
+    """Create a market order on KuCoin. Returns the order, or None with the reason in last_order_error.
+
+    `trace` is the LatencyTrace of the tick that triggered the order; orders without one (server
+    commands) start their trace at the decision.
+    """
+    global last_order_error
+    last_order_error = None
+    trace = trace or LatencyTrace(exchange_clock)
+    trace.mark("decision")
     price = fetch_with_retry(lambda: get_current_price(exchange))
 
     if not price or price == 0:
         logger.warning("Failed to get valid price, aborting trade.")
+        last_order_error = "no valid price"
         return None
+    trigger_price = trigger_price or price
 
     try:
         if order_type == "buy":
-            # Calculate BTC amount based on USD
-            btc_amt = amount_usd / price
+            # Calculate BTC amount based on USD (manual trades may give it in BTC)
+            btc_amt = amount_btc if amount_btc is not None else amount_usd / price
             # Round to 8 decimal places (KuCoin precision for BTC)
             btc_amt = round(btc_amt, 8)
 
             if btc_amt < MIN_BTC_AMOUNT:
                 logger.warning(f"Buy amount {btc_amt:.8f} BTC is below the minimum {MIN_BTC_AMOUNT} BTC")
+                last_order_error = "below minimum amount"
                 return None
 
-            # Create the buy order
-            order = exchange.create_market_buy_order(TRADE_PAIR, btc_amt, params={'marginMode': 'cross'})
+            amount = btc_amt
         elif order_type == "sell":
+            if amount_btc is None:
+                amount_btc = amount_usd / price
             if amount_btc < MIN_BTC_AMOUNT:
                 logger.warning(f"Sell amount {amount_btc} BTC is below the minimum {MIN_BTC_AMOUNT} BTC")
+                last_order_error = "below minimum amount"
                 return None
 
             # Round to 8 decimal places (KuCoin precision for BTC)
             amount_btc = round(amount_btc, 8)
 
-            # Create the sell order
-            order = exchange.create_market_sell_order(TRADE_PAIR, amount_btc, params={'marginMode': 'cross'})
+            amount = amount_btc
         else:
             logger.warning(f"Invalid order type: {order_type}")
+            last_order_error = "invalid order type"
             return None
 
-        time.sleep(1)  # Allow exchange to process the order
+        # Pre-trade limits: position, order and notional rate, daily loss, kill switch
+        rejection = risk_engine.admit(order_type, amount, price, accountant.position, accountant.net_pnl)
+        if rejection:
+            log_message(f"{order_type.upper()} of {amount:.8f} BTC rejected by risk engine: {rejection}", "warning")
+            last_order_error = rejection
+            return None
 
-        # Fetch order details to confirm execution
-        order_details = exchange.fetch_order(order['id'], TRADE_PAIR)
-        filled = float(order_details.get('filled', 0))
-        actual_price = float(order_details.get('price', price))
+        venue, client, engine = PRIMARY_VENUE.name, exchange, execution_engine
+        # Arrival mid for execution cost from a book already held; the engine fetches one otherwise
+        book_quote = book_feed.quote() if book_feed else None
+        arrival_mid = book_quote["mid"] if book_quote else None
+        if order_router is not None:
+            route = order_router.route(order_type, amount)
+            venue = route["venue"]
+            client, engine = order_router.venues[venue].client, venue_engines[venue]
+            arrival_mid = order_router.venues[venue].book.mid  # Just refreshed by route()
+            if route["reason"]:
+                logger.warning(f"Routing {order_type} to {venue}: {route['reason']}")
+            elif route["savings_bps"] is not None:
+                logger.info(f"Routing {order_type} to {venue}: effective {route['effective']:.2f}, "
+                            f"{route['savings_bps']:.2f} bps vs {order_router.primary} "
+                            f"(decision {route['decision_us']:.0f} us, books {route['refresh_ms']:.0f} ms)")
+
+        def track_order(order_id, side, order_amount):
+            # Persist each in-flight order so a crash before the fill is booked can be reconciled on resume
+            open_orders[order_id] = Order(side, order_amount, trigger_price, time.time(), venue)
+            save_state_checkpoint()
+
+        # Market order, or post-only limit at the touch with market fallback (EXECUTION_MODE)
+        order = engine.execute(client, order_type, amount, on_submit=track_order, trace=trace,
+                               arrival_mid=arrival_mid, on_progress=lambda: heartbeat.beat("loop"))
+        filled = float(order.get('filled') or 0)
+        actual_price = float(order.get('average') or price)
         total_value = filled * actual_price
+        fee = fee_in_quote(order.get('fee'), actual_price)
+        latency_ms = order.get('latency_ms')
 
         # Log with actual execution price and filled amount
         if filled > 0:
             logger.info(f"{order_type.upper()} executed: {filled:.8f} BTC at {actual_price:.2f} USDT")
-            log_transaction(order_type.upper(), filled, actual_price, total_value, order.get('id', "N/A"))
+            if order.get('effective_cost_bps') is not None:
+                logger.info(f"Execution: maker {order['maker_filled']:.8f} / taker {order['taker_filled']:.8f} BTC, "
+                            f"effective cost {order['effective_cost_bps']:.2f} bps")
+            log_transaction(order_type.upper(), filled, actual_price, total_value, order.get('id') or "N/A")
+            record_fill(order_type, filled, actual_price, fee, order.get('id') or "N/A", trigger_price, latency_ms,
+                        trace)
         else:
             logger.warning(f"{order_type.upper()} order might be pending or partially filled.")
-            log_transaction(f"PARTIAL {order_type.upper()}", filled, actual_price, total_value, order.get('id', "N/A"))
+            log_transaction(f"PARTIAL {order_type.upper()}", filled, actual_price, total_value, order.get('id') or "N/A")
+        if filled > 0 or order.get('status') != 'open':
+            for order_id in order['ids']:
+                if order_id != order.get('unresolved'):  # Still possibly live; reconciled on resume
+                    open_orders.pop(order_id, None)
+        save_state_checkpoint()
 
         reset_last_trade_time()  # Reset the trade cooldown
         return order
@@ -384,26 +795,90 @@ def create_market_order(exchange, order_type, amount_usd=None, amount_btc=None):
         logger.error(f"{order_type.capitalize()} order error: {e}")
         log_transaction(f"FAILED {order_type.upper()}", 0, price, 0, f"API error: {e}")
         reset_last_trade_time()  # Reset the trade cooldown after failure
+        last_order_error = f"API error: {e}"
         return None
 
 
 
 
 
+# --- Server Trade Commands ---
+COMMAND_POLL_INTERVAL = float(os.getenv("COMMAND_POLL_INTERVAL", 1))  # 0 disables manual trades from the server
+COMMAND_HISTORY = 500  # Handled command IDs remembered so a redelivered command is never traded twice
+
+def poll_trade_commands(exchange, server_url):
+    """Executes trade commands queued by the server's /execute_trade and acknowledges each one."""
+    headers = {'KC-API-KEY': KUCOIN_API_KEY}
+    try:
+        r = requests.post(f"{server_url}/commands/claim", json={"limit": 5}, headers=headers, timeout=5)
+        r.raise_for_status()
+        commands = r.json().get("commands") or []
+    except Exception as e:
+        logging.error(f"Command poll error: {e}")
+        return
+    for command in commands:
+        ack = execute_trade_command(exchange, command)
+        command_path = urllib.parse.quote(str(command['id']), safe='')
+        try:
+            requests.post(f"{server_url}/commands/{command_path}/ack", json=ack, headers=headers,
+                          timeout=5).raise_for_status()
+        except Exception as e:
+            # The server re-delivers the command when the claim lapses; it is answered from executed_commands
+            logging.error(f"Command ack error for {command['id']}: {e}")
+
+def execute_trade_command(exchange, command):
+    """Runs one command through create_market_order (risk and execution engines) at most once."""
+    command_id = command["id"]
+    if command_id in executed_commands:
+        # None means a restart interrupted it mid-order; reconciliation has booked any fill
+        return executed_commands[command_id] or {"status": "failed",
+                                                 "result": {"error": "Interrupted by a restart"}}
+    if trading_paused.is_set():
+        return remember_command(command_id, {"status": "rejected", "result": {"error": "trading paused"}})
+    executed_commands[command_id] = None
+    save_state_checkpoint()
+
+    log_message(f"Executing server command {command_id}: {command['action']} "
+                f"{command.get('amount_btc') or command.get('amount_usd')} "
+                f"{'BTC' if command.get('amount_btc') is not None else 'USDT'}")
+    started = time.perf_counter()
+    order = create_market_order(exchange, command["action"], amount_usd=command.get("amount_usd"),
+                                amount_btc=command.get("amount_btc"), trigger_price=command.get("price"))
+    result = {"execution_ms": round((time.perf_counter() - started) * 1000, 1)}
+    if order is None:
+        # API errors happened at the exchange; everything else stopped the order before submission
+        status = "failed" if (last_order_error or "").startswith("API error") else "rejected"
+        result["error"] = last_order_error
+    else:
+        filled = float(order.get('filled') or 0)
+        status = "filled" if filled > 0 else "failed"
+        result.update({"order_id": order.get('id'), "filled": filled, "average": order.get('average'),
+                       "order_status": order.get('status'), "latency_ms": order.get('latency_ms')})
+        if filled <= 0:
+            result["error"] = "order not filled"
+    return remember_command(command_id, {"status": status, "result": result})
+
+def remember_command(command_id, ack):
+    executed_commands[command_id] = ack
+    while len(executed_commands) > COMMAND_HISTORY:
+        executed_commands.popitem(last=False)
+    save_state_checkpoint()
+    return ack
+
+
 def reset_price_change_logic():
-    global last_price
-    last_price = None  # Reset the base price so the bot can re-evaluate the market
+    strategy.reset()  # Reset the base price so the bot can re-evaluate the market
     log_message("Price change logic reset due to insufficient balance or failed trade.")
 
 
 
 
 def check_price_change(exchange):
-    global last_price, last_data_sent_time
+    global last_data_sent_time, trading_blocked_until
 
     # Check if the exchange is connected
     if not exchange or check_api_connection(exchange) == "Disconnected":
-        send_data_to_server({}, {}, [])  # Sending empty data as API is disconnected
+        server_push.submit({"price_data": {}, "balances": {}, "transactions": []})  # Empty data: API disconnected
         log_message("API disconnected.", "error")
         return
 
@@ -419,49 +894,53 @@ def check_price_change(exchange):
         log_message("Current price retrieval failed. Check API connection.", "error")
         return
 
-    # Initialize base price if it hasn't been set already
-    if last_price is None:
-        last_price = current_price
-        log_message(f"Base price set to {current_price:.2f}")
-        return
-
-    # Set price slippage tolerance (can be adjusted to handle larger/smaller fluctuations)
-    price_tolerance = 0.5  # Tolerance set to 0.5% for price fluctuations
-
-    # Calculate price difference in percentage
-    price_diff = abs(current_price - last_price) / last_price * 100
-    if price_diff > price_tolerance:
-        log_transaction("FAILED PRICE CHANGE", 0, current_price, 0, f"Price change exceeded tolerance: {price_diff:.2f}%")
-        log_message(f"Price slippage exceeded tolerance: {price_diff:.2f}%", "warning")
-        time.sleep(5)  # Retry after a brief delay
-        return
-
-    # Calculate price change in percentage
-    change = ((current_price - last_price) / last_price) * 100
+    heartbeat.beat("tick")
+    trace = LatencyTrace(exchange_clock)
+    trace.mark("tick", exchange_ts=last_ticker_ts)
+
+    # Best bid/ask, microprice and fill estimates for one trade from the local L2 book
+    # (None while the book is syncing or stale, in which case decisions use the ticker alone)
+    quote = book_feed.quote(TRADE_AMOUNT_USD / current_price) if book_feed else None
+
+    accountant.mark(current_price)
+    report_engine.on_equity(time.time(), accountant.net_pnl)
+    risk_engine.mark(accountant.net_pnl)
+
+    # The strategy sees every tick (indicators keep updating during cooldowns and pauses)
+    decision = strategy.on_tick(Tick(
+        exchange_clock.now_ms() / 1000, current_price, quote, btc_balance, usdt_balance,
+        trading_enabled=can_trade() and not trading_paused.is_set() and time.time() >= trading_blocked_until,
+    ))
+    heartbeat.beat("decision")
+    trace.mark("decision")  # The "decide" stage is the strategy alone, before pushes and file I/O
+    base_price = strategy.base_price
+    change = (current_price - base_price) / base_price * 100 if base_price else 0.0
+    state_cache.update(price=current_price, base_price=base_price, btc_balance=btc_balance,
+                       usdt_balance=usdt_balance, updated_at=time.time(),
+                       price_change=change if base_price else None,
+                       bid=quote and quote["bid"], ask=quote and quote["ask"],
+                       spread_bps=quote and quote["spread_bps"], microprice=quote and quote["microprice"],
+                       indicators=strategy.indicators(), risk=risk_engine.metrics())
 
     # Throttle server updates to once every 5 seconds
     if time.time() - last_data_sent_time >= 5:
-        total_balance = btc_balance * current_price + usdt_balance
-        data = {
-            "bot_start_price": f"{last_price:.2f}",
-            "current_price": f"{current_price:.2f}",
-            "price_change": f"{change:.2f}%"
-        }
-        balances = {
-            "btc_balance": f"{btc_balance * current_price:.2f} USDT",
-            "usdt_balance": f"{usdt_balance:.2f} USDT",
-            "total_balance": f"{total_balance:.2f} USDT"
-        }
-        txs = get_transactions_from_file()  # Fetch transaction history
-        success, _, _ = send_data_to_server(data, balances, txs)
-        if success:
-            last_sent_data = f"{balances['btc_balance']} | {balances['usdt_balance']} | {current_price:.2f}"
-            if last_sent_data != getattr(check_price_change, "last_sent_data", None):
-                log_message(f"Data updated: BTC {balances['btc_balance']}, USDT {balances['usdt_balance']}, Price {current_price:.2f}")
-                check_price_change.last_sent_data = last_sent_data
-                rotate_logs() 
+        data, balances = live_sections()
+        server_push.submit({"price_data": data, "balances": balances, "transactions": list(recent_transactions),
+                            "accounting": accountant.snapshot(), "risk": state_cache["risk"],
+                            "latency": latency_snapshot(),
+                            "last_sent_data": (round(btc_balance, 8), round(usdt_balance, 2),
+                                               round(current_price, 2))})
         last_data_sent_time = time.time()  # Update last data sent time
 
+    if decision and decision["action"] == "reject":
+        # Counted in the risk metrics; orders stay blocked for the cooldown while monitoring continues
+        risk_engine.reject(decision["type"])
+        if time.time() >= trading_blocked_until:  # Log once per back-off, not on every tick
+            log_transaction(decision["type"], 0, decision["price"], 0, decision["reason"])
+            log_message(f"{decision['type']}: {decision['reason']}", "warning")
+        trading_blocked_until = max(trading_blocked_until, time.time() + decision.get("cooldown", 0))
+        return
+
     # Only proceed if the cooldown has passed
     if not can_trade():
         log_message(f"Cooldown active. Last trade at {time.strftime('%H:%M:%S', time.localtime(last_trade_time))}.", "info")
@@ -469,37 +948,61 @@ def check_price_change(exchange):
 
     # Log the current price change for debugging purposes
     if abs(change) >= 0.01:
-        log_message(f"Price change: {change:.2f}% (Current: {current_price:.2f}, Base: {last_price:.2f})", "info")
-
-    # Trading conditions:
-    # SELL when the price increases by at least 0.1%,
-    # BUY when it drops by at least 0.05%
-    if change >= 0.1:
-        if btc_balance >= (TRADE_AMOUNT_USD / current_price):
-            log_message(f"SELL triggered for {TRADE_AMOUNT_USD} USDT")
-            if create_market_order(exchange, "sell", amount_btc=TRADE_AMOUNT_USD / current_price):
-                last_price = current_price  # Update base price only after successful trade
-        else:
-            log_transaction("FAILED SELL", 0, current_price, 0,
-                            f"Insufficient BTC. Required: {TRADE_AMOUNT_USD / current_price:.8f} BTC, Available: {btc_balance:.8f} BTC")
-            last_price = current_price  # Reset base price after failed trade
-            time.sleep(10)  # Add cooldown after failed trade
-    elif change <= -0.05:
-        if usdt_balance >= TRADE_AMOUNT_USD:
-            log_message(f"BUY triggered for {TRADE_AMOUNT_USD} USDT")
-            if create_market_order(exchange, "buy", amount_usd=TRADE_AMOUNT_USD):
-                last_price = current_price  # Update base price only after successful trade
-        else:
-            log_transaction("FAILED BUY", 0, current_price, 0,
-                            f"Insufficient USDT. Required: {TRADE_AMOUNT_USD} USDT, Available: {usdt_balance:.2f} USDT")
-            last_price = current_price  # Reset base price after failed trade
-            time.sleep(10)  # Add cooldown after failed trade
-
-    # Log the base price update only after a successful trade
-    log_message(f"Base price remains at {last_price:.2f} after trade attempt.", "info")
-
+        log_message(f"Price change: {change:.2f}% (Current: {current_price:.2f}, Base: {base_price:.2f})", "info")
+        if quote:
+            log_message(f"Book: bid {quote['bid']:.2f} / ask {quote['ask']:.2f} (spread {quote['spread_bps']:.2f} bps, "
+                        f"micro {quote['microprice']:.2f})")
 
+    if not decision:
+        return
 
+    # Buy/sell decisions from the strategy; it re-anchors its base price in on_fill / on_order_done
+    log_message(f"{decision['action'].upper()} triggered by {strategy.name}: {decision['reason']}")
+    order = None
+    if decision["action"] == "sell":
+        order = create_market_order(exchange, "sell", amount_btc=decision["amount_btc"],
+                                    trigger_price=decision["price"], trace=trace)
+    elif decision["action"] == "buy":
+        order = create_market_order(exchange, "buy", amount_usd=decision["amount_usd"],
+                                    trigger_price=decision["price"], trace=trace)
+    strategy.on_order_done(order)
+    if strategy.base_price:
+        log_message(f"Base price is {strategy.base_price:.2f} after trade attempt.", "info")
+
+
+
+
+def live_sections():
+    """price_data and balances as schema.py numbers, from the latest tick in state_cache."""
+    price = state_cache["price"]
+    btc_value = state_cache["btc_balance"] * price
+    price_data = {
+        "bot_start_price": state_cache["base_price"] or price,
+        "current_price": price,
+        "price_change": state_cache["price_change"] or 0.0,
+    }
+    balances = {
+        "btc_balance": state_cache["btc_balance"],
+        "usdt_balance": state_cache["usdt_balance"],
+        "btc_value": btc_value,
+        "total_balance": btc_value + state_cache["usdt_balance"],
+    }
+    return price_data, balances
+
+def latency_snapshot():
+    """Exchange clock offset and rolling per-stage order latency (clock.py)."""
+    return {"clock": exchange_clock.state(), "stages": latency_stats.metrics()}
+
+def ipc_state():
+    """Live state served to server.py over the state socket: the /update_data sections plus exchange health."""
+    state = {"schema": SCHEMA_VERSION, "account": ACCOUNT_NAME, "exchange_status": exchange_session.status(probe=False),
+             "updated_at": state_cache.get("updated_at"), "accounting": accountant.snapshot(),
+             "risk": risk_engine.metrics(), "latency": latency_snapshot()}
+    if order_router is not None:
+        state["routing"] = order_router.snapshot()
+    if "price" in state_cache:
+        state["price_data"], state["balances"] = live_sections()
+    return state
 
 def fetch_with_retry(func, retries=3, delay=2):
     """Retry fetching exchange data with exponential backoff"""
@@ -515,8 +1018,33 @@ def fetch_with_retry(func, retries=3, delay=2):
 
 
 # In the run function
+def warm_up_strategy(exchange):
+    """Tops up the candle cache to now and feeds the last WARMUP_BARS closes to the strategy."""
+    if not WARMUP_TIMEFRAME or WARMUP_BARS <= 0:
+        return
+    started = time.perf_counter()
+    directory = os.path.join(DATA_DIR, "ohlcv")
+    step = timeframe_ms(WARMUP_TIMEFRAME)
+    since = int(time.time() * 1000) - WARMUP_BARS * step
+    try:
+        OhlcvCache(exchange, TRADE_PAIR, WARMUP_TIMEFRAME, directory, workers=2).sync(since)
+    except Exception as e:
+        logging.warning(f"OHLCV warm-up download failed, using cached candles only: {e}")
+    closes = load_candles(directory, TRADE_PAIR, WARMUP_TIMEFRAME, since=since)["close"]
+    used = strategy.warm_up(closes, step / 1000, WARMUP_TICK_SECONDS)
+    logging.info(f"Strategy warm-up: {used} {WARMUP_TIMEFRAME} candles in "
+                 f"{(time.perf_counter() - started) * 1000:.0f} ms; indicators {strategy.indicators()}")
+
+
+stop_requested = threading.Event()  # Set to end the trading loop; run() then shuts down cleanly
+
+def request_stop(signum=None, _frame=None):
+    if signum is not None:
+        logging.info(f"Received {signal.Signals(signum).name}; stopping after the current tick")
+    stop_requested.set()
+
 def run():
-    global last_price
+    global book_feed
 
     ip = get_public_ip()
     exchange = connect_to_exchange()
@@ -524,26 +1052,68 @@ def run():
         logger.error("Failed to connect to exchange. Exiting.")
         return
 
+    for _ in range(3):  # A few samples so the lowest-latency one sets the initial offset
+        exchange_clock.sync()
+    logging.info(f"Exchange clock: {exchange_clock.state()}")
+    setup_routing(exchange)
+
     # Initialize base price
-    last_price = fetch_with_retry(lambda: get_current_price(exchange))
-    if not last_price:
+    start_price = fetch_with_retry(lambda: get_current_price(exchange))
+    if not start_price:
         print("Failed to get initial price. Exiting.")
         sys.exit(1)
 
+    initialize_information_file()
+    recent_transactions.extend(get_transactions_from_file())  # Parsed once; log_transaction appends after
+    if not resume_from_checkpoint(exchange, start_price):
+        rebuild_accounting()
+    warm_up_strategy(exchange)
+
+    if ORDER_BOOK_FEED:
+        book_feed = KucoinBookFeed(TRADE_PAIR, lambda: exchange.fetch_order_book(TRADE_PAIR, 100))
+        book_feed.start()
+
+    # server.py reads live state from this socket when it runs on the same host
+    state_server = StateServer(settings.ipc_socket, {"state": ipc_state, "config": runtime_config.snapshot,
+                                                     "config_update": config_update, "health": watchdog.state})
+    state_server.start()
+    server_push.start()
+    heartbeat.beat("loop")
+    watchdog.start()
+
     last_heartbeat = time.time()
+    last_command_poll = 0
+    last_config_poll = 0
+    server_url = f"http://{ip or '127.0.0.1'}:{SERVER_PORT}"
     try:
-        while True:
+        while not stop_requested.is_set():
+            heartbeat.beat("loop")
+            # Config changes (file edits, POST /config) take effect here, between two ticks
+            if time.time() - last_config_poll >= CONFIG_POLL_INTERVAL:
+                runtime_config.poll_file()
+                last_config_poll = time.time()
+            runtime_config.apply_pending()
+
             if check_api_connection(exchange) == "Connected":
                 logging.info("Monitoring price change...")
                 check_price_change(exchange)
+                if COMMAND_POLL_INTERVAL and time.time() - last_command_poll >= COMMAND_POLL_INTERVAL:
+                    poll_trade_commands(exchange, server_url)
+                    last_command_poll = time.time()
             else:
                 log_message("No connection, retrying...", "warning")
-                time.sleep(1)
+                stop_requested.wait(1)
+
+            strategy.on_timer(time.time())
+            exchange_clock.maybe_sync(CLOCK_SYNC_INTERVAL)
+
+            if time.time() - last_checkpoint_time >= CHECKPOINT_INTERVAL:
+                save_state_checkpoint()
 
             if time.time() - last_heartbeat >= 10:
                 try:
                     r = requests.post(f"http://{ip or '127.0.0.1'}:{SERVER_PORT}/update_bot_status",
-                                      headers={'KC-API-KEY': KUCOIN_API_KEY})
+                                      headers={'KC-API-KEY': KUCOIN_API_KEY}, timeout=5)
                     if r and hasattr(r, 'status_code') and r.status_code == 200:
                         logging.info("Bot status updated.")
                     else:
@@ -552,29 +1122,37 @@ def run():
                 except Exception as e:
                     logging.error(f"Status update error: {e}")
 
-            time.sleep(1)
+            stop_requested.wait(1)
     except KeyboardInterrupt:
-        logging.info("Stopping bot and setting status to inactive...")
-        try:
-            r = requests.post(f"http://{ip or '127.0.0.1'}:{SERVER_PORT}/update_bot_status",
-                              json={"status": "inactive"}, headers={'KC-API-KEY': KUCOIN_API_KEY})
-            if r and hasattr(r, 'status_code') and r.status_code == 200:
-                logging.info("Bot status set to inactive.")
-            else:
-                logging.error(f"Status inactive update failed: {r.text if r else 'No response'}")
-        except Exception as e:
-            logging.error(f"Shutdown error: {e}")
-
-        final_btc, final_usdt = get_margin_balance(exchange)
-        final_btc = final_btc if final_btc is not None else 0
-        final_usdt = final_usdt if final_usdt is not None else 0
-        current_price = fetch_with_retry(lambda: get_current_price(exchange))  # Fetch the current price
-        update_information_file(final_btc, final_usdt, current_price)  # Include current_price
-        generate_final_trading_summary()
-        sys.exit(0)
+        pass  # run() called from the main thread; under main() SIGINT sets stop_requested instead
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
         time.sleep(1)
+        return
+
+    logging.info("Stopping bot and setting status to inactive...")
+    watchdog.stop()  # Shutdown work is not a stalled loop
+    save_state_checkpoint()
+    if book_feed:
+        book_feed.stop()
+    state_server.stop()
+    server_push.stop()
+    try:
+        r = requests.post(f"http://{ip or '127.0.0.1'}:{SERVER_PORT}/update_bot_status",
+                          json={"status": "inactive"}, headers={'KC-API-KEY': KUCOIN_API_KEY}, timeout=5)
+        if r and hasattr(r, 'status_code') and r.status_code == 200:
+            logging.info("Bot status set to inactive.")
+        else:
+            logging.error(f"Status inactive update failed: {r.text if r else 'No response'}")
+    except Exception as e:
+        logging.error(f"Shutdown error: {e}")
+
+    final_btc, final_usdt = get_margin_balance(exchange)
+    final_btc = final_btc if final_btc is not None else 0
+    final_usdt = final_usdt if final_usdt is not None else 0
+    current_price = fetch_with_retry(lambda: get_current_price(exchange))  # Fetch the current price
+    update_information_file(final_btc, final_usdt, current_price)  # Include current_price
+    generate_final_trading_summary()
 
 
 
@@ -631,6 +1209,9 @@ def generate_final_trading_summary():
         # USDT movement (change)
         usdt_change = final_usdt - initial_usdt
 
+        # Live accounting (fills, fees, drawdown) tracked since start
+        acct = accountant.snapshot()
+
         # Create the report as a formatted string
         report = f"""
 -------------------------------------------------------------
@@ -658,6 +1239,16 @@ def generate_final_trading_summary():
 
 🔹 **USDT Movement:**
    - 🔄 **USDT Change:** {usdt_change:.2f} USDT
+-------------------------------------------------------------
+                     LIVE ACCOUNTING
+-------------------------------------------------------------
+   - 📦 Position: {acct['position_btc']:.8f} BTC @ avg {acct['avg_entry_price']:.2f} USDT
+   - ✅ Realized P&L:   {acct['realized_pnl']:.4f} USDT
+   - ⏳ Unrealized P&L: {acct['unrealized_pnl']:.4f} USDT
+   - 💸 Fees Paid:      {acct['fees_paid']:.4f} USDT
+   - 📊 Net P&L:        {acct['net_pnl']:.4f} USDT
+   - 🔁 Turnover:       {acct['turnover_usdt']:.2f} USDT over {acct['fills']} fills
+   - 📉 Max Drawdown:   {acct['max_drawdown']:.4f} USDT
 -------------------------------------------------------------
 """
         # Save the generated report to a file
@@ -673,6 +1264,34 @@ def generate_final_trading_summary():
 
 
 
+def generate_periodic_summary(period=None):
+    """Writes the report for the last `period` seconds (SUMMARY_PERIOD) plus all-time and live accounting figures."""
+    period = period or SUMMARY_PERIOD
+    report_file = os.path.join(DATA_DIR, "trading_summary_report.txt")
+    acct = accountant.snapshot()
+    execution = execution_engine.snapshot()
+    routing_line = ""
+    if order_router is not None:
+        routing = order_router.snapshot()
+        routing_line = (f"   - 🔀 Routing: {routing['rerouted']}/{routing['routes']} orders away from {routing['primary']} | "
+                        f"saved {routing['saved_quote']:.4f} USDT | {routing['by_venue']}\n")
+    try:
+        started = time.perf_counter()
+        report = format_report(window_report(report_engine, period), f"LAST {period / 3600:g}H TRADING REPORT")
+        report += format_report(report_engine.report(), "ALL-TIME TRADING REPORT")
+        report += f"""   - 📦 Position: {acct['position_btc']:.8f} BTC @ avg {acct['avg_entry_price']:.2f} USDT
+   - ⏳ Unrealized P&L: {acct['unrealized_pnl']:.4f} USDT
+   - 📊 Net P&L:        {acct['net_pnl']:.4f} USDT
+   - ⚙️ Execution ({execution['mode']}): maker fill rate {execution['maker_fill_rate'] * 100:.1f}% | effective cost {execution['effective_cost_bps']:.2f} bps | fallbacks {execution['fallbacks']}
+{routing_line}-------------------------------------------------------------
+"""
+        with open(report_file, "w", encoding="utf-8") as f:
+            f.write(report)
+        logging.info(f"✅ Periodic summary report generated in {(time.perf_counter() - started) * 1000:.2f} ms")
+    except Exception as e:
+        logging.error(f"Unexpected error generating periodic report: {e}")
+
+
 def initialize_information_file():
     """Ensure information.txt exists and initialize required fields with initial balances."""
     info_file = os.path.join(DATA_DIR, "information.txt")
@@ -697,7 +1316,7 @@ def initialize_information_file():
 
         # Initialize the file with these balances
         data = {
-            "bot_start_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "bot_start_time": exchange_clock.utc_string(),
             "bot_start_price": current_price,
             "initial_btc": btc_balance,
             "initial_usdt": usdt_balance,
@@ -712,8 +1331,7 @@ def initialize_information_file():
             "total_trades": 0
         }
 
-        with open(info_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        atomic_write_json(info_file, data, indent=4)
 
         logging.info(f"information.txt initialized with BTC: {btc_balance}, USDT: {usdt_balance}, Start Price: {current_price}")
 
@@ -754,7 +1372,7 @@ def update_information_file(final_btc, final_usdt, current_price):
         # Store new balances
         data["final_btc"] = final_btc
         data["final_usdt"] = final_usdt
-        data["bot_end_time"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        data["bot_end_time"] = exchange_clock.utc_string()
 
         # Calculate profit in BTC and total USD equivalent
         data["profit_btc"] = final_btc - initial_btc
@@ -762,10 +1380,12 @@ def update_information_file(final_btc, final_usdt, current_price):
         data["usdt_change"] = final_usdt - initial_usdt
         data["total_initial"] = total_initial
         data["total_final"] = total_final
+        accountant.mark(current_price)
+        data["accounting"] = accountant.snapshot()
+        data["total_trades"] = accountant.fills
 
-        # Save back to information.txt
-        with open(info_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        # Save back to information.txt (atomically, so a crash cannot leave it half-written)
+        atomic_write_json(info_file, data, indent=4)
 
         logging.info(f"information.txt updated with final balances: BTC: {final_btc}, USDT: {final_usdt}, Total: {total_final} USDT")
 
@@ -779,7 +1399,7 @@ def update_information_file(final_btc, final_usdt, current_price):
 # In the stop_bot function
 def stop_bot():
     """Stops the bot, updates final balances, and generates a report."""
-    global last_price, exchange  # Add global exchange
+    global exchange  # Add global exchange
 
     if exchange is None:
         logging.error("Exchange is not connected. Cannot fetch balances.")
@@ -818,7 +1438,22 @@ def stop_bot():
     sys.exit(0)
 
 def clear_files():
-    """Clear the contents of information.txt, trading_summary_report.txt, and transaction_history.txt."""
+    """Clear the contents of information.txt, trading_summary_report.txt, and transaction_history.txt.
+
+    The checkpoint and fill journal are removed as well, otherwise the next start would resume
+    accounting state that no longer matches the cleared information.txt. Archived transaction
+    history (DATA_DIR/archive) is kept for audits.
+    """
+    fill_store.close()
+    for filename in ("checkpoint.json", "fills.jsonl"):
+        try:
+            os.remove(os.path.join(DATA_DIR, filename))
+            logging.info(f"Removed {filename}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Error removing {filename}: {e}")
+
     files_to_clear = ["information.txt", "trading_summary_report.txt", "transaction_history.txt"]
     for filename in files_to_clear:
         file_path = os.path.join(DATA_DIR, filename)
@@ -834,7 +1469,7 @@ async def generate_and_send_summary():
     """Generate the trading summary and send it to Telegram"""
     try:
         await asyncio.sleep(30)
-        await send_data_to_telegram()
+        send_data_to_telegram(notifier, DATA_DIR)
     except Exception as e:
         logger.error(f"Error generating summary: {e}")
 
@@ -842,19 +1477,44 @@ async def generate_and_send_summary():
 async def generate_and_send_summary_with_delay():
     """Generate and send the trading summary every 4 hours."""
     while True:
-        logging.info("Trading will continue for 4 hours before generating summary...")
-        await asyncio.sleep(14400)  # Wait 4 hours before generating the summary
+        logging.info(f"Trading will continue for {SUMMARY_PERIOD / 3600:g} hours before generating summary...")
+        started = time.monotonic()
+        while time.monotonic() - started < SUMMARY_PERIOD:  # Re-read each minute: the period is live config
+            await asyncio.sleep(min(60, SUMMARY_PERIOD - (time.monotonic() - started)))
 
         logging.info("Generating trading summary report...")
-        generate_final_trading_summary()  # ✅ Generate the report
+        generate_periodic_summary()  # ✅ Generate the report from the incremental statistics
 
         logging.info("Sending trading summary to Telegram...")
-        await send_data_to_telegram()  # ✅ Send the report
+        send_data_to_telegram(notifier, DATA_DIR)  # ✅ Queue the report for the notifier worker
 
         logging.info("Summary sent. Continuing trading...")
 
 
 # --- Bot Execution ---
+async def run_bot_tasks():
+    """Runs the trading loop (in a thread) and the periodic summary next to the notification worker."""
+    await notifier.start()
+    commands = None
+    if TELEGRAM_COMMANDS:
+        commands = CommandInterface(TOKEN, CHAT_ID, state_cache, accountant, fill_store, trading_paused,
+                                    risk_engine)
+        try:
+            await commands.start()
+        except Exception as e:
+            logging.error(f"Telegram command interface unavailable: {e}")
+            commands = None
+    # Repeatedly generate and send summary every SUMMARY_PERIOD while the trading loop runs in a thread
+    summary = asyncio.create_task(generate_and_send_summary_with_delay())
+    try:
+        await asyncio.to_thread(run)
+    finally:
+        summary.cancel()
+        await asyncio.gather(summary, return_exceptions=True)
+        if commands:
+            await commands.stop()
+        await notifier.stop()
+
 async def main():
     exchange = connect_to_exchange()
     if not exchange:
@@ -864,15 +1524,16 @@ async def main():
     logging.info("Starting trading bot...")
 
     # Run trading & summary functions in parallel
-    await asyncio.gather(
-        asyncio.to_thread(run),  # Run the trading bot
-        generate_and_send_summary_with_delay()  # Repeatedly generate and send summary every 5 min
-    )
+    await run_bot_tasks()
 ####################################################################
 
 # --- Main Execution ---
 if __name__ == '__main__':
     logging.info("Starting bot...")
+    # run() works in a thread, where KeyboardInterrupt never arrives: SIGINT and SIGTERM (sent by
+    # supervisor.py) ask the loop to stop so it checkpoints and reports inactive on the way out
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
 
     # Initialize exchange connection and file clearing
     exchange = connect_to_exchange()
@@ -886,10 +1547,7 @@ if __name__ == '__main__':
 
         # Run both the trading bot and the summary generator (5-min delay) concurrently
         try:
-            loop.run_until_complete(asyncio.gather(
-                asyncio.to_thread(run),  # Run the trading bot in a separate thread
-                generate_and_send_summary_with_delay()  # 5 min delay summary generation
-            ))
+            loop.run_until_complete(run_bot_tasks())
 
         except Exception as e:
             logging.error(f"Error running the bot: {e}")
@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import tempfile
+
+from records import json_default
+
+CHECKPOINT_VERSION = 1
+
+
+def atomic_write_json(path, data, indent=None):
+    """Writes JSON so readers see either the old or the new file, never a torn one.
+
+    The data goes to a temp file in the same directory, is fsynced, renamed over `path`,
+    and the directory entry is fsynced so the rename itself survives a crash.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def read_json(path, default=None):
+    """Reads a JSON file, returning `default` when it is missing, empty or corrupt."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logging.error(f"Error reading {path}: {e}. The file may be corrupted.")
+        return default
+
+
+def save_checkpoint(path, state):
+    state = dict(state, version=CHECKPOINT_VERSION)
+    atomic_write_json(path, state)
+
+
+def load_checkpoint(path):
+    """Returns the checkpoint dict, or None if there is no usable checkpoint."""
+    state = read_json(path)
+    if not isinstance(state, dict):
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        logging.warning(f"Ignoring checkpoint {path} with unsupported version {state.get('version')}")
+        return None
+    return state
@@ -0,0 +1,169 @@
+"""Exchange-synchronized time and per-order latency breakdowns.
+
+`ExchangeClock` estimates the offset between the local clock and the exchange's from
+fetch_time round trips, NTP style: offset = server_time - midpoint(request sent, reply received).
+The midpoint is only exact when both legs take equally long, so of the recent samples the one
+with the smallest round trip (the least room for asymmetry) is trusted. `now_ms()` is local wall
+time corrected by that offset; all log and file timestamps use it, in UTC.
+
+`LatencyTrace` follows one decision from the tick that triggered it to its fill. Each `mark()`
+records a monotonic time (for local durations, immune to clock steps) and the exchange-synced
+time, plus the exchange's own timestamp for that event when it reports one. `breakdown()` turns
+the marks into stages in milliseconds:
+
+    feed        tick received - ticker timestamp          market data age (exchange + network)
+    decide      decision - tick                           strategy (monotonic)
+    submit      order sent - decision                     risk checks, book fetch (monotonic)
+    outbound    order created at exchange - order sent    network to the exchange
+    inbound     ack received - order created at exchange  network back
+    round_trip  ack received - order sent                 (monotonic)
+    match       last fill at exchange - order created     exchange-side matching
+    settle      fill observed - ack received              until the bot saw the fill (monotonic)
+    total       fill observed - tick                      (monotonic)
+
+Stages whose marks or exchange timestamps are missing are left out. The cross-clock stages
+(feed, outbound, inbound, match) are only as good as the offset estimate, i.e. within about half
+the best round trip.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+UTC_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (stage, from mark, to mark, "mono" for monotonic durations or "exchange" for cross-clock ones)
+STAGES = (
+    ("feed", "tick", "tick", "exchange"),
+    ("decide", "tick", "decision", "mono"),
+    ("submit", "decision", "submit", "mono"),
+    ("outbound", "submit", "ack", "exchange"),
+    ("inbound", "ack", "ack", "exchange"),
+    ("round_trip", "submit", "ack", "mono"),
+    ("match", "ack", "fill", "exchange"),
+    ("settle", "ack", "fill", "mono"),
+    ("total", "tick", "fill", "mono"),
+)
+
+
+class ExchangeClock:
+    """Local-to-exchange clock offset from the best of the last `samples` fetch_time round trips."""
+
+    def __init__(self, fetch_time=None, samples=8, clock=time.time, monotonic=time.monotonic):
+        self.fetch_time = fetch_time
+        self.samples = deque(maxlen=samples)  # (rtt_ms, offset_ms, taken_at monotonic)
+        self.clock = clock
+        self.monotonic = monotonic
+        self.offset_ms = 0.0
+        self.rtt_ms = None
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def sync(self):
+        """Takes one fetch_time sample; returns the offset in ms, or None if the request failed."""
+        if self.fetch_time is None:
+            return None
+        sent = self.clock() * 1000
+        try:
+            server = float(self.fetch_time())
+        except Exception as e:
+            logging.warning(f"Exchange clock sync failed: {e}")
+            return None
+        received = self.clock() * 1000
+        rtt = received - sent
+        with self.lock:
+            self.samples.append((rtt, server - (sent + received) / 2, self.monotonic()))
+            self.rtt_ms, self.offset_ms, _ = min(self.samples)
+            self.synced_at = self.monotonic()
+        return self.offset_ms
+
+    def maybe_sync(self, interval):
+        """Samples again once `interval` seconds have passed since the last sync."""
+        if self.synced_at is None or self.monotonic() - self.synced_at >= interval:
+            return self.sync()
+        return None
+
+    def now_ms(self):
+        """Exchange-synchronized epoch time in milliseconds."""
+        return self.clock() * 1000 + self.offset_ms
+
+    def utc_string(self, fmt=UTC_FORMAT):
+        return datetime.fromtimestamp(self.now_ms() / 1000, tz=timezone.utc).strftime(fmt)
+
+    def state(self):
+        return {"offset_ms": round(self.offset_ms, 1), "rtt_ms": None if self.rtt_ms is None else round(self.rtt_ms, 1),
+                "samples": len(self.samples),
+                "synced_s_ago": None if self.synced_at is None else round(self.monotonic() - self.synced_at, 1)}
+
+
+class LatencyTrace:
+    """Marks of one tick-to-fill path; see the module docstring for the stages."""
+
+    __slots__ = ("clock", "marks")
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.marks = {}  # name -> (monotonic s, exchange-synced ms, exchange-reported ms or None)
+
+    def mark(self, name, exchange_ts=None):
+        """Records `name` now; keeps the first mark of a name (the first child order's submit/ack)."""
+        if name not in self.marks:
+            self.marks[name] = (self.clock.monotonic(), self.clock.now_ms(),
+                                None if exchange_ts is None else float(exchange_ts))
+
+    def set_exchange_ts(self, name, exchange_ts):
+        """Adds or updates the exchange's timestamp for an existing mark (e.g. the latest fill)."""
+        if name in self.marks and exchange_ts is not None:
+            mono, synced, _ = self.marks[name]
+            self.marks[name] = (mono, synced, float(exchange_ts))
+
+    def timestamps(self):
+        """{name: {"mono": s, "exchange_ms": synced ms, "reported_ms": exchange ms}} for logs and records."""
+        return {name: {"mono": round(mono, 6), "exchange_ms": round(synced, 1), "reported_ms": reported}
+                for name, (mono, synced, reported) in self.marks.items()}
+
+    def breakdown(self):
+        stages = {}
+        for stage, start, end, kind in STAGES:
+            if start not in self.marks or end not in self.marks:
+                continue
+            (mono0, synced0, reported0), (mono1, synced1, reported1) = self.marks[start], self.marks[end]
+            if kind == "mono":
+                value = (mono1 - mono0) * 1000
+            elif start == end:  # Receipt of an exchange-stamped event: local synced time - exchange time
+                if reported0 is None:
+                    continue
+                value = synced0 - reported0
+            else:  # From a local event to an exchange-stamped one, or between two exchange stamps
+                t0 = synced0 if stage == "outbound" else reported0
+                if t0 is None or reported1 is None:
+                    continue
+                value = reported1 - t0
+            stages[stage] = round(value, 1)
+        return stages
+
+
+class LatencyStats:
+    """Rolling percentiles of each stage over the last `window` traces."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, breakdown):
+        with self.lock:
+            for stage, value in breakdown.items():
+                self.stages.setdefault(stage, deque(maxlen=self.window)).append(value)
+
+    def metrics(self):
+        with self.lock:
+            snapshot = {stage: sorted(values) for stage, values in self.stages.items()}
+        return {stage: {"count": len(values), "p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95),
+                        "max": values[-1]}
+                for stage, values in snapshot.items() if values}
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
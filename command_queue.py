@@ -0,0 +1,166 @@
+"""Manual trade commands passed from the server to the bot.
+
+The server enqueues a command for each accepted /execute_trade request; the bot polls for work,
+executes each command through its normal order path (risk engine, execution engine, fill
+booking) and acknowledges it with the result. Commands carry an idempotency key, so a client
+retrying a request gets the original command back instead of a second trade.
+
+Lifecycle: queued -> claimed -> filled | failed | rejected, or queued -> expired when nobody
+claims it within `max_age` seconds. A claim that is not acknowledged within `claim_timeout`
+returns the command to the queue; the bot remembers the commands it has executed and re-sends
+the stored result instead of trading again.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+QUEUED = "queued"
+CLAIMED = "claimed"
+FILLED = "filled"
+FAILED = "failed"
+REJECTED = "rejected"
+EXPIRED = "expired"
+FINAL = (FILLED, FAILED, REJECTED, EXPIRED)
+
+
+class CommandQueue:
+    """Bounded, thread-safe command queue keyed by idempotency key.
+
+    Timings are taken on the server clock only: `queue_ms` is request to claim and
+    `end_to_end_ms` request to acknowledgement; the bot reports its own `execution_ms`.
+    """
+
+    def __init__(self, max_age=60.0, claim_timeout=30.0, retention=1000, clock=time.time):
+        self.max_age = max_age
+        self.claim_timeout = claim_timeout
+        self.retention = retention
+        self.clock = clock
+        self.commands = OrderedDict()  # Idempotency key -> command, oldest first
+        self.pending = deque()  # Keys waiting to be claimed
+        self.latencies = deque(maxlen=500)  # end_to_end_ms of filled commands
+        self.counts = {}
+        self.condition = threading.Condition()
+
+    def submit(self, action, amount_btc=None, amount_usd=None, price=None, key=None):
+        """Enqueues a command; returns (command, created). A known key returns the existing command."""
+        with self.condition:
+            if key and key in self.commands:
+                return dict(self.commands[key]), False
+            key = key or uuid.uuid4().hex
+            command = {
+                "id": key,
+                "action": action,
+                "amount_btc": amount_btc,
+                "amount_usd": amount_usd,
+                "price": price,
+                "status": QUEUED,
+                "created_at": self.clock(),
+                "claimed_at": None,
+                "completed_at": None,
+                "deliveries": 0,
+                "result": None,
+            }
+            self.commands[key] = command
+            self.pending.append(key)
+            self._count(QUEUED)
+            self._trim()
+            return dict(command), True
+
+    def claim(self, limit=1):
+        """Hands up to `limit` commands to the bot, expiring stale ones and re-queuing lapsed claims."""
+        with self.condition:
+            now = self.clock()
+            self._requeue_lapsed(now)
+            claimed = []
+            while self.pending and len(claimed) < limit:
+                command = self.commands.get(self.pending.popleft())
+                if command is None or command["status"] != QUEUED:
+                    continue
+                if command["deliveries"] == 0 and now - command["created_at"] > self.max_age:
+                    self._finish(command, EXPIRED, {"error": f"Not claimed within {self.max_age:.0f}s"}, now)
+                    continue
+                command["status"] = CLAIMED
+                command["claimed_at"] = now
+                command["deliveries"] += 1
+                claimed.append(dict(command))
+            return claimed
+
+    def ack(self, key, status, result=None):
+        """Records the bot's outcome; returns the updated command or None for an unknown key."""
+        if status not in (FILLED, FAILED, REJECTED):
+            raise ValueError(f"Invalid command status: {status!r}")
+        with self.condition:
+            command = self.commands.get(key)
+            if command is None:
+                return None
+            if command["status"] not in FINAL:
+                self._finish(command, status, result or {}, self.clock())
+            return dict(command)
+
+    def get(self, key):
+        with self.condition:
+            command = self.commands.get(key)
+            return dict(command) if command else None
+
+    def wait(self, key, timeout):
+        """Blocks until the command reaches a final status or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                command = self.commands.get(key)
+                remaining = deadline - time.monotonic()
+                if command is None or command["status"] in FINAL or remaining <= 0:
+                    return dict(command) if command else None
+                self.condition.wait(remaining)
+
+    def recent(self, limit=50):
+        with self.condition:
+            return [dict(c) for c in list(self.commands.values())[-limit:]][::-1]
+
+    def metrics(self):
+        with self.condition:
+            latencies = sorted(self.latencies)
+            return {
+                "queued": sum(1 for c in self.commands.values() if c["status"] == QUEUED),
+                "claimed": sum(1 for c in self.commands.values() if c["status"] == CLAIMED),
+                "counts": dict(self.counts),
+                "end_to_end_ms_p50": _percentile(latencies, 0.5),
+                "end_to_end_ms_p95": _percentile(latencies, 0.95),
+                "end_to_end_ms_max": latencies[-1] if latencies else None,
+            }
+
+    def _requeue_lapsed(self, now):
+        for key, command in self.commands.items():
+            if command["status"] == CLAIMED and now - command["claimed_at"] > self.claim_timeout:
+                command["status"] = QUEUED
+                self.pending.appendleft(key)
+
+    def _finish(self, command, status, result, now):
+        command["status"] = status
+        command["result"] = result
+        command["completed_at"] = now
+        if command["claimed_at"] is not None:
+            command["queue_ms"] = round((command["claimed_at"] - command["created_at"]) * 1000, 1)
+            command["end_to_end_ms"] = round((now - command["created_at"]) * 1000, 1)
+            if status == FILLED:
+                self.latencies.append(command["end_to_end_ms"])
+        self._count(status)
+        self.condition.notify_all()
+
+    def _count(self, status):
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+    def _trim(self):
+        """Drops the oldest finished commands beyond `retention`; open ones are always kept."""
+        excess = len(self.commands) - self.retention
+        if excess <= 0:
+            return
+        for key in [k for k, c in self.commands.items() if c["status"] in FINAL][:excess]:
+            del self.commands[key]
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    return values[min(int(q * len(values)), len(values) - 1)]
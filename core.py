@@ -0,0 +1,393 @@
+"""Building blocks shared by bot.py and server.py.
+
+- `load_settings`: one environment loader (.env, then .env.server / .env.local) for both processes
+- `ExchangeSession`: the KuCoin client, (re)connected lazily, with a cached health status
+- `read_transaction_log`: the transaction_history.txt parser, reading only the tail when limited
+- `StateServer` / `request_state`: a local Unix socket over which the server reads the bot's
+  live state instead of querying KuCoin and re-reading files itself
+- `SharedTicker`: the latest ticker in shared memory, written once by the supervisor and read
+  by every account's bot process (supervisor.py)
+- `LatestPusher`: hands the latest snapshot to a slow sender on a background thread, so the
+  trading loop never waits on the dashboard server
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from dotenv import load_dotenv
+
+from records import Transaction, json_default
+
+TRANSACTION_LOG = "transaction_history.txt"
+
+
+class Settings:
+    """Environment every process needs; read once by `load_settings`."""
+
+    __slots__ = ("environment", "data_dir", "api_key", "api_secret", "api_passphrase", "server_port", "ipc_socket")
+
+    def __init__(self, environment, data_dir, api_key, api_secret, api_passphrase, server_port, ipc_socket):
+        self.environment = environment
+        self.data_dir = data_dir
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.api_passphrase = api_passphrase
+        self.server_port = server_port
+        self.ipc_socket = ipc_socket
+
+    @property
+    def has_credentials(self):
+        return all([self.api_key, self.api_secret, self.api_passphrase])
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+
+def load_settings(require_credentials=True):
+    """Loads .env and the ENVIRONMENT-specific file (.env.server or .env.local) and creates DATA_DIR.
+
+    Exits the process when KuCoin credentials are missing and `require_credentials` is set.
+    """
+    environment = os.environ.get('ENVIRONMENT', 'LOCAL').upper()
+    env_file = '.env.server' if environment == 'SERVER' else '.env.local'
+    load_dotenv()
+    load_dotenv(env_file)
+    data_dir = os.getenv('DATA_DIR', '/home/ubuntu/bot5/data' if environment == 'SERVER' else 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    settings = Settings(
+        environment=environment,
+        data_dir=data_dir,
+        api_key=os.getenv("KUCOIN_API_KEY"),
+        api_secret=os.getenv("KUCOIN_API_SECRET"),
+        api_passphrase=os.getenv("KUCOIN_API_PASSPHRASE"),
+        server_port=os.getenv("SERVER_PORT") or os.getenv("PORT") or "5000",
+        ipc_socket=os.getenv("BOT_IPC_SOCKET") or os.path.join(data_dir, "bot.sock"),
+    )
+    if require_credentials and not settings.has_credentials:
+        logging.error("Missing KuCoin API credentials. Set them in the .env file.")
+        sys.exit(1)
+    logging.info(f"Env: {environment}, DATA_DIR={data_dir}, PORT={settings.server_port}")
+    return settings
+
+
+class ExchangeSession:
+    """A lazily connected ccxt client (KuCoin unless `ccxt_id` says otherwise) shared by everything in one process.
+
+    Health is tracked from the calls the process makes anyway: `mark_ok()` after a successful
+    request, `mark_failed()` after an error. `status()` only probes the API with fetch_balance
+    when nothing succeeded within `status_ttl` seconds, so checking the connection every loop
+    iteration or HTTP request does not cost an extra round trip each time.
+    """
+
+    def __init__(self, settings, load_markets=True, status_ttl=5.0, factory=None, clock=time.monotonic,
+                 ccxt_id="kucoin"):
+        self.settings = settings
+        self.ccxt_id = ccxt_id
+        self.load_markets = load_markets
+        self.status_ttl = status_ttl
+        self.factory = factory
+        self.clock = clock
+        self.exchange = None
+        self.last_ok = None
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """Returns the client, creating it on first use or after a failed connect; None on error."""
+        with self.lock:
+            if self.exchange is None:
+                try:
+                    factory = self.factory
+                    if factory is None:
+                        import ccxt
+                        factory = getattr(ccxt, self.ccxt_id)
+                    exchange = factory({
+                        'apiKey': self.settings.api_key,
+                        'secret': self.settings.api_secret,
+                        'password': self.settings.api_passphrase,
+                    })
+                    if self.load_markets:
+                        exchange.load_markets()
+                    self.exchange = exchange
+                    logging.info(f"Connected to {self.ccxt_id} exchange.")
+                except Exception as e:
+                    logging.error(f"{self.ccxt_id} connection error: {e}")
+                    self.last_error = str(e)
+            return self.exchange
+
+    def mark_ok(self):
+        self.last_ok = self.clock()
+
+    def mark_failed(self, error):
+        self.last_ok = None
+        self.last_error = str(error)
+
+    def status(self, probe=True):
+        """'Connected' or 'Disconnected'; with probe=False only the cached health is reported."""
+        if self.last_ok is not None and self.clock() - self.last_ok < self.status_ttl:
+            return "Connected"
+        if not probe:
+            return "Disconnected"
+        exchange = self.connect()
+        if exchange is None:
+            return "Disconnected"
+        try:
+            exchange.fetch_balance()
+            self.mark_ok()
+            return "Connected"
+        except Exception as e:
+            logging.error(f"API connection error: {e}")
+            self.mark_failed(e)
+            return "Disconnected"
+
+
+def parse_transaction_line(line):
+    """One transaction_history.txt row as a records.Transaction with numeric amount/price/total_value, or None."""
+    parts = line.strip().split(" | ")
+    if len(parts) != 6:
+        return None
+    timestamp, t_type, amount_str, price_str, total_str, order_str = parts
+    try:
+        return Transaction(
+            timestamp,
+            t_type,
+            float(amount_str.split(": ")[1].split()[0]),  # "Amount: 0.00001500 BTC"
+            float(price_str.split(": ")[1].split()[0]),  # "Price: 88185.00 USDT"
+            float(total_str.split(": ")[1].split()[0]),  # "Total: 1.32 USDT"
+            order_str.split(": ", 1)[1],
+        )
+    except (IndexError, ValueError):
+        return None
+
+
+def read_transaction_log(path, limit=None):
+    """Parses the transaction log, oldest first; with `limit` only the last rows are read from disk."""
+    try:
+        lines = _tail_lines(path, limit) if limit else _all_lines(path)
+    except FileNotFoundError:
+        logging.info(f"{os.path.basename(path)} not found, starting with empty transactions.")
+        return []
+    except OSError as e:
+        logging.error(f"Error reading transaction file: {e}")
+        return []
+    return [tx for tx in map(parse_transaction_line, lines) if tx is not None]
+
+
+def _all_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.readlines()
+
+
+def _tail_lines(path, count, block=8192):
+    """Last `count` lines, reading backwards in blocks instead of the whole file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b""
+        while end > 0 and data.count(b"\n") <= count:
+            start = max(0, end - block)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    return data.decode("utf-8", errors="replace").splitlines()[-count:]
+
+
+class StateServer:
+    """Answers newline-delimited JSON requests on a Unix socket from a daemon thread.
+
+    `handlers` maps a method name to a callable returning a JSON-serializable value; a request is
+    {"method": name} or {"method": name, "params": {...}} (passed as keyword arguments) and the
+    reply {"ok": true, "result": ...} or {"ok": false, "error": ...}. The socket file is created
+    with owner-only permissions.
+    """
+
+    def __init__(self, path, handlers):
+        self.path = path
+        self.handlers = handlers
+        self.server = None
+
+    def start(self):
+        if not hasattr(socket, "AF_UNIX"):
+            logging.warning("Unix sockets are not available; state IPC disabled.")
+            return False
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        handlers = self.handlers
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                        handler = handlers.get(request.get("method"))
+                        if handler is None:
+                            reply = {"ok": False, "error": "unknown method"}
+                        else:
+                            reply = {"ok": True, "result": handler(**(request.get("params") or {}))}
+                    except Exception as e:
+                        reply = {"ok": False, "error": str(e)}
+                    self.wfile.write(json.dumps(reply, default=json_default).encode() + b"\n")
+
+        old_umask = os.umask(0o177)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(old_umask)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="state-ipc", daemon=True).start()
+        logging.info(f"State IPC listening on {self.path}")
+        return True
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LatestPusher:
+    """Calls `send(payload)` on a daemon thread for the most recently submitted payload.
+
+    `submit()` never blocks. A payload still waiting when the next one arrives is replaced
+    (counted as superseded), because each payload is a full snapshot and only the newest matters.
+    A slow or unreachable receiver therefore delays updates instead of stalling the caller.
+    `send` returns True on success; exceptions are logged and counted as failures.
+    """
+
+    def __init__(self, send, name="push"):
+        self.send = send
+        self.name = name
+        self.stats = {"submitted": 0, "sent": 0, "failed": 0, "superseded": 0}
+        self._cond = threading.Condition()
+        self._payload = None
+        self._pending = False
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload):
+        with self._cond:
+            if self._pending:
+                self.stats["superseded"] += 1
+            self._payload = payload
+            self._pending = True
+            self.stats["submitted"] += 1
+            self._cond.notify()
+
+    def stop(self, timeout=5.0):
+        """Stops after the send in progress (waiting up to `timeout` seconds); a waiting payload is dropped."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                payload, self._payload, self._pending = self._payload, None, False
+            try:
+                ok = self.send(payload)
+            except Exception as e:
+                logging.error(f"{self.name} error: {e}")
+                ok = False
+            self.stats["sent" if ok else "failed"] += 1
+
+
+def request_state(path, method="state", timeout=0.5, params=None):
+    """Calls `method` on the bot's StateServer; returns the result, or None if it is not reachable."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            request = {"method": method}
+            if params:
+                request["params"] = params
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                reply = json.loads(f.readline())
+    except (OSError, ValueError) as e:
+        logging.debug(f"State IPC unavailable: {e}")
+        return None
+    return reply.get("result") if reply.get("ok") else None
+
+
+class SharedTicker:
+    """The latest ticker in a small shared memory block, guarded by a sequence lock.
+
+    One writer (the supervisor's market data loop) bumps the sequence to odd, writes, and bumps
+    it back to even; readers retry while it is odd or changed under them, so they never block
+    the writer or see a torn record. Layout: sequence, written_at (epoch s), exchange timestamp
+    (ms), last, bid, ask.
+    """
+
+    LAYOUT = struct.Struct("<Qddddd")
+
+    def __init__(self, name, create=False):
+        self.name = name
+        self.create = create
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.LAYOUT.size)
+            self.shm.buf[:self.LAYOUT.size] = bytes(self.LAYOUT.size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the block when they exit (Python < 3.13 tracks every attach)
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.sequence = 0
+
+    def write(self, ticker, now=None):
+        buf = self.shm.buf
+        self.sequence += 1
+        # An odd sequence marks the write in progress; it is packed first, ahead of the fields
+        self.LAYOUT.pack_into(buf, 0, 2 * self.sequence - 1, now or time.time(),
+                              float(ticker.get("timestamp") or 0), float(ticker["last"]),
+                              float(ticker.get("bid") or 0), float(ticker.get("ask") or 0))
+        struct.pack_into("<Q", buf, 0, 2 * self.sequence)
+
+    def read(self, max_age=None, retries=100):
+        """{"timestamp", "last", "bid", "ask", "written_at"}, or None if unset, stale or contended."""
+        buf = self.shm.buf
+        for _ in range(retries):
+            values = self.LAYOUT.unpack_from(buf, 0)
+            if values[0] % 2 == 0 and struct.unpack_from("<Q", buf, 0)[0] == values[0]:
+                break
+        else:
+            return None
+        sequence, written_at, timestamp, last, bid, ask = values
+        if not sequence or (max_age is not None and time.time() - written_at > max_age):
+            return None
+        return {"timestamp": int(timestamp) or None, "last": last, "bid": bid or None, "ask": ask or None,
+                "written_at": written_at}
+
+    def close(self):
+        self.shm.close()
+        if self.create:
+            self.shm.unlink()
@@ -0,0 +1,237 @@
+"""Venue adapters, a consolidated best bid/offer and best-price order routing across ccxt exchanges.
+
+`VENUES` holds what differs between exchanges for the bot's use: the ccxt class, the params its
+orders and balance requests need (KuCoin trades on the cross margin account) and its taker/maker
+fees. `VenueAdapter` wraps one client with those settings and keeps a local `OrderBook` refreshed
+from REST snapshots; `ConsolidatedBook` refreshes several adapters in parallel and combines their
+tops into one best bid/offer.
+
+`Router.route(side, amount)` walks each fresh book for the full amount (`OrderBook.fill_estimate`),
+adds the venue's taker fee and picks the venue with the best effective price that can fill the
+order and, when its balances are known, has the funds for it. Savings are measured against the
+primary venue, where the order would have gone without routing. Books are refreshed before the
+decision (network time, reported separately); the decision itself only reads local books.
+
+Any object with the ccxt methods used here works as a client, so `simulator.SimulatedExchange`
+instances stand in for venues in benchmarks (benchmarks/bench_routing.py).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from order_book import OrderBook
+
+
+class Venue:
+    __slots__ = ("name", "ccxt_id", "order_params", "balance_params", "taker_fee", "maker_fee")
+
+    def __init__(self, name, ccxt_id=None, order_params=None, balance_params=None, taker_fee=0.001,
+                 maker_fee=0.001):
+        self.name = name
+        self.ccxt_id = ccxt_id or name
+        self.order_params = dict(order_params or {})
+        self.balance_params = dict(balance_params or {})
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+
+
+# Base-tier spot fees; override per deployment with <NAME>_TAKER_FEE / <NAME>_MAKER_FEE in bot.py
+VENUES = {
+    "kucoin": Venue("kucoin", order_params={'marginMode': 'cross'}, balance_params={'type': 'margin'},
+                    taker_fee=0.001, maker_fee=0.001),
+    "binance": Venue("binance", taker_fee=0.001, maker_fee=0.001),
+    "okx": Venue("okx", taker_fee=0.001, maker_fee=0.0008),
+    "bybit": Venue("bybit", taker_fee=0.001, maker_fee=0.001),
+    "kraken": Venue("kraken", taker_fee=0.004, maker_fee=0.0025),
+}
+
+
+def create_client(venue, api_key=None, secret=None, password=None, load_markets=True):
+    """ccxt client for `venue` (a VENUES name or Venue); credentials may be omitted for market data."""
+    import ccxt
+
+    venue = VENUES[venue] if isinstance(venue, str) else venue
+    config = {key: value for key, value in (("apiKey", api_key), ("secret", secret), ("password", password))
+              if value}
+    client = getattr(ccxt, venue.ccxt_id)({**config, "enableRateLimit": True})
+    if load_markets:
+        client.load_markets()
+    return client
+
+
+class VenueAdapter:
+    """One venue's client, trading params and fees, plus its local book and last known balances."""
+
+    def __init__(self, venue, client, pair, depth=50, clock=time.monotonic):
+        self.venue = VENUES[venue] if isinstance(venue, str) else venue
+        self.name = self.venue.name
+        self.client = client
+        self.pair = pair
+        self.base_currency, self.quote_currency = pair.split("/")
+        self.depth = depth
+        self.clock = clock
+        self.book = OrderBook(pair, max_levels=depth)
+        self.refreshed_at = None
+        self.balances = None  # (base free, quote free) from the last successful fetch_balance
+        self.last_error = None
+
+    @property
+    def order_params(self):
+        return self.venue.order_params
+
+    @property
+    def taker_fee(self):
+        return self.venue.taker_fee
+
+    def age(self):
+        return None if self.refreshed_at is None else self.clock() - self.refreshed_at
+
+    def refresh(self):
+        """Loads a fresh order book snapshot; returns False (keeping the old book) on error."""
+        try:
+            snapshot = self.client.fetch_order_book(self.pair, self.depth)
+        except Exception as e:
+            logging.warning(f"{self.name} order book error: {e}")
+            self.last_error = str(e)
+            return False
+        self.book.apply_snapshot(snapshot["bids"], snapshot["asks"], snapshot.get("nonce") or 0)
+        self.refreshed_at = self.clock()
+        return True
+
+    def fetch_balance(self):
+        """Refreshes (base free, quote free); returns them, or None (keeping the last ones) on error."""
+        try:
+            balance = self.client.fetch_balance(self.venue.balance_params)
+        except Exception as e:
+            logging.warning(f"{self.name} balance error: {e}")
+            self.last_error = str(e)
+            return None
+        self.balances = (float(balance.get(self.base_currency, {}).get('free') or 0),
+                         float(balance.get(self.quote_currency, {}).get('free') or 0))
+        return self.balances
+
+    def quote(self, side, amount):
+        """Book walk for `amount` base plus the taker fee: {'venue', 'average', 'effective', 'filled', ...}."""
+        estimate = self.book.fill_estimate(side, amount)
+        average = estimate["average"]
+        if average is None:
+            return {"venue": self.name, "average": None, "effective": None, "filled": 0.0}
+        fee = self.venue.taker_fee
+        # Buys pay the fee on top of the price, sells receive the price net of it
+        effective = average * (1 + fee) if side == "buy" else average * (1 - fee)
+        return {"venue": self.name, "average": average, "effective": effective, "filled": estimate["filled"],
+                "impact_bps": estimate["impact_bps"], "fee_rate": fee}
+
+    def has_funds(self, side, amount, price):
+        if self.balances is None:
+            return True  # Unknown balances do not rule a venue out; the exchange rejects if short
+        base, quote = self.balances
+        return base >= amount if side == "sell" else quote >= amount * price
+
+
+class ConsolidatedBook:
+    """Parallel book refreshes for several venues and their combined best bid/offer."""
+
+    def __init__(self, adapters, max_age=2.0):
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.max_age = max_age
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(self.adapters)), thread_name_prefix="venue")
+
+    def refresh(self, stale_only=True):
+        """Refreshes the books older than `max_age` (all with stale_only=False) in parallel; returns ms taken."""
+        started = time.perf_counter()
+        due = [adapter for adapter in self.adapters.values()
+               if not stale_only or adapter.age() is None or adapter.age() >= self.max_age]
+        list(self.pool.map(lambda adapter: adapter.refresh(), due))
+        return (time.perf_counter() - started) * 1000
+
+    def refresh_balances(self, adapters=None):
+        """Fetches the balances of `adapters` (default all) in parallel."""
+        list(self.pool.map(lambda adapter: adapter.fetch_balance(),
+                           self.adapters.values() if adapters is None else adapters))
+
+    def fresh(self):
+        """Adapters whose book is ready and younger than `max_age`."""
+        return [adapter for adapter in self.adapters.values()
+                if adapter.book.ready and adapter.age() is not None and adapter.age() < self.max_age]
+
+    def bbo(self):
+        """Best bid and ask across the fresh venues, with each venue's own top of book."""
+        venues = {adapter.name: {"bid": adapter.book.best_bid, "ask": adapter.book.best_ask,
+                                 "age_ms": round(adapter.age() * 1000, 1)}
+                  for adapter in self.fresh()}
+        if not venues:
+            return {"bid": None, "ask": None, "bid_venue": None, "ask_venue": None, "crossed": False, "venues": {}}
+        bid_venue = max(venues, key=lambda name: venues[name]["bid"])
+        ask_venue = min(venues, key=lambda name: venues[name]["ask"])
+        return {"bid": venues[bid_venue]["bid"], "ask": venues[ask_venue]["ask"], "bid_venue": bid_venue,
+                "ask_venue": ask_venue, "crossed": venues[bid_venue]["bid"] >= venues[ask_venue]["ask"],
+                "venues": venues}
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+class Router:
+    """Sends each order to the venue with the best effective price; see the module docstring."""
+
+    def __init__(self, book, primary):
+        if primary not in book.adapters:
+            raise ValueError(f"Primary venue {primary!r} is not one of {list(book.adapters)}")
+        self.book = book
+        self.primary = primary
+        self.stats = {"routes": 0, "rerouted": 0, "fallbacks": 0, "saved_quote": 0.0,
+                      "by_venue": {name: 0 for name in book.adapters}}
+
+    @property
+    def venues(self):
+        return self.book.adapters
+
+    def route(self, side, amount, refresh=True):
+        """Chooses a venue for a market order of `amount` base on `side`.
+
+        Returns {'venue', 'effective', 'average', 'savings_bps', 'saved_quote', 'decision_us',
+        'refresh_ms', 'quotes', 'reason'}. Falls back to the primary venue (reason set) when no
+        fresh venue can fill the whole amount with the funds it holds.
+        """
+        refresh_ms = self.book.refresh(stale_only=False) if refresh else 0.0
+        started = time.perf_counter()
+        quotes = {}
+        best = None
+        for adapter in self.book.fresh():
+            quote = adapter.quote(side, amount)
+            quotes[adapter.name] = quote
+            if quote["effective"] is None or quote["filled"] < amount - 1e-12:
+                quote["excluded"] = "insufficient depth"
+            elif not adapter.has_funds(side, amount, quote["effective"]):
+                quote["excluded"] = "insufficient funds"
+            elif best is None or (quote["effective"] < best["effective"] if side == "buy"
+                                  else quote["effective"] > best["effective"]):
+                best = quote
+        reason = None
+        if best is None:
+            reason = "no eligible venue"
+            best = quotes.get(self.primary) or {"venue": self.primary, "effective": None, "average": None}
+        baseline = quotes.get(self.primary, {}).get("effective")
+        savings_bps = saved_quote = None
+        if baseline and best["effective"]:
+            sign = 1 if side == "buy" else -1
+            saved_quote = sign * (baseline - best["effective"]) * amount
+            savings_bps = sign * (baseline - best["effective"]) / baseline * 1e4
+        decision_us = (time.perf_counter() - started) * 1e6
+
+        s = self.stats
+        s["routes"] += 1
+        s["by_venue"][best["venue"]] += 1
+        if reason:
+            s["fallbacks"] += 1
+        elif best["venue"] != self.primary:
+            s["rerouted"] += 1
+        s["saved_quote"] += saved_quote or 0.0
+        return {"venue": best["venue"], "effective": best["effective"], "average": best["average"],
+                "savings_bps": savings_bps, "saved_quote": saved_quote, "decision_us": round(decision_us, 1),
+                "refresh_ms": round(refresh_ms, 2), "quotes": quotes, "reason": reason}
+
+    def snapshot(self):
+        return {"primary": self.primary, "bbo": self.book.bbo(), **self.stats,
+                "by_venue": dict(self.stats["by_venue"])}
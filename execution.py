@@ -0,0 +1,278 @@
+import logging
+import time
+
+import ccxt
+
+from accounting import fee_in_quote
+
+MODES = ("market", "post_only")
+
+
+class ExecutionEngine:
+    """Places orders either as plain market orders or as post-only limit orders worked at the touch.
+
+    In post-only mode the order rests at the best bid (buy) or best ask (sell). Whenever the touch
+    moves `reprice_ticks` away the order is cancelled and replaced at the new touch for the unfilled
+    remainder; post-only rejections (the price moved through us before the order landed) are retried
+    at the next touch. KuCoin cancels such an order instead of rejecting it, and the next poll
+    replaces it the same way. Once `max_wait` seconds have passed the working order is cancelled and
+    any remainder goes out as a market order, so the bot never misses a signal for more than the
+    deadline.
+
+    `sleep` and `clock` are injectable so the engine can run against `simulator.SimulatedExchange`
+    on virtual time. Stats cover fill rates (overall and passive, as shares of requested volume)
+    and effective cost (slippage against the arrival mid plus fees, in basis points).
+    """
+
+    def __init__(self, pair, mode="market", order_params=None, max_wait=10.0, poll_interval=0.5,
+                 reprice_ticks=1, tick_size=0.1, min_amount=0.00001, settle_delay=1.0, quote_currency="USDT",
+                 sleep=time.sleep, clock=time.monotonic):
+        if mode not in MODES:
+            raise ValueError(f"Unknown execution mode {mode!r}; expected one of {MODES}")
+        self.pair = pair
+        self.mode = mode
+        self.order_params = dict(order_params or {})
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.reprice_ticks = reprice_ticks
+        self.tick_size = tick_size
+        self.min_amount = min_amount
+        self.settle_delay = settle_delay
+        self.quote_currency = quote_currency
+        self.sleep = sleep
+        self.clock = clock
+        self.stats = {
+            "executions": 0, "requested": 0.0, "filled": 0.0, "maker_filled": 0.0, "taker_filled": 0.0,
+            "orders": 0, "reprices": 0, "post_only_rejects": 0, "fallbacks": 0,
+            "notional": 0.0, "fees": 0.0, "cost_usdt": 0.0,
+        }
+
+    # --- Public API ---
+    def execute(self, exchange, side, amount, on_submit=None, trace=None, arrival_mid=None, on_progress=None):
+        """Executes `amount` BTC on `side` and returns a ccxt-like summary of all child orders.
+
+        The summary has 'id' (last child order), 'ids', 'filled', 'average', 'fee' ({'cost',
+        'currency'}), 'status', 'maker_filled', 'taker_filled', 'latency_ms' (first submission
+        round trip), 'filled_at' (exchange time of the last fill, ms), 'effective_cost_bps' and
+        'unresolved' (the ID of a post-only order whose cancel failed, so it may still fill; None
+        otherwise). Fills gathered before an exchange error are returned rather than lost.
+        `on_submit(order_id, side, amount)` is called right after every child order is accepted so
+        callers can persist it for crash recovery. A `clock.LatencyTrace` passed as `trace` gets
+        'submit'/'ack' marks for the first child order and a 'fill' mark once anything filled.
+        `on_progress()` is called before every exchange request and wait, so a liveness heartbeat
+        keeps moving while an order is worked (gaps are one request, not the whole execution).
+
+        `arrival_mid` is the mid the cost is measured against; callers holding a live book pass its
+        mid, otherwise one book snapshot is fetched. It only feeds the stats, so when neither is
+        available the order still goes out and 'effective_cost_bps' is None.
+        """
+        fill = _Fill(side, trace, on_progress)
+        fill.beat()
+        if arrival_mid is None:
+            arrival_mid = self._arrival_mid(exchange)
+        if self.mode == "post_only":
+            self._work_post_only(exchange, side, amount, fill, on_submit)
+        remaining = round(amount - fill.filled, 8)
+        if fill.unresolved is not None:
+            # The order may still fill on the book; a market remainder on top could over-trade
+            logging.error(f"Post-only order {fill.unresolved} may still be resting; not sending the remaining "
+                          f"{remaining:.8f} BTC")
+        elif remaining >= self.min_amount:
+            if self.mode == "post_only":
+                self.stats["fallbacks"] += 1
+                logging.info(f"Post-only {side} not filled within {self.max_wait}s; "
+                             f"sending {remaining:.8f} BTC as market order")
+            try:
+                self._market(exchange, side, remaining, fill, on_submit)
+            except Exception as e:
+                if not fill.filled:
+                    raise
+                logging.error(f"Market {side} for the remaining {remaining:.8f} BTC failed: {e}")
+
+        if trace is not None and fill.filled:
+            trace.mark("fill", exchange_ts=fill.filled_at)
+        summary = fill.summary(arrival_mid, self.quote_currency)
+        self._record(amount, fill, summary)
+        return summary
+
+    def snapshot(self):
+        s = self.stats
+        return {
+            "mode": self.mode,
+            "executions": s["executions"],
+            "orders": s["orders"],
+            "reprices": s["reprices"],
+            "post_only_rejects": s["post_only_rejects"],
+            "fallbacks": s["fallbacks"],
+            "fill_rate": s["filled"] / s["requested"] if s["requested"] else 0.0,
+            "maker_fill_rate": s["maker_filled"] / s["requested"] if s["requested"] else 0.0,
+            "fees": s["fees"],
+            "effective_cost_bps": s["cost_usdt"] / s["notional"] * 1e4 if s["notional"] else 0.0,
+        }
+
+    # --- Internals ---
+    def _arrival_mid(self, exchange):
+        try:
+            bid, ask = self._touch(exchange)
+        except Exception as e:
+            logging.warning(f"No arrival mid for execution cost: {e}")
+            return None
+        return (bid + ask) / 2
+
+    def _touch(self, exchange):
+        book = exchange.fetch_order_book(self.pair, 5)
+        return float(book["bids"][0][0]), float(book["asks"][0][0])
+
+    def _submit(self, exchange, order_type, side, amount, price, params, fill, on_submit):
+        fill.beat()
+        if fill.trace is not None:
+            fill.trace.mark("submit")
+        submitted = time.perf_counter()
+        order = exchange.create_order(self.pair, order_type, side, amount, price, params)
+        if fill.latency_ms is None:
+            fill.latency_ms = (time.perf_counter() - submitted) * 1000
+        if fill.trace is not None:
+            fill.trace.mark("ack", exchange_ts=order.get("timestamp"))
+        self.stats["orders"] += 1
+        fill.ids.append(order["id"])
+        if on_submit:
+            on_submit(order["id"], side, amount)
+        return order
+
+    def _work_post_only(self, exchange, side, amount, fill, on_submit):
+        deadline = self.clock() + self.max_wait
+        params = {**self.order_params, "postOnly": True, "timeInForce": "GTC"}
+        order = None
+        try:
+            while self.clock() < deadline:
+                remaining = round(amount - fill.filled, 8)
+                if remaining < self.min_amount:
+                    break
+                fill.beat()
+                bid, ask = self._touch(exchange)
+                touch = bid if side == "buy" else ask
+                if order is not None and abs(touch - order["price"]) >= self.reprice_ticks * self.tick_size - 1e-9:
+                    self._cancel(exchange, order, fill)
+                    order = None
+                    self.stats["reprices"] += 1
+                    continue  # Re-check the remainder: the cancelled order may have filled meanwhile
+                if order is None:
+                    try:
+                        order = self._submit(exchange, "limit", side, remaining, touch, params, fill, on_submit)
+                        fill.track(order, maker=True)
+                    except ccxt.OrderImmediatelyFillable as e:  # Other InvalidOrder errors would fail again
+                        self.stats["post_only_rejects"] += 1
+                        logging.debug(f"Post-only {side} at {touch} rejected: {e}")
+                self.sleep(self.poll_interval)
+                if order is not None:
+                    order = self._refresh(exchange, order, fill)
+        except Exception as e:
+            logging.warning(f"Post-only {side} interrupted: {e}")
+        finally:
+            # Never leave a maker order resting once execute() returns
+            if order is not None:
+                try:
+                    self._cancel(exchange, order, fill)
+                except Exception as e:
+                    logging.error(f"Could not cancel post-only order {order['id']}: {e}")
+                    fill.unresolved = order["id"]
+
+    def _refresh(self, exchange, order, fill):
+        """Books new fills of a working order; returns None once it is no longer open."""
+        fill.beat()
+        details = exchange.fetch_order(order["id"], self.pair)
+        fill.track(details, maker=True)
+        return order if details.get("status") == "open" else None
+
+    def _cancel(self, exchange, order, fill):
+        fill.beat()
+        try:
+            exchange.cancel_order(order["id"], self.pair)
+        except ccxt.OrderNotFound:
+            pass  # Already filled or cancelled; the fetch below has the final state
+        fill.beat()
+        fill.track(exchange.fetch_order(order["id"], self.pair), maker=True)
+
+    def _market(self, exchange, side, amount, fill, on_submit):
+        order = self._submit(exchange, "market", side, amount, None, self.order_params, fill, on_submit)
+        self.sleep(self.settle_delay)  # Allow the exchange to process the order
+        fill.beat()
+        fill.track(exchange.fetch_order(order["id"], self.pair), maker=False)
+
+    def _record(self, requested, fill, summary):
+        s = self.stats
+        s["executions"] += 1
+        s["requested"] += requested
+        s["filled"] += fill.filled
+        s["maker_filled"] += fill.maker_filled
+        s["taker_filled"] += fill.filled - fill.maker_filled
+        s["fees"] += fill.fees
+        if fill.filled and summary["effective_cost_bps"] is not None:
+            notional = fill.cost
+            s["notional"] += notional
+            s["cost_usdt"] += summary["effective_cost_bps"] * notional / 1e4
+
+
+class _Fill:
+    """Accumulates fills across the child orders of one execution.
+
+    ccxt reports cumulative 'filled', 'cost' and 'fee' per order, so each order's last seen values
+    are kept and only the increments are added.
+    """
+
+    def __init__(self, side, trace=None, on_progress=None):
+        self.side = side
+        self.trace = trace
+        self.on_progress = on_progress
+        self.ids = []
+        self.latency_ms = None
+        self.filled_at = None
+        self.filled = 0.0
+        self.maker_filled = 0.0
+        self.cost = 0.0
+        self.fees = 0.0
+        self.status = "open"
+        self.unresolved = None  # ID of a working order that could not be cancelled
+        self._seen = {}
+
+    def beat(self):
+        if self.on_progress is not None:
+            self.on_progress()
+
+    def track(self, order, maker):
+        filled = float(order.get("filled") or 0)
+        price = float(order.get("average") or order.get("price") or 0)
+        cost = float(order.get("cost") or filled * price)
+        fee = fee_in_quote(order.get("fee"), price)
+        prev_filled, prev_cost, prev_fee = self._seen.get(order["id"], (0.0, 0.0, 0.0))
+        if filled > prev_filled:
+            # ccxt has no per-fill time on orders; lastTradeTimestamp when given, else the order time
+            self.filled_at = order.get("lastTradeTimestamp") or order.get("timestamp") or self.filled_at
+            self.filled += filled - prev_filled
+            self.cost += cost - prev_cost
+            if maker:
+                self.maker_filled += filled - prev_filled
+        self.fees += max(0.0, fee - prev_fee)
+        self._seen[order["id"]] = (max(filled, prev_filled), max(cost, prev_cost), max(fee, prev_fee))
+        self.status = order.get("status") or self.status
+
+    def summary(self, arrival_mid, quote_currency):
+        average = self.cost / self.filled if self.filled else None
+        effective_cost_bps = None
+        if average and arrival_mid:
+            slippage = (average - arrival_mid) if self.side == "buy" else (arrival_mid - average)
+            effective_cost_bps = (slippage * self.filled + self.fees) / self.cost * 1e4
+        return {
+            "id": self.ids[-1] if self.ids else None,
+            "ids": list(self.ids),
+            "filled": self.filled,
+            "average": average,
+            "fee": {"cost": self.fees, "currency": quote_currency},
+            "status": "open" if self.unresolved else "closed" if self.filled else self.status,
+            "maker_filled": self.maker_filled,
+            "taker_filled": self.filled - self.maker_filled,
+            "latency_ms": self.latency_ms,
+            "filled_at": self.filled_at,
+            "effective_cost_bps": effective_cost_bps,
+            "unresolved": self.unresolved,
+        }
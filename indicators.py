@@ -0,0 +1,245 @@
+"""Technical indicators in two forms with identical definitions.
+
+Incremental classes (EMA, RollingVolatility, VWAP, RSI, ZScore) take one tick at a time in O(1)
+using fixed-size ring buffers, for the live loop. The lower-case functions compute the same
+series over whole NumPy arrays for backtests; index i of a batch result equals what the
+incremental indicator returned after the i-th update, with NaN where it returned None
+(benchmarks/bench_indicators.py checks this).
+"""
+import math
+from array import array
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Relative size below which a window's movement or dispersion counts as zero, so float residue
+# left by evictions cannot turn a flat window into a spurious RSI or z-score
+FLAT = 1e-12
+
+
+class RingWindow:
+    """The last `size` values with O(1) push and running mean/variance.
+
+    Mean and variance are updated with the add/remove form of Welford's method, which avoids
+    the cancellation of sum/sum-of-squares on price-sized values, and are recomputed exactly
+    from the buffer once per `size` pushes so rounding error cannot accumulate.
+    """
+
+    __slots__ = ("size", "values", "index", "count", "mean", "m2", "total", "_pushes")
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = size
+        self.values = array("d", bytes(8 * size))
+        self.index = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self._pushes = 0
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def push(self, x):
+        """Adds `x`, evicting the oldest value once full; returns the evicted value or None."""
+        evicted = None
+        if self.count == self.size:
+            evicted = self.values[self.index]
+            if self.count == 1:
+                self.mean = self.m2 = self.total = 0.0
+                self.count = 0
+            else:
+                self.count -= 1
+                self.total -= evicted
+                delta = evicted - self.mean
+                self.mean -= delta / self.count
+                self.m2 -= delta * (evicted - self.mean)
+        self.values[self.index] = x
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self._pushes += 1
+        if self._pushes >= self.size:
+            self._resum()
+        return evicted
+
+    def _resum(self):
+        self._pushes = 0
+        values = self.values if self.full else self.values[:self.count]
+        self.total = math.fsum(values)
+        self.mean = self.total / self.count
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in values)
+
+    def variance(self):
+        """Sample variance (ddof=1)."""
+        return max(self.m2, 0.0) / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class EMA:
+    """Exponential moving average with alpha = 2 / (period + 1), seeded with the first value."""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, period):
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class RollingVolatility:
+    """Sample standard deviation of simple returns over the last `window` price changes."""
+
+    __slots__ = ("returns", "last", "value")
+
+    def __init__(self, window):
+        self.returns = RingWindow(window)
+        self.last = None
+        self.value = None
+
+    def update(self, price):
+        if self.last is not None:
+            self.returns.push(price / self.last - 1.0)
+            if self.returns.full:
+                self.value = self.returns.std()
+        self.last = price
+        return self.value
+
+
+class VWAP:
+    """Volume-weighted average price over the last `window` ticks (volume 1 gives a plain SMA)."""
+
+    __slots__ = ("notional", "volume", "value")
+
+    def __init__(self, window):
+        self.notional = RingWindow(window)
+        self.volume = RingWindow(window)
+        self.value = None
+
+    def update(self, price, volume=1.0):
+        self.notional.push(price * volume)
+        self.volume.push(volume)
+        if self.volume.full:
+            self.value = self.notional.total / self.volume.total if self.volume.total else price
+        return self.value
+
+
+class RSI:
+    """Relative strength index over the last `window` changes, using simple averages (Cutler's RSI).
+
+    Simple rather than Wilder averages keep the indicator a pure window function, so the batch
+    version vectorizes and a restart only needs the last `window` prices to warm up.
+    """
+
+    __slots__ = ("gains", "losses", "last", "value")
+
+    def __init__(self, window):
+        self.gains = RingWindow(window)
+        self.losses = RingWindow(window)
+        self.last = None
+        self.value = None
+
+    def update(self, price):
+        if self.last is not None:
+            change = price - self.last
+            self.gains.push(change if change > 0 else 0.0)
+            self.losses.push(-change if change < 0 else 0.0)
+            if self.gains.full:
+                moved = self.gains.total + self.losses.total
+                self.value = 100.0 * self.gains.total / moved if moved > FLAT * price else 50.0
+        self.last = price
+        return self.value
+
+
+class ZScore:
+    """Distance of the latest value from the window mean in sample standard deviations."""
+
+    __slots__ = ("window", "value")
+
+    def __init__(self, window):
+        self.window = RingWindow(window)
+        self.value = None
+
+    def update(self, x):
+        self.window.push(x)
+        if self.window.full:
+            std = self.window.std()
+            self.value = (x - self.window.mean) / std if std > FLAT * abs(self.window.mean) else 0.0
+        return self.value
+
+
+# --- Batch versions for backtests ---
+def _padded(values, length):
+    """NaN-pads a series computed from full windows at the front back to the input length."""
+    out = np.full(length, np.nan)
+    out[length - len(values):] = values
+    return out
+
+
+def ema(prices, period):
+    """Batch EMA. The recurrence is inherently sequential, so it runs as a tight loop."""
+    prices = np.asarray(prices, dtype=float)
+    out = np.empty(len(prices))
+    alpha = 2.0 / (period + 1)
+    value = None
+    for i, x in enumerate(prices.tolist()):
+        value = x if value is None else value + alpha * (x - value)
+        out[i] = value
+    return out
+
+
+def rolling_volatility(prices, window):
+    prices = np.asarray(prices, dtype=float)
+    if len(prices) <= window:
+        return np.full(len(prices), np.nan)
+    returns = prices[1:] / prices[:-1] - 1.0
+    std = sliding_window_view(returns, window).std(axis=1, ddof=1)
+    return _padded(std, len(prices))
+
+
+def vwap(prices, window, volumes=None):
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.ones(len(prices)) if volumes is None else np.asarray(volumes, dtype=float)
+    if len(prices) < window:
+        return np.full(len(prices), np.nan)
+    notional = sliding_window_view(prices * volumes, window).sum(axis=1)
+    volume = sliding_window_view(volumes, window).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.where(volume != 0, notional / volume, prices[window - 1:])
+    return _padded(values, len(prices))
+
+
+def rsi(prices, window):
+    prices = np.asarray(prices, dtype=float)
+    if len(prices) <= window:
+        return np.full(len(prices), np.nan)
+    changes = np.diff(prices)
+    gains = sliding_window_view(np.where(changes > 0, changes, 0.0), window).sum(axis=1)
+    losses = sliding_window_view(np.where(changes < 0, -changes, 0.0), window).sum(axis=1)
+    moved = gains + losses
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.where(moved > FLAT * prices[window:], 100.0 * gains / moved, 50.0)
+    return _padded(values, len(prices))
+
+
+def zscore(values, window):
+    values = np.asarray(values, dtype=float)
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    windows = sliding_window_view(values, window)
+    std = windows.std(axis=1, ddof=1)
+    mean = windows.mean(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.where(std > FLAT * np.abs(mean), (values[window - 1:] - mean) / std, 0.0)
+    return _padded(scores, len(values))
@@ -0,0 +1,183 @@
+"""Liveness watchdog for the trading loop: progress heartbeats, thresholds and escalation.
+
+The loop records progress with `Heartbeat.beat(name)`: "loop" every iteration, "tick" when a
+price was processed and "decision" once the strategy evaluated it. Queue depths (orders in
+flight, staged config changes, undelivered notifications) are sampled from gauges. Beats are
+plain dict stores of a monotonic time, cheap enough for every iteration.
+
+`Watchdog` runs on its own thread and checks the heartbeat every `interval` seconds (0.25 by
+default), so a stalled loop is noticed within a fraction of a second of crossing a threshold,
+whatever the loop is stuck on. A threshold is breached when an age (seconds since the mark) or
+a queue depth exceeds its limit; each breach escalates once, when it starts, with its action
+("alert" or "kill"), and once more when it clears ("recovered"). The bot wires "alert" to a
+Telegram message and "kill" to the risk engine's kill switch, which stays engaged until released.
+
+`state()` is what GET /health serves (via the bot's state socket):
+
+    {"status": "ok" | "degraded" | "stalled", "ages_ms": {"loop": 120.5, "tick": 130.1, ...},
+     "queues": {"open_orders": 0, ...}, "breaches": [...], "beats": 1234, "checked_ms_ago": 80.2}
+
+"degraded" means an alert threshold is breached, "stalled" a kill threshold.
+"""
+import logging
+import threading
+import time
+
+ALERT = "alert"
+KILL = "kill"
+RECOVERED = "recovered"
+
+
+class Heartbeat:
+    """Latest monotonic time of each progress mark plus queue depth gauges."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.marks = {}
+        self.gauges = {}
+        self.beats = 0
+
+    def beat(self, name):
+        self.marks[name] = self.clock()
+        if name == "loop":
+            self.beats += 1
+
+    def gauge(self, name, depth):
+        """Registers `depth()` as the queue named `name`."""
+        self.gauges[name] = depth
+
+    def snapshot(self):
+        now = self.clock()
+        queues = {}
+        for name, depth in self.gauges.items():
+            try:
+                queues[name] = depth()
+            except Exception as e:  # A broken gauge must not take the watchdog down
+                logging.error(f"Heartbeat gauge {name} failed: {e}")
+                queues[name] = None
+        return {"ages_ms": {name: round((now - at) * 1000, 1) for name, at in dict(self.marks).items()},
+                "queues": queues, "beats": self.beats}
+
+
+class Threshold:
+    __slots__ = ("kind", "name", "limit", "action")
+
+    def __init__(self, kind, name, limit, action=ALERT):
+        if kind not in ("age", "queue"):
+            raise ValueError(f"Unknown threshold kind {kind!r}")
+        self.kind = kind
+        self.name = name
+        self.limit = limit
+        self.action = action
+
+    @property
+    def key(self):
+        return f"{self.kind}:{self.name}:{self.action}"
+
+    def value(self, snapshot):
+        """Age in seconds or queue depth; None when the mark or gauge does not exist yet."""
+        if self.kind == "age":
+            age_ms = snapshot["ages_ms"].get(self.name)
+            return None if age_ms is None else age_ms / 1000
+        return snapshot["queues"].get(self.name)
+
+    def describe(self, value):
+        if self.kind == "age":
+            return f"{self.name} age {value:.1f}s > {self.limit:g}s"
+        return f"{self.name} queue {value} > {self.limit:g}"
+
+
+class Watchdog:
+    """Checks `thresholds` against `heartbeat` on a daemon thread; see the module docstring.
+
+    `escalate(action, message, snapshot)` is called from the watchdog thread, so it must not block
+    for long (queue a notification, flip a flag).
+    """
+
+    def __init__(self, heartbeat, thresholds, escalate, interval=0.25, clock=time.monotonic):
+        self.heartbeat = heartbeat
+        self.thresholds = list(thresholds)
+        self.escalate = escalate
+        self.interval = interval
+        self.clock = clock
+        self.breaches = {}  # Threshold key -> {"threshold", "action", "since", "value"}
+        self.last = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2 * self.interval + 1)
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Watchdog check failed: {e}")
+
+    def check(self):
+        """Evaluates every threshold once and escalates breaches that started or cleared."""
+        snapshot = self.heartbeat.snapshot()
+        events = []
+        with self.lock:
+            for threshold in self.thresholds:
+                value = threshold.value(snapshot)
+                breached = value is not None and value > threshold.limit
+                active = self.breaches.get(threshold.key)
+                if breached and active is None:
+                    self.breaches[threshold.key] = {"threshold": threshold.key, "action": threshold.action,
+                                                    "since": self.clock(), "value": value}
+                    events.append((threshold.action, threshold.describe(value)))
+                elif breached:
+                    active["value"] = value
+                elif active is not None:
+                    del self.breaches[threshold.key]
+                    events.append((RECOVERED, f"{threshold.kind} {threshold.name} back within {threshold.limit:g}"))
+            self.last = snapshot
+            self.checked_at = self.clock()
+        for action, message in events:
+            logging.log(logging.INFO if action == RECOVERED else logging.ERROR, f"Watchdog {action}: {message}")
+            try:
+                self.escalate(action, message, snapshot)
+            except Exception as e:
+                logging.error(f"Watchdog escalation failed: {e}")
+        return events
+
+    def state(self):
+        with self.lock:
+            snapshot = self.last or self.heartbeat.snapshot()
+            actions = {breach["action"] for breach in self.breaches.values()}
+            now = self.clock()
+            return {"status": "stalled" if KILL in actions else "degraded" if actions else "ok", **snapshot,
+                    "breaches": [{"threshold": breach["threshold"], "action": breach["action"],
+                                  "value": round(breach["value"], 3), "for_s": round(now - breach["since"], 2)}
+                                 for breach in self.breaches.values()],
+                    "checked_ms_ago": None if self.checked_at is None else round((now - self.checked_at) * 1000, 1),
+                    "interval_ms": self.interval * 1000}
+
+
+def thresholds_from_env(getenv, defaults=None, prefix="WATCHDOG_"):
+    """Reads WATCHDOG_LOOP_ALERT_S, WATCHDOG_LOOP_KILL_S, WATCHDOG_TICK_ALERT_S,
+    WATCHDOG_DECISION_ALERT_S and WATCHDOG_OPEN_ORDERS_ALERT into Thresholds. `defaults` maps the
+    same names (without prefix) to values used when a variable is unset; an empty value turns a
+    threshold off."""
+    defaults = defaults or {}
+    specs = (("LOOP_ALERT_S", "age", "loop", ALERT), ("LOOP_KILL_S", "age", "loop", KILL),
+             ("TICK_ALERT_S", "age", "tick", ALERT), ("DECISION_ALERT_S", "age", "decision", ALERT),
+             ("OPEN_ORDERS_ALERT", "queue", "open_orders", ALERT))
+    thresholds = []
+    for name, kind, mark, action in specs:
+        value = getenv(prefix + name)
+        if value is None:
+            value = defaults.get(name)
+        if value not in (None, ""):
+            thresholds.append(Threshold(kind, mark, float(value), action))
+    return thresholds
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+
+TELEGRAM_API_BASE = "https://api.telegram.org"
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for sendMessage text
+
+
+class TelegramNotifier:
+    """Delivers Telegram messages from a bounded queue on a single worker task.
+
+    `notify()` and `send_document()` are thread-safe and never block the caller: items are handed
+    to the event loop and dropped (and counted) when the queue is full. Text messages arriving
+    within `coalesce_window` seconds are merged into one message, sends are paced to
+    `min_interval` seconds per chat, and 429 responses are retried after Telegram's retry_after.
+    """
+
+    def __init__(self, token, chat_id, api_base=None, max_queue=1000, coalesce_window=2.0,
+                 min_interval=1.0, max_retries=5, request_timeout=30):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_base = (api_base or os.getenv("TELEGRAM_API_BASE") or TELEGRAM_API_BASE).rstrip("/")
+        self.max_queue = max_queue
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0, "retries": 0, "errors": 0}
+        self._loop = None
+        self._queue = None
+        self._session = None
+        self._worker = None
+        self._next_send_at = 0.0
+
+    # --- Lifecycle ---
+    async def start(self):
+        """Binds the notifier to the running event loop and starts its worker."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        self._worker = asyncio.create_task(self._run())
+        logging.info(f"Telegram notifier started (queue size {self.max_queue})")
+
+    async def stop(self, drain_timeout=10):
+        """Flushes pending items (up to `drain_timeout` seconds) and closes the HTTP session."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Telegram notifier stopped with {self._queue.qsize()} undelivered items")
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        await self._session.close()
+        self._worker = None
+        self._loop = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # --- Producers (any thread) ---
+    def notify(self, text):
+        """Queues a text message. Returns False if it was dropped."""
+        return self._submit(("message", text))
+
+    def send_document(self, path, caption=None):
+        """Queues a file upload. Returns False if it was dropped."""
+        return self._submit(("document", (path, caption)))
+
+    def _submit(self, item):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.stats["dropped"] += 1
+            logging.debug("Telegram notifier not running, dropping notification.")
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return self._enqueue(item)
+        loop.call_soon_threadsafe(self._enqueue, item)
+        return True
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+            self.stats["queued"] += 1
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logging.warning("Telegram notification queue full, dropping notification.")
+            return False
+
+    # --- Worker ---
+    async def _run(self):
+        held = None  # Item that ended a coalescing burst, processed next
+        while True:
+            kind, payload = held or await self._queue.get()
+            held = None
+            taken = 1
+            try:
+                if kind == "document":
+                    await self._send_document(*payload)
+                    continue
+                texts = [payload]
+                # Coalesce a burst of messages into one; a document ends the burst and keeps its order
+                deadline = self._loop.time() + self.coalesce_window
+                while True:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if item[0] != "message":
+                        held = item
+                        break
+                    taken += 1
+                    texts.append(item[1])
+                self.stats["coalesced"] += len(texts) - 1
+                for chunk in self._chunks(texts):
+                    await self._call("sendMessage", json={"chat_id": self.chat_id, "text": chunk})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Telegram notification error: {e}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    @staticmethod
+    def _chunks(texts):
+        header = f"🔔 {len(texts)} notifications" if len(texts) > 1 else ""
+        chunk = header
+        for text in texts:
+            text = text[:MAX_MESSAGE_LENGTH - 1]
+            if chunk and len(chunk) + len(text) + 1 > MAX_MESSAGE_LENGTH:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk}\n{text}" if chunk else text
+        if chunk:
+            yield chunk
+
+    async def _send_document(self, path, caption):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            logging.warning(f"File {path} does not exist or is empty.")
+            return
+        content = await asyncio.to_thread(_read_bytes, path)
+
+        def form():
+            data = aiohttp.FormData()
+            data.add_field("chat_id", str(self.chat_id))
+            if caption:
+                data.add_field("caption", caption)
+            data.add_field("document", content, filename=os.path.basename(path))
+            return data
+
+        await self._call("sendDocument", data_factory=form)
+        logging.info(f"File {path} sent successfully.")
+
+    async def _call(self, method, json=None, data_factory=None):
+        """POSTs one Bot API call with per-chat pacing and retry on 429/5xx."""
+        url = f"{self.api_base}/bot{self.token}/{method}"
+        for attempt in range(self.max_retries + 1):
+            wait = self._next_send_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_send_at = time.monotonic() + self.min_interval
+            try:
+                data = data_factory() if data_factory else None
+                async with self._session.post(url, json=json, data=data) as resp:
+                    body = await resp.json(content_type=None)
+                    if resp.status == 200 and body.get("ok"):
+                        self.stats["sent"] += 1
+                        return body
+                    if resp.status == 429:
+                        retry_after = float((body.get("parameters") or {}).get("retry_after", 1))
+                        self._next_send_at = time.monotonic() + retry_after
+                        logging.warning(f"Telegram rate limit hit, retrying in {retry_after:.0f}s")
+                    elif resp.status < 500:
+                        raise RuntimeError(f"Telegram {method} failed: {resp.status} {body.get('description')}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Telegram {method} network error: {e}")
+                self._next_send_at = time.monotonic() + min(2 ** attempt, 30)
+            self.stats["retries"] += 1
+        raise RuntimeError(f"Telegram {method} failed after {self.max_retries} retries")
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,259 @@
+"""Bulk historical OHLCV downloader with an on-disk, memory-mappable cache.
+
+Candles for one pair and timeframe live in DATA_DIR/ohlcv/<BASE>-<QUOTE>_<timeframe>.bin as a
+flat array of `CANDLE` records (ts in ms, open, high, low, close, volume) sorted by time, with a
+small JSON manifest next to it. `load_candles` maps the file with np.memmap, so a backtest or
+the bot's warm-up reads only the pages it touches.
+
+`OhlcvCache.sync(since, until)` splits the range into chunks of `limit` candles and fetches them
+with fetch_ohlcv from a thread pool, all workers sharing one rate limiter paced by the client's
+`rateLimit`. Chunks finish out of order but are appended strictly in order, and the manifest
+records how far the file is complete after every append, so an interrupted download resumes
+where it stopped. Candles outside a chunk, or at or before the last stored one, are dropped,
+which removes the overlap exchanges return at page boundaries. Extending the range backwards
+downloads the missing head into a temporary file and swaps it in with the existing candles.
+
+    python ohlcv.py BTC/USDT 1m --days 30           # download/extend the cache
+    python ohlcv.py BTC/USDT 1h --days 365 --workers 8
+
+Trades are not cached: KuCoin's public trade history only returns the latest page, without
+time-based pagination, so there is nothing to resume.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CANDLE = np.dtype([("ts", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                   ("volume", "<f8")])
+TIMEFRAME_UNITS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+MAX_LIMIT = 1500  # KuCoin returns at most 1500 candles per kline request
+
+
+def timeframe_ms(timeframe):
+    """'1m' -> 60000, '4h' -> 14400000."""
+    try:
+        return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported timeframe {timeframe!r}") from None
+
+
+def cache_path(directory, pair, timeframe):
+    return os.path.join(directory, f"{pair.replace('/', '-')}_{timeframe}.bin")
+
+
+def load_candles(directory, pair, timeframe, since=None, until=None):
+    """Read-only memmap of cached candles with since <= ts < until (ms); an empty array if none."""
+    path = cache_path(directory, pair, timeframe)
+    if not os.path.exists(path) or os.path.getsize(path) < CANDLE.itemsize:
+        return np.empty(0, dtype=CANDLE)
+    candles = np.memmap(path, dtype=CANDLE, mode="r", shape=(os.path.getsize(path) // CANDLE.itemsize,))
+    ts = candles["ts"]
+    i0 = 0 if since is None else int(np.searchsorted(ts, since))
+    i1 = len(candles) if until is None else int(np.searchsorted(ts, until))
+    return candles[i0:i1]
+
+
+class RateLimiter:
+    """Spaces calls at least `interval` seconds apart across all threads."""
+
+    def __init__(self, interval, clock=time.monotonic, sleep=time.sleep):
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = self.clock()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            self.sleep(at - now)
+
+
+class OhlcvCache:
+    """Downloads and caches the candles of one pair/timeframe; see the module docstring."""
+
+    def __init__(self, exchange, pair, timeframe, directory, limit=MAX_LIMIT, workers=4, retries=3):
+        self.exchange = exchange
+        self.pair = pair
+        self.timeframe = timeframe
+        self.step = timeframe_ms(timeframe)
+        self.directory = directory
+        self.limit = min(limit, MAX_LIMIT)
+        self.workers = workers
+        self.retries = retries
+        self.path = cache_path(directory, pair, timeframe)
+        self.manifest_path = self.path[:-4] + ".json"
+        # ccxt's rateLimit is the minimum number of milliseconds between requests
+        self.limiter = RateLimiter(getattr(exchange, "rateLimit", 0) / 1000)
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            if os.path.exists(self.path):
+                os.truncate(self.path, 0)  # Candles without a manifest have unknown coverage
+            return {"pair": self.pair, "timeframe": self.timeframe, "start": None, "complete_until": None}
+        # The data file is appended before the manifest, so it may hold candles past complete_until;
+        # truncate to whole records and to the complete range so a resumed download cannot duplicate
+        if manifest.get("complete_until") is not None and os.path.exists(self.path):
+            ts = load_candles(self.directory, self.pair, self.timeframe)["ts"]
+            keep = int(np.searchsorted(ts, manifest["complete_until"]))
+            del ts  # Unmap before truncating
+            if keep * CANDLE.itemsize != os.path.getsize(self.path):
+                os.truncate(self.path, keep * CANDLE.itemsize)
+        return manifest
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def candles(self, since=None, until=None):
+        return load_candles(self.directory, self.pair, self.timeframe, since, until)
+
+    def sync(self, since, until=None):
+        """Makes the cache cover [since, until) in ms (until defaults to now); returns candles added."""
+        until = int(until if until is not None else time.time() * 1000)
+        since = int(since) - int(since) % self.step
+        until -= until % self.step  # The current candle is still open
+        start, complete = self.manifest["start"], self.manifest["complete_until"]
+        if start is None:
+            self.manifest["start"], self.manifest["complete_until"] = since, since
+            self._write_manifest()
+            return self._download(since, until, self.path)
+        added = 0
+        if since < start:
+            added += self._prepend(since, start)
+        if until > complete:
+            added += self._download(complete, until, self.path)
+        return added
+
+    def _prepend(self, since, start):
+        """Downloads [since, start) to a temporary file, appends the cached candles and swaps it in."""
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                        dir=self.directory)
+        os.close(fd)
+        try:
+            added = self._download(since, start, tmp_path, track=False)
+            with open(tmp_path, "ab") as out, open(self.path, "rb") as existing:
+                while block := existing.read(1 << 20):
+                    out.write(block)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.manifest["start"] = since
+        self._write_manifest()
+        return added
+
+    def _download(self, since, until, path, track=True):
+        span = self.step * self.limit
+        chunks = [(t, min(t + span, until)) for t in range(since, until, span)]
+        if not chunks:
+            return 0
+        added = 0
+        last_ts = self._last_ts(path)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ohlcv") as pool, \
+                open(path, "ab") as out:
+            # map() yields in submission order, so chunks are appended in time order; submitting a few
+            # batches' worth at a time bounds the pages held while an early chunk is still in flight
+            batch = self.workers * 4
+            fetched = (rows for i in range(0, len(chunks), batch)
+                       for rows in pool.map(self._fetch_chunk, chunks[i:i + batch]))
+            for (chunk_start, chunk_end), rows in zip(chunks, fetched):
+                block = _to_records(rows, chunk_start, chunk_end, last_ts)
+                if len(block):
+                    out.write(block.tobytes())
+                    out.flush()
+                    last_ts = int(block["ts"][-1])
+                    added += len(block)
+                if track:
+                    self.manifest["complete_until"] = chunk_end
+                    self._write_manifest()
+        logging.info(f"OHLCV {self.pair} {self.timeframe}: {added} candles in {len(chunks)} chunks "
+                     f"in {time.perf_counter() - started:.1f}s")
+        return added
+
+    def _fetch_chunk(self, chunk):
+        chunk_start, chunk_end = chunk
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            try:
+                return self.exchange.fetch_ohlcv(self.pair, self.timeframe, since=chunk_start,
+                                                 limit=(chunk_end - chunk_start) // self.step)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"fetch_ohlcv {self.pair} {self.timeframe} at {chunk_start} failed "
+                                f"({e}); retrying")
+                time.sleep(2 ** attempt)
+
+    @staticmethod
+    def _last_ts(path):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < CANDLE.itemsize:
+            return None
+        with open(path, "rb") as f:
+            f.seek(size - size % CANDLE.itemsize - CANDLE.itemsize)
+            return int(np.frombuffer(f.read(CANDLE.itemsize), dtype=CANDLE)["ts"][0])
+
+
+def _to_records(rows, chunk_start, chunk_end, last_ts):
+    """ccxt [[ts, o, h, l, c, v], ...] -> sorted, de-duplicated CANDLE records inside the chunk."""
+    if not rows:
+        return np.empty(0, dtype=CANDLE)
+    raw = np.array([row[:6] for row in rows], dtype=float)
+    raw = raw[np.argsort(raw[:, 0], kind="stable")]
+    ts = raw[:, 0].astype(np.int64)
+    keep = (ts >= chunk_start) & (ts < chunk_end) & np.r_[True, ts[1:] != ts[:-1]]
+    if last_ts is not None:
+        keep &= ts > last_ts
+    block = np.empty(int(keep.sum()), dtype=CANDLE)
+    block["ts"] = ts[keep]
+    for i, name in enumerate(("open", "high", "low", "close", "volume"), start=1):
+        block[name] = raw[keep, i]
+    return block
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pair", nargs="?", default="BTC/USDT")
+    parser.add_argument("timeframe", nargs="?", default="1m")
+    parser.add_argument("--days", type=float, default=7, help="history to cover, counted back from now")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from core import ExchangeSession, load_settings
+
+    settings = load_settings(require_credentials=False)
+    exchange = ExchangeSession(settings, load_markets=False).connect()
+    if exchange is None:
+        raise SystemExit(1)
+    cache = OhlcvCache(exchange, args.pair, args.timeframe, settings.path("ohlcv"), workers=args.workers)
+    now = int(time.time() * 1000)
+    added = cache.sync(now - int(args.days * 86_400_000), now)
+    candles = cache.candles()
+    print(f"{args.pair} {args.timeframe}: +{added} candles, {len(candles)} cached in {cache.path}")
+
+
+if __name__ == "__main__":
+    main()
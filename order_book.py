@@ -0,0 +1,316 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+
+import requests
+
+KUCOIN_BULLET_URL = "https://api.kucoin.com/api/v1/bullet-public"
+
+
+class SequenceGap(Exception):
+    """An incremental update does not follow the book's sequence; the book must be resynced."""
+
+
+class _BookSide:
+    """One side of the book as parallel sorted arrays of keys and sizes, best level first.
+
+    Bids are keyed by negated price so both sides sort ascending from the touch. Lookups are a
+    bisect (O(log n)); inserts and deletes shift the tail of a contiguous C array, which for the
+    few hundred levels of a spot book is far cheaper than a tree of Python objects.
+    """
+
+    __slots__ = ("sign", "keys", "sizes")
+
+    def __init__(self, sign):
+        self.sign = sign
+        self.keys = array("d")
+        self.sizes = array("d")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        del self.keys[:]
+        del self.sizes[:]
+
+    def update(self, price, size):
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        found = i < len(self.keys) and self.keys[i] == key
+        if size > 0:
+            if found:
+                self.sizes[i] = size
+            else:
+                self.keys.insert(i, key)
+                self.sizes.insert(i, size)
+        elif found:
+            del self.keys[i]
+            del self.sizes[i]
+
+    def trim(self, max_levels):
+        """Drops levels beyond `max_levels` from the far end."""
+        if len(self.keys) > max_levels:
+            del self.keys[max_levels:]
+            del self.sizes[max_levels:]
+
+    def price(self, i):
+        return self.sign * self.keys[i]
+
+    def levels(self, n=None):
+        n = len(self.keys) if n is None else min(n, len(self.keys))
+        return [(self.sign * self.keys[i], self.sizes[i]) for i in range(n)]
+
+
+class OrderBook:
+    """Local L2 order book maintained from a snapshot plus sequenced incremental updates.
+
+    `apply_snapshot` loads the book at a sequence number; `apply_changes` applies one exchange
+    update whose changes carry their own sequence numbers. Changes at or below the book's sequence
+    are ignored (they are already in the snapshot) and a jump past `sequence + 1` raises
+    `SequenceGap` so the owner can resync from a fresh snapshot.
+    """
+
+    def __init__(self, symbol, max_levels=500):
+        self.symbol = symbol
+        self.max_levels = max_levels
+        self.bids = _BookSide(-1)
+        self.asks = _BookSide(1)
+        self.sequence = None
+        self.updated_at = None
+        self.updates = 0
+
+    @property
+    def ready(self):
+        return self.sequence is not None and len(self.bids) > 0 and len(self.asks) > 0
+
+    def apply_snapshot(self, bids, asks, sequence):
+        self.bids.clear()
+        self.asks.clear()
+        for price, size, *_ in bids:
+            self.bids.update(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.update(float(price), float(size))
+        self.sequence = int(sequence)
+        self.updated_at = time.time()
+
+    def apply_changes(self, sequence_start, sequence_end, bids=(), asks=()):
+        """Applies one update; `bids`/`asks` are [price, size, sequence] rows (size 0 removes)."""
+        if self.sequence is None:
+            raise SequenceGap("No snapshot loaded")
+        if sequence_end <= self.sequence:
+            return False  # Entirely covered by the snapshot
+        if sequence_start > self.sequence + 1:
+            raise SequenceGap(f"Expected sequence {self.sequence + 1}, got {sequence_start}")
+        for side, rows in ((self.bids, bids), (self.asks, asks)):
+            for price, size, sequence in rows:
+                if int(sequence) > self.sequence:
+                    side.update(float(price), float(size))
+        self.sequence = int(sequence_end)
+        self.updated_at = time.time()
+        self.updates += 1
+        if len(self.bids) > 2 * self.max_levels or len(self.asks) > 2 * self.max_levels:
+            self.bids.trim(self.max_levels)
+            self.asks.trim(self.max_levels)
+        return True
+
+    # --- Derived prices ---
+    @property
+    def best_bid(self):
+        return self.bids.price(0) if len(self.bids) else None
+
+    @property
+    def best_ask(self):
+        return self.asks.price(0) if len(self.asks) else None
+
+    @property
+    def mid(self):
+        if not self.ready:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self):
+        return self.best_ask - self.best_bid if self.ready else None
+
+    @property
+    def spread_bps(self):
+        return self.spread / self.mid * 1e4 if self.ready else None
+
+    def microprice(self, levels=1):
+        """Size-weighted mid over the top `levels`: leans toward the side with less resting size."""
+        if not self.ready:
+            return None
+        n_bid, n_ask = min(levels, len(self.bids)), min(levels, len(self.asks))
+        bid_size = sum(self.bids.sizes[:n_bid])
+        ask_size = sum(self.asks.sizes[:n_ask])
+        if bid_size + ask_size == 0:
+            return self.mid
+        return (self.best_bid * ask_size + self.best_ask * bid_size) / (bid_size + ask_size)
+
+    def depth(self, side, levels=10):
+        """Total size resting on `side` ('bids'/'asks') within the top `levels`."""
+        book_side = self.bids if side == "bids" else self.asks
+        return sum(book_side.sizes[:levels])
+
+    def fill_estimate(self, side, amount):
+        """Walks the book for a market order of `amount` base on `side` ('buy' takes asks).
+
+        Returns {'average', 'worst', 'filled', 'impact_bps'}; 'filled' is below `amount` when the
+        local book is too shallow, and 'impact_bps' is the average price's distance from the mid.
+        """
+        book_side = self.asks if side == "buy" else self.bids
+        filled = cost = 0.0
+        worst = None
+        for i in range(len(book_side)):
+            take = min(amount - filled, book_side.sizes[i])
+            worst = book_side.price(i)
+            filled += take
+            cost += take * worst
+            if filled >= amount - 1e-12:
+                break
+        if not filled:
+            return {"average": None, "worst": None, "filled": 0.0, "impact_bps": None}
+        average = cost / filled
+        mid = self.mid
+        impact = abs(average - mid) / mid * 1e4 if mid else None
+        return {"average": average, "worst": worst, "filled": filled, "impact_bps": impact}
+
+    def top(self, levels=10):
+        return {"bids": self.bids.levels(levels), "asks": self.asks.levels(levels),
+                "sequence": self.sequence, "timestamp": self.updated_at}
+
+
+class KucoinBookFeed:
+    """Keeps an OrderBook in sync with KuCoin's public level2 websocket channel.
+
+    Follows KuCoin's procedure: subscribe, buffer updates, load a REST snapshot (`fetch_snapshot`,
+    e.g. ccxt `fetch_order_book(pair, 100)` whose 'nonce' is the sequence), then replay buffered
+    updates past the snapshot. A sequence gap or reconnect triggers the same resync. The socket
+    runs on its own daemon thread; readers use `quote()`, which copies what they need under the
+    lock, so the trading loop never sees a half-applied update.
+    """
+
+    def __init__(self, pair, fetch_snapshot, max_levels=500, stale_after=5.0):
+        self.pair = pair
+        self.topic = f"/market/level2:{pair.replace('/', '-')}"
+        self.fetch_snapshot = fetch_snapshot
+        self.stale_after = stale_after
+        self.book = OrderBook(pair, max_levels)
+        self.lock = threading.Lock()
+        self.resyncs = 0
+        self._buffer = []
+        self._syncing = True
+        self._resyncing = False
+        self._ws = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="order-book-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+
+    def quote(self, amount=None):
+        """Current book figures, or None while syncing or when no update arrived for `stale_after` s."""
+        with self.lock:
+            book = self.book
+            if self._syncing or not book.ready or time.time() - book.updated_at > self.stale_after:
+                return None
+            quote = {"bid": book.best_bid, "ask": book.best_ask, "mid": book.mid, "spread": book.spread,
+                     "spread_bps": book.spread_bps, "microprice": book.microprice(3),
+                     "bid_depth": book.depth("bids"), "ask_depth": book.depth("asks"),
+                     "sequence": book.sequence}
+            if amount:
+                quote["buy"] = book.fill_estimate("buy", amount)
+                quote["sell"] = book.fill_estimate("sell", amount)
+            return quote
+
+    # --- Websocket plumbing ---
+    def _run(self):
+        try:
+            import websocket  # websocket-client; only needed when the live feed is enabled
+        except ImportError:
+            logging.error("websocket-client is not installed; order book feed disabled.")
+            return
+        while not self._stop.is_set():
+            try:
+                bullet = requests.post(KUCOIN_BULLET_URL, timeout=10).json()["data"]
+                server = bullet["instanceServers"][0]
+                url = f"{server['endpoint']}?token={bullet['token']}&connectId={uuid.uuid4().hex}"
+                self._ws = websocket.WebSocketApp(url, on_open=self._on_open, on_message=self._on_message)
+                self._ws.run_forever(ping_interval=server["pingInterval"] / 1000,
+                                     ping_payload=json.dumps({"id": uuid.uuid4().hex, "type": "ping"}))
+            except Exception as e:
+                logging.error(f"Order book feed error: {e}")
+            with self.lock:
+                self._syncing = True
+            if not self._stop.is_set():
+                time.sleep(2)  # Reconnect backoff
+
+    def _on_open(self, ws):
+        with self.lock:
+            self._buffer = []
+            self._start_resync()
+        ws.send(json.dumps({"id": uuid.uuid4().hex, "type": "subscribe", "topic": self.topic,
+                            "privateChannel": False, "response": True}))
+
+    def _on_message(self, ws, message):
+        msg = json.loads(message)
+        if msg.get("type") != "message" or msg.get("topic") != self.topic:
+            return
+        data = msg["data"]
+        with self.lock:
+            if self._syncing:
+                self._buffer.append(data)
+                return
+            try:
+                self._apply(data)
+            except SequenceGap as e:
+                logging.warning(f"Order book {e}; resyncing")
+                self._buffer = [data]
+                self._start_resync()
+
+    def _apply(self, data):
+        changes = data["changes"]
+        self.book.apply_changes(data["sequenceStart"], data["sequenceEnd"],
+                                changes.get("bids", ()), changes.get("asks", ()))
+
+    def _start_resync(self):
+        """Called with the lock held; starts at most one resync thread."""
+        self._syncing = True
+        if not self._resyncing:
+            self._resyncing = True
+            threading.Thread(target=self._resync, daemon=True).start()
+
+    def _resync(self):
+        while not self._stop.is_set():
+            time.sleep(0.5)  # Let updates accumulate so the snapshot lands inside the buffered range
+            try:
+                snapshot = self.fetch_snapshot()
+            except Exception as e:
+                logging.error(f"Order book snapshot failed: {e}")
+                time.sleep(2)
+                continue
+            with self.lock:
+                self.book.apply_snapshot(snapshot["bids"], snapshot["asks"], snapshot["nonce"])
+                try:
+                    for data in self._buffer:
+                        self._apply(data)
+                except SequenceGap as e:
+                    logging.warning(f"Order book snapshot does not cover buffered updates ({e}); retrying")
+                    continue
+                self._buffer = []
+                self._syncing = False
+                self._resyncing = False
+                self.resyncs += 1
+            logging.info(f"Order book synced at sequence {self.book.sequence} (resync #{self.resyncs})")
+            return
+        self._resyncing = False
@@ -0,0 +1,214 @@
+"""Compact record types for the rows the bot and server hold many of: ticks, orders and transactions.
+
+A record is a class with `__slots__`: no per-instance dict, so a transaction costs its object
+header plus one pointer per field instead of a dict's hash table. Records read like the dicts
+they replace (`tx["price"]`, `tx.get("order_id")`, `dict(tx)`, `"seq" in tx`) so consumers are
+unchanged, and serialize through `to_dict()`; pass `json_default` as `default=` to json.dump(s)
+(the server's Flask JSON provider and the checkpoint writer do) to encode them anywhere in a
+payload.
+
+For bulk and columnar output there are two paths:
+
+- `columns(records)`: {field: [values]} with one pass per field, for JSON clients that plot or
+  aggregate whole columns.
+- `to_array(records)`: a NumPy structured array (`cls.DTYPE`, fixed-width fields sized to fit
+  the longest value). Its columns, `array["price"]`, are views into one buffer rather than
+  copies, and `array_columns` turns it back into JSON-ready lists.
+
+benchmarks/bench_records.py compares bytes per record for dicts, records and arrays at 1M rows.
+"""
+import sys
+from operator import attrgetter
+
+import numpy as np
+
+
+class Record:
+    """Base for slotted records; subclasses list their fields in `__slots__` and a `DTYPE`."""
+
+    __slots__ = ()
+    DTYPE = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(cls.__slots__)
+        cls._row = attrgetter(*cls.FIELDS)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, values):
+        """Builds a record from a mapping; missing fields are None and unknown keys are ignored."""
+        record = cls.__new__(cls)
+        for name in cls.FIELDS:
+            setattr(record, name, values.get(name))
+        return record
+
+    # --- Mapping-style access, so records stand in for the dicts they replace ---
+    def __getitem__(self, name):
+        if name not in self._field_set:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        if name not in self._field_set:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def __contains__(self, name):
+        return name in self._field_set
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in self._field_set else None
+        return default if value is None else value
+
+    def keys(self):
+        return self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_tuple() == other.to_tuple()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # Mutable, like the dicts they replace
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in zip(self.FIELDS, self.to_tuple()))})"
+
+    # --- Serialization ---
+    def to_tuple(self):
+        return self._row(self)
+
+    def to_dict(self):
+        return dict(zip(self.FIELDS, self._row(self)))
+
+    # Pickling without a __dict__ (the state socket and multiprocessing use it)
+    def __getstate__(self):
+        return self.to_tuple()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.FIELDS, state):
+            setattr(self, name, value)
+
+
+class Transaction(Record):
+    """One transaction_history.txt row; `seq` is assigned by the server's TransactionStore."""
+
+    __slots__ = ("timestamp", "type", "amount", "price", "total_value", "order_id", "seq")
+    DTYPE = np.dtype([("timestamp", "S19"), ("type", "S16"), ("amount", "<f8"), ("price", "<f8"),
+                      ("total_value", "<f8"), ("order_id", "S40"), ("seq", "<i8")])
+
+    def __init__(self, timestamp, type, amount, price, total_value, order_id, seq=None):
+        self.timestamp = timestamp
+        self.type = sys.intern(type)  # A handful of distinct types shared by every row
+        self.amount = amount
+        self.price = price
+        self.total_value = total_value
+        self.order_id = order_id
+        self.seq = seq
+
+    @classmethod
+    def from_dict(cls, values):
+        record = super().from_dict(values)
+        if isinstance(record.type, str):
+            record.type = sys.intern(record.type)
+        return record
+
+
+class Order(Record):
+    """An order in flight: submitted to `venue` but its fill not yet booked (bot.open_orders)."""
+
+    __slots__ = ("side", "amount", "trigger_price", "submitted_at", "venue")
+    DTYPE = np.dtype([("side", "S4"), ("amount", "<f8"), ("trigger_price", "<f8"), ("submitted_at", "<f8"),
+                      ("venue", "S16")])
+
+    def __init__(self, side, amount, trigger_price=None, submitted_at=None, venue=None):
+        self.side = side
+        self.amount = amount
+        self.trigger_price = trigger_price
+        self.submitted_at = submitted_at
+        self.venue = venue
+
+
+class Tick(Record):
+    """What a strategy sees each tick (Strategy.on_tick); the backtest refills a single one in place."""
+
+    __slots__ = ("ts", "price", "quote", "btc_balance", "usdt_balance", "trading_enabled")
+    DTYPE = np.dtype([("ts", "<f8"), ("price", "<f8"), ("btc_balance", "<f8"), ("usdt_balance", "<f8"),
+                      ("trading_enabled", "?")])
+
+    def __init__(self, ts=None, price=None, quote=None, btc_balance=None, usdt_balance=None, trading_enabled=True):
+        self.ts = ts
+        self.price = price
+        self.quote = quote
+        self.btc_balance = btc_balance
+        self.usdt_balance = usdt_balance
+        self.trading_enabled = trading_enabled
+
+
+MISSING_INT = -1  # Stands for None in integer array columns (sequence numbers start at 0)
+
+
+def json_default(obj):
+    """`default=` hook for json.dump(s): records as dicts, anything else unknown as str."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    return str(obj)
+
+
+def columns(records, fields=None):
+    """Column-oriented {field: [values]} for a list of records of one type."""
+    if not records:
+        return {name: [] for name in fields or ()}
+    fields = fields or type(records[0]).FIELDS
+    return {name: list(map(attrgetter(name), records)) for name in fields}
+
+
+def to_array(records, cls=None):
+    """Structured array of `cls.DTYPE` (the records' type by default).
+
+    Byte-string widths in DTYPE are minimums: each is widened to the longest value present, so
+    long types and reject reasons are kept whole. None becomes NaN for floats, MISSING_INT for
+    integers and b"" for strings; `array_columns` turns NaN and MISSING_INT back into None. Other
+    values in byte fields are stored as their str() (exchange and legacy order IDs may be ints).
+    """
+    cls = cls or (type(records[0]) if records else None)
+    if cls is None:
+        return np.empty(0)
+    dtype = cls.DTYPE
+    defaults = [np.nan if dtype[name].kind == "f" else MISSING_INT if dtype[name].kind in "iu" else
+                False if dtype[name].kind == "b" else b"" for name in dtype.names]
+    text = [dtype[name].kind == "S" for name in dtype.names]
+    getter = attrgetter(*dtype.names)
+    rows = [tuple(d if v is None else (v if isinstance(v, bytes) else str(v).encode()) if t else v
+                  for v, d, t in zip(getter(r), defaults, text))
+            for r in records]
+    widths = {name: max(dtype[name].itemsize, max((len(row[i]) for row in rows), default=0))
+              for i, name in enumerate(dtype.names) if dtype[name].kind == "S"}
+    if widths:
+        dtype = np.dtype([(name, f"S{widths[name]}" if name in widths else dtype[name]) for name in dtype.names])
+    return np.array(rows, dtype=dtype)
+
+
+def array_columns(array):
+    """JSON-ready {field: [values]} from a structured array, decoding the byte fields; NaN / MISSING_INT are None."""
+    out = {}
+    for name in array.dtype.names:
+        column = array[name]  # A view: no copy until tolist()
+        kind = column.dtype.kind
+        if kind == "S":
+            out[name] = np.char.decode(column, "utf-8").tolist()
+        elif kind == "f" and np.isnan(column).any():
+            out[name] = [None if v != v else v for v in column.tolist()]
+        elif kind in "iu" and (column == MISSING_INT).any():
+            out[name] = [None if v == MISSING_INT else v for v in column.tolist()]
+        else:
+            out[name] = column.tolist()
+    return out
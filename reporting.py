@@ -0,0 +1,291 @@
+import math
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+# Latency histogram: log-spaced bins, 4 per doubling from 1 ms up to ~65 s
+LATENCY_BINS_PER_DOUBLING = 4
+LATENCY_BINS = 16 * LATENCY_BINS_PER_DOUBLING + 1
+
+# Additive per-bucket counters kept as running prefix sums
+FIELDS = ("trades", "buys", "sells", "closing_trades", "wins", "slippage_bps", "fees", "realized_pnl", "notional")
+
+
+def latency_bin(latency_ms):
+    if latency_ms <= 1:
+        return 0
+    return min(LATENCY_BINS - 1, int(math.ceil(math.log2(latency_ms) * LATENCY_BINS_PER_DOUBLING)))
+
+
+def latency_bin_upper_ms(index):
+    return 2 ** (index / LATENCY_BINS_PER_DOUBLING)
+
+
+class _DrawdownTree:
+    """Segment tree of (max, min, max_drawdown) per bucket; O(log n) append, update and range query.
+
+    Built from a list of leaves in O(n) when folding replaces old buckets.
+    """
+
+    EMPTY = (-math.inf, math.inf, 0.0)
+
+    def __init__(self, leaves=()):
+        leaves = list(leaves)
+        self.size = 1
+        while self.size < len(leaves):
+            self.size *= 2
+        self.count = len(leaves)
+        self.nodes = [self.EMPTY] * (2 * self.size)
+        self.nodes[self.size:self.size + self.count] = leaves
+        for i in range(self.size - 1, 0, -1):
+            self.nodes[i] = self.combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+
+    def leaves(self):
+        return self.nodes[self.size:self.size + self.count]
+
+    @staticmethod
+    def combine(left, right):
+        # A drawdown either lies inside one half or runs from the left peak to the right trough
+        return max(left[0], right[0]), min(left[1], right[1]), max(left[2], right[2], left[0] - right[1])
+
+    def append(self, value):
+        if self.count == self.size:
+            leaves = self.nodes[self.size:self.size + self.count]
+            self.size *= 2
+            self.nodes = [self.EMPTY] * (2 * self.size)
+            self.nodes[self.size:self.size + len(leaves)] = leaves
+            for i in range(self.size - 1, 0, -1):
+                self.nodes[i] = self.combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+        self.count += 1
+        self.set(self.count - 1, value)
+
+    def set(self, index, value):
+        i = index + self.size
+        self.nodes[i] = value
+        i //= 2
+        while i:
+            self.nodes[i] = self.combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+            i //= 2
+
+    def query(self, lo, hi):
+        """Combined value over leaves [lo, hi), in order."""
+        left, right = self.EMPTY, self.EMPTY
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                left = self.combine(left, self.nodes[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = self.combine(self.nodes[hi], right)
+            lo //= 2
+            hi //= 2
+        return self.combine(left, right)
+
+
+class ReportEngine:
+    """Incremental trading statistics over fixed time buckets.
+
+    Events are folded into the current bucket as they happen; each bucket stores running prefix
+    sums (and a cumulative latency histogram), so any window is answered with two bisections and
+    one subtraction, plus an O(log n) drawdown query, independent of how much history is held.
+
+    Buckets older than `retention` seconds are merged into `fold_seconds` buckets (whole periods,
+    about once per period), so memory grows by one bucket per fold period instead of one per
+    `bucket_seconds`. Windows reaching into that history are widened to whole fold periods.
+    """
+
+    def __init__(self, bucket_seconds=60, fold_seconds=3600, retention=7 * 86400):
+        if fold_seconds % bucket_seconds:
+            raise ValueError(f"fold_seconds ({fold_seconds}) must be a multiple of bucket_seconds ({bucket_seconds})")
+        self.bucket_seconds = bucket_seconds
+        self.fold_seconds = fold_seconds
+        self.retention = retention
+        self._folded = 0                         # Leading buckets that span fold_seconds
+        self._starts = []                        # Bucket start times (epoch seconds), ascending
+        self._prefix = {f: array('d') for f in FIELDS}  # Cumulative sums up to and including each bucket
+        self._latency = []                       # Cumulative latency histograms, shared until a bucket records one
+        self._equity = _DrawdownTree()
+        self._peak = -math.inf                   # Running peak/trough of the current bucket
+        self._trough = math.inf
+        self._bucket_dd = 0.0
+
+    def _bucket(self, ts):
+        """Index of the bucket for `ts`, opening a new one when time moves past the last bucket."""
+        start = ts - ts % self.bucket_seconds
+        if self._starts and start <= self._starts[-1]:
+            return len(self._starts) - 1  # Late events are folded into the newest bucket
+        self._fold(start)
+        self._starts.append(start)
+        for field in FIELDS:
+            values = self._prefix[field]
+            values.append(values[-1] if values else 0)
+        self._latency.append(self._latency[-1] if self._latency else array('l', [0] * LATENCY_BINS))
+        self._equity.append(_DrawdownTree.EMPTY)
+        self._peak, self._trough, self._bucket_dd = -math.inf, math.inf, 0.0
+        return len(self._starts) - 1
+
+    def _fold(self, now):
+        """Merges the buckets of fold periods that ended more than `retention` seconds before `now`."""
+        cutoff = now - self.retention
+        cutoff -= cutoff % self.fold_seconds
+        end = bisect_left(self._starts, cutoff, self._folded)
+        if end == self._folded:
+            return
+        # Each fold period becomes one bucket: cumulative values of its last bucket, combined drawdown
+        groups = []  # [period start, first index, last index]
+        for i in range(self._folded, end):
+            period = self._starts[i] - self._starts[i] % self.fold_seconds
+            if groups and groups[-1][0] == period:
+                groups[-1][2] = i
+            else:
+                groups.append([period, i, i])
+        head = self._folded
+        last = [g[2] for g in groups]
+        self._starts = self._starts[:head] + [g[0] for g in groups] + self._starts[end:]
+        for field in FIELDS:
+            values = self._prefix[field]
+            self._prefix[field] = values[:head] + array('d', (values[i] for i in last)) + values[end:]
+        self._latency = self._latency[:head] + [self._latency[i] for i in last] + self._latency[end:]
+        leaves = self._equity.leaves()
+        self._equity = _DrawdownTree(leaves[:head] + [self._equity.query(first, i + 1) for _, first, i in groups]
+                                     + leaves[end:])
+        self._folded = head + len(groups)
+
+    def __len__(self):
+        return len(self._starts)
+
+    # --- Events ---
+    def on_fill(self, ts, side, amount, price, trigger_price=None, fee=0.0, realized_pnl=0.0, latency_ms=None):
+        i = self._bucket(ts)
+        prefix = self._prefix
+        prefix["trades"][i] += 1
+        prefix["buys" if side.lower() == "buy" else "sells"][i] += 1
+        prefix["fees"][i] += fee
+        prefix["notional"][i] += amount * price
+        if realized_pnl:
+            prefix["closing_trades"][i] += 1
+            prefix["realized_pnl"][i] += realized_pnl
+            if realized_pnl > 0:
+                prefix["wins"][i] += 1
+        if trigger_price:
+            # Positive slippage is adverse: paid more on a buy or received less on a sell
+            direction = 1 if side.lower() == "buy" else -1
+            prefix["slippage_bps"][i] += direction * (price - trigger_price) / trigger_price * 1e4
+        if latency_ms is not None:
+            if i and self._latency[i] is self._latency[i - 1]:
+                self._latency[i] = array('l', self._latency[i])  # Copy-on-write
+            self._latency[i][latency_bin(latency_ms)] += 1
+
+    def on_equity(self, ts, equity):
+        i = self._bucket(ts)
+        if equity > self._peak:
+            self._peak = equity
+        if equity < self._trough:
+            self._trough = equity
+        self._bucket_dd = max(self._bucket_dd, self._peak - equity)
+        self._equity.set(i, (self._peak, self._trough, self._bucket_dd))
+
+    def rebuild(self, fills):
+        """Replays journaled fill records (see bot.record_fill)."""
+        for fill in fills:
+            ts = fill.get("ts")
+            if ts is None:
+                continue
+            self.on_fill(ts, str(fill["type"]), float(fill["amount"]), float(fill["price"]),
+                         fill.get("trigger_price"), float(fill.get("fee") or 0),
+                         float(fill.get("realized_pnl") or 0), fill.get("latency_ms"))
+            if fill.get("equity") is not None:
+                self.on_equity(ts, float(fill["equity"]))
+
+    # --- Queries ---
+    def report(self, start=None, end=None):
+        """Statistics for buckets ending after `start` and starting before `end` (epoch seconds, None = unbounded)."""
+        lo = 0 if start is None else self._first_after(start)
+        hi = len(self._starts) if end is None else bisect_left(self._starts, end)
+        totals = dict.fromkeys(FIELDS, 0)
+        histogram = [0] * LATENCY_BINS
+        max_drawdown = 0.0
+        if hi > lo:
+            for field in FIELDS:
+                values = self._prefix[field]
+                totals[field] = values[hi - 1] - (values[lo - 1] if lo else 0)
+            upper = self._latency[hi - 1]
+            lower = self._latency[lo - 1] if lo else None
+            histogram = [u - lower[b] for b, u in enumerate(upper)] if lower else list(upper)
+            max_drawdown = self._equity.query(lo, hi)[2]
+
+        trades = totals["trades"]
+        closing = totals["closing_trades"]
+        return {
+            "start": start,
+            "end": end,
+            "trades": int(trades),
+            "buys": int(totals["buys"]),
+            "sells": int(totals["sells"]),
+            "win_rate": totals["wins"] / closing if closing else None,
+            "avg_slippage_bps": totals["slippage_bps"] / trades if trades else None,
+            "fees": totals["fees"],
+            "realized_pnl": totals["realized_pnl"],
+            "notional": totals["notional"],
+            "max_drawdown": max_drawdown,
+            "latency_ms": {f"p{int(q * 100)}": self._percentile(histogram, q) for q in (0.5, 0.9, 0.99)},
+        }
+
+    def _first_after(self, ts):
+        """Index of the first bucket ending after `ts`."""
+        i = bisect_left(self._starts, ts - ts % self.fold_seconds, 0, self._folded)
+        if i < self._folded:
+            return i
+        return bisect_left(self._starts, ts - ts % self.bucket_seconds, self._folded)
+
+    @staticmethod
+    def _percentile(histogram, q):
+        total = sum(histogram)
+        if not total:
+            return None
+        threshold = q * total
+        running = 0
+        for index, count in enumerate(histogram):
+            running += count
+            if running >= threshold:
+                return round(latency_bin_upper_ms(index), 1)
+        return None
+
+
+def format_report(stats, title="PERIODIC TRADING REPORT"):
+    """Renders ReportEngine.report() output in the style of the summary report."""
+    def when(ts, default):
+        if ts is None:
+            return default
+        return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+    def fmt(value, spec, suffix=""):
+        return "N/A" if value is None else f"{value:{spec}}{suffix}"
+
+    latency = stats["latency_ms"]
+    win_rate = None if stats["win_rate"] is None else stats["win_rate"] * 100
+    return f"""
+-------------------------------------------------------------
+                  {title}
+-------------------------------------------------------------
+📅 **Window:** {when(stats['start'], 'beginning')} → {when(stats['end'], 'now')}
+-------------------------------------------------------------
+   - 🔁 Trades:          {stats['trades']} ({stats['buys']} buys / {stats['sells']} sells)
+   - 🏆 Win Rate:        {fmt(win_rate, '.1f', '%')}
+   - 🎯 Avg Slippage:    {fmt(stats['avg_slippage_bps'], '.2f', ' bps')} vs trigger price
+   - 💸 Fees:            {stats['fees']:.4f} USDT
+   - ✅ Realized P&L:    {stats['realized_pnl']:.4f} USDT
+   - 📦 Notional:        {stats['notional']:.2f} USDT
+   - 📉 Max Drawdown:    {stats['max_drawdown']:.4f} USDT
+   - ⏱️ Order Latency:   p50 {fmt(latency['p50'], '.1f', ' ms')} | p90 {fmt(latency['p90'], '.1f', ' ms')} | p99 {fmt(latency['p99'], '.1f', ' ms')}
+-------------------------------------------------------------
+"""
+
+
+def window_report(engine, seconds, now=None):
+    """Convenience wrapper: report for the trailing `seconds`."""
+    now = time.time() if now is None else now
+    return engine.report(now - seconds, now + 1)
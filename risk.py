@@ -0,0 +1,203 @@
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import date, datetime, timezone
+
+# Rejection reasons, as counted in metrics()
+KILL_SWITCH = "kill_switch"
+MAX_POSITION = "max_position"
+NOTIONAL_RATE = "notional_rate"
+ORDER_RATE = "order_rate"
+DAILY_LOSS = "daily_loss"
+
+
+class RiskEngine:
+    """Pre-trade limit checks evaluated from in-memory counters.
+
+    Every order is passed to `admit()`, which either counts it against the limits and returns
+    None, or returns the rejection reason and counts that instead. Limits left as None are off:
+
+    - max_position_btc: absolute position after the order
+    - max_notional_per_minute: USDT submitted over the trailing 60 s (one-second buckets)
+    - max_orders_per_second: orders over the trailing second (0 blocks every order)
+    - daily_loss_limit: USDT lost since the UTC day started, from the caller's net P&L
+    - kill switch: blocks everything until released
+
+    Orders that reduce the absolute position pass the position and daily-loss limits so the bot
+    can always flatten. All state is guarded by one lock, so the checks are safe from the trading
+    thread, Telegram handlers and Flask request threads alike.
+    """
+
+    WINDOW = 60  # Seconds covered by the notional limit
+
+    def __init__(self, max_position_btc=None, max_notional_per_minute=None, max_orders_per_second=None,
+                 daily_loss_limit=None, clock=time.time):
+        self.max_position_btc = max_position_btc
+        self.max_notional_per_minute = max_notional_per_minute
+        self.max_orders_per_second = max_orders_per_second
+        self.daily_loss_limit = daily_loss_limit
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self._buckets = array("d", bytes(8 * self.WINDOW))
+        self._bucket_second = int(clock())
+        self._notional = 0.0
+        self._recent_orders = deque(maxlen=max(max_orders_per_second or 1, 1))
+        self._day = None
+        self._day_ends_at = 0.0
+        self._day_start_pnl = 0.0
+        self._daily_pnl = 0.0
+
+        self.kill_switch = False
+        self.kill_reason = None
+        self.checks = 0
+        self.accepted = 0
+        self.rejections = {}
+        self._check_ns = 0
+
+    # --- Kill switch ---
+    def engage_kill_switch(self, reason="manual"):
+        with self.lock:
+            self.kill_switch = True
+            self.kill_reason = reason
+
+    def release_kill_switch(self):
+        with self.lock:
+            self.kill_switch = False
+            self.kill_reason = None
+
+    # --- Checks ---
+    def admit(self, side, amount, price, position=0.0, pnl=0.0):
+        """Checks one order (`amount` BTC at `price`) and books it if allowed.
+
+        `position` is the signed BTC position before the order and `pnl` the caller's cumulative
+        net P&L; both come from the accountant. Returns None or the rejection reason.
+        """
+        started = time.perf_counter_ns()
+        with self.lock:
+            now = self.clock()
+            reason = self._check(side, amount, price, position, pnl, now)
+            self.checks += 1
+            if reason is None:
+                self.accepted += 1
+                self._book(amount * price, now)
+            else:
+                self.rejections[reason] = self.rejections.get(reason, 0) + 1
+            self._check_ns += time.perf_counter_ns() - started
+        return reason
+
+    def mark(self, pnl):
+        """Updates the daily P&L from the accountant between orders, for metrics."""
+        with self.lock:
+            self._roll_day(pnl, self.clock())
+
+    def reject(self, reason):
+        """Counts a rejection decided outside the engine (e.g. insufficient balance)."""
+        with self.lock:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+
+    def _check(self, side, amount, price, position, pnl, now):
+        if self.kill_switch:
+            return KILL_SWITCH
+        after = position + (amount if side == "buy" else -amount)
+        reducing = abs(after) < abs(position)
+
+        self._roll_day(pnl, now)
+        if self.daily_loss_limit is not None and not reducing and self._daily_pnl <= -self.daily_loss_limit:
+            return DAILY_LOSS
+        if self.max_position_btc is not None and not reducing and abs(after) > self.max_position_btc:
+            return MAX_POSITION
+        if self.max_orders_per_second is not None:
+            recent = self._recent_orders
+            if self.max_orders_per_second <= 0 or (len(recent) == recent.maxlen and now - recent[0] < 1.0):
+                return ORDER_RATE
+        if self.max_notional_per_minute is not None:
+            self._expire(int(now))
+            if self._notional + amount * price > self.max_notional_per_minute:
+                return NOTIONAL_RATE
+        return None
+
+    def _book(self, notional, now):
+        second = int(now)
+        self._expire(second)
+        self._buckets[second % self.WINDOW] += notional
+        self._notional += notional
+        self._recent_orders.append(now)
+
+    def _expire(self, second):
+        """Drops notional older than the window; at most WINDOW buckets per call."""
+        if second <= self._bucket_second:
+            return
+        if second - self._bucket_second >= self.WINDOW:
+            for i in range(self.WINDOW):
+                self._buckets[i] = 0.0
+            self._notional = 0.0
+        else:
+            for s in range(self._bucket_second + 1, second + 1):
+                i = s % self.WINDOW
+                self._notional -= self._buckets[i]
+                self._buckets[i] = 0.0
+            self._notional = max(self._notional, 0.0)
+        self._bucket_second = second
+
+    def _roll_day(self, pnl, now):
+        if now >= self._day_ends_at:
+            day = datetime.fromtimestamp(now, timezone.utc).date()
+            if day != self._day:
+                self._day = day
+                self._day_start_pnl = pnl
+            self._day_ends_at = (now // 86400 + 1) * 86400  # Next UTC midnight
+        self._daily_pnl = pnl - self._day_start_pnl
+
+    # --- Metrics ---
+    def metrics(self):
+        with self.lock:
+            now = self.clock()
+            self._expire(int(now))
+            return {
+                "kill_switch": self.kill_switch,
+                "kill_reason": self.kill_reason,
+                "checks": self.checks,
+                "accepted": self.accepted,
+                "rejected": sum(self.rejections.values()),
+                "rejections": dict(self.rejections),
+                "notional_last_minute": round(self._notional, 4),
+                "orders_last_second": sum(1 for t in self._recent_orders if now - t < 1.0),
+                "daily_pnl": round(self._daily_pnl, 4),
+                "avg_check_us": round(self._check_ns / self.checks / 1000, 2) if self.checks else 0.0,
+            }
+
+    def state(self):
+        """Kill switch and daily baseline for checkpoints."""
+        with self.lock:
+            return {"kill_switch": self.kill_switch, "kill_reason": self.kill_reason,
+                    "day": self._day.isoformat() if self._day else None, "day_start_pnl": self._day_start_pnl}
+
+    def restore(self, state):
+        with self.lock:
+            self.kill_switch = bool(state.get("kill_switch"))
+            self.kill_reason = state.get("kill_reason")
+            if state.get("day"):
+                self._day = date.fromisoformat(state["day"])
+                self._day_start_pnl = float(state.get("day_start_pnl") or 0.0)
+
+
+def limits_from_env(getenv, defaults=None, prefix="RISK_"):
+    """Reads RISK_MAX_POSITION_BTC, RISK_MAX_NOTIONAL_PER_MINUTE, RISK_MAX_ORDERS_PER_SECOND and
+    RISK_DAILY_LOSS_LIMIT into RiskEngine keyword arguments. `defaults` maps the same names
+    (without prefix) to values used when a variable is unset; an empty value turns a limit off."""
+    defaults = defaults or {}
+
+    def number(name, cast=float):
+        value = getenv(prefix + name)
+        if value is None:
+            value = defaults.get(name)
+        return cast(value) if value not in (None, "") else None
+
+    return {
+        "max_position_btc": number("MAX_POSITION_BTC"),
+        "max_notional_per_minute": number("MAX_NOTIONAL_PER_MINUTE"),
+        "max_orders_per_second": number("MAX_ORDERS_PER_SECOND", int),
+        "daily_loss_limit": number("DAILY_LOSS_LIMIT"),
+    }
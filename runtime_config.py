@@ -0,0 +1,252 @@
+"""Typed runtime configuration that can be changed while the bot runs.
+
+Values come from `PARAMS` defaults, then environment variables (the upper-case name), then a
+JSON file (BOT_CONFIG, default DATA_DIR/config.json). After startup, changes arrive from the
+file (picked up by `poll_file()` when its mtime changes) or from `update()` (the server's
+authenticated POST /config, relayed over the state socket). Either way a change is validated as
+a whole; a single bad value rejects all of it and nothing is half-applied.
+
+Validated changes are only staged. The trading loop calls `apply_pending()` between ticks,
+which swaps the new values in and runs the listeners on the trading thread, so a tick never
+sees a mix of old and new settings. Every applied or rejected change is appended to an audit
+log (JSON lines with the time, source and old -> new values).
+
+Applied changes that did not come from the file are written back to it (atomically, merged into
+its other keys), so they survive a restart; the write does not count as a file change. If the
+file was edited since the last poll, the next poll still stages it, now with the new values.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from checkpoint import atomic_write_json
+from schema import SchemaError, number
+
+
+class ConfigError(ValueError):
+    """A configuration change that failed validation; `errors` lists every problem."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class Param:
+    __slots__ = ("kind", "default", "minimum", "maximum", "doc")
+
+    def __init__(self, kind, default, minimum=None, maximum=None, doc=""):
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.doc = doc
+
+    def parse(self, name, value):
+        """Converts `value` (JSON or an environment string) to the parameter type; raises ValueError."""
+        if self.kind is dict:
+            if isinstance(value, str):
+                value = json.loads(value or "{}")
+            if not isinstance(value, dict):
+                raise ValueError(f"{name}: expected an object")
+            return value
+        value = number(value, name)
+        if value is None:
+            raise ValueError(f"{name}: a value is required")
+        if self.kind is int:
+            if value != int(value):
+                raise ValueError(f"{name}: expected an integer, got {value!r}")
+            value = int(value)
+        else:
+            value = float(value)
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{name}: {value} is below the minimum {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{name}: {value} is above the maximum {self.maximum}")
+        return value
+
+
+PARAMS = {
+    "trade_amount_usd": Param(float, 1.3, minimum=0.01, maximum=10_000, doc="Trade amount in USD"),
+    "min_btc_amount": Param(float, 0.00001, minimum=1e-8, maximum=1, doc="Minimum BTC amount for orders"),
+    "trade_cooldown": Param(float, 5.0, minimum=0, maximum=3600, doc="Seconds between trades"),
+    "summary_period": Param(float, 14400.0, minimum=60, maximum=7 * 86400,
+                            doc="Periodic summary report interval in seconds"),
+    "strategy_params": Param(dict, {}, doc="Numeric strategy attributes to override, e.g. "
+                                           '{"sell_pct": 0.2, "buy_pct": 0.1}'),
+}
+
+
+class RuntimeConfig:
+    """Current values plus staged changes; see the module docstring.
+
+    `validator(values)` may return a list of extra errors for a complete candidate configuration
+    (e.g. strategy attributes that do not exist). Listeners are called as `listener(changes)` with
+    {name: (old, new)} from `apply_pending()`.
+    """
+
+    def __init__(self, path=None, audit_path=None, params=PARAMS, getenv=os.getenv, validator=None,
+                 clock=time.time):
+        self.path = path
+        self.audit_path = audit_path
+        self.params = params
+        self.validator = validator
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.pending = {}
+        self.pending_sources = []
+        self.file_mtime = None
+        self.version = 0
+
+        values = {name: p.default for name, p in params.items()}
+        env = {name: getenv(name.upper()) for name in params if getenv(name.upper()) not in (None, "")}
+        self.values = self._validated(values, env)  # Bad environment values fail startup loudly
+        file_values = self._read_file()
+        if file_values:
+            try:
+                self.values = self._validated(self.values, file_values)
+            except ConfigError as e:
+                logging.error(f"Ignoring invalid config file {self.path}: {e}")
+                self._audit("file", {}, e.errors)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def snapshot(self):
+        with self.lock:
+            return {"version": self.version, "values": dict(self.values), "pending": dict(self.pending),
+                    "path": self.path}
+
+    # --- Changes ---
+    def update(self, changes, source="api"):
+        """Validates and stages `changes`; returns the staged values or raises ConfigError."""
+        with self.lock:
+            try:
+                candidate = self._validated({**self.values, **self.pending}, changes)
+            except ConfigError as e:
+                self._audit(source, {}, e.errors)
+                raise
+            staged = {name: candidate[name] for name in changes}
+            self.pending.update(staged)
+            self.pending_sources.append(source)
+        logging.info(f"Config change from {source} staged: {staged}")
+        return staged
+
+    def poll_file(self):
+        """Stages the config file's values when it changed since the last poll; returns True if staged."""
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.file_mtime:
+            return False
+        values = self._read_file()
+        if values is None:
+            return False
+        try:
+            self.update(values, source="file")
+        except ConfigError as e:
+            logging.error(f"Config file {self.path} rejected: {e}")
+            return False
+        return True
+
+    def apply_pending(self):
+        """Swaps staged values in and notifies listeners; call from the trading loop between ticks."""
+        with self.lock:
+            if not self.pending:
+                return {}
+            changes = {name: (self.values[name], value) for name, value in self.pending.items()
+                       if self.values[name] != value}
+            self.values = {**self.values, **self.pending}
+            source = ",".join(dict.fromkeys(self.pending_sources))
+            self.pending, self.pending_sources = {}, []
+            if changes:
+                self.version += 1
+        if changes:
+            for listener in self.listeners:
+                listener(changes)
+            self._audit(source, changes)
+            logging.info(f"Config v{self.version} applied from {source}: " +
+                         ", ".join(f"{name} {old!r} -> {new!r}" for name, (old, new) in changes.items()))
+            if source.split(",") != ["file"]:
+                self._save_file(changes)
+        return changes
+
+    # --- Internals ---
+    def _validated(self, values, changes):
+        errors = []
+        candidate = dict(values)
+        for name, value in changes.items():
+            param = self.params.get(name)
+            if param is None:
+                errors.append(f"{name}: unknown setting")
+                continue
+            try:
+                candidate[name] = param.parse(name, value)
+            except (ValueError, SchemaError) as e:
+                errors.append(str(e))
+        if not errors and self.validator:
+            errors = list(self.validator(candidate) or [])
+        if errors:
+            raise ConfigError(errors)
+        return candidate
+
+    def _read_file(self):
+        if not self.path:
+            return None
+        try:
+            self.file_mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.error(f"Config file {self.path} unreadable: {e}")
+            return None
+        if not isinstance(values, dict):
+            logging.error(f"Config file {self.path} must hold a JSON object")
+            return None
+        return values
+
+    def _save_file(self, changes):
+        """Merges the new values of `changes` into the config file."""
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        unpolled = mtime is not None and mtime != self.file_mtime
+        seen = self.file_mtime
+        values = self._read_file() if mtime is not None else {}
+        if values is None:
+            logging.error(f"Config change applied but not saved: {self.path} is not a valid config file")
+            return
+        values.update({name: new for name, (_, new) in changes.items()})
+        try:
+            atomic_write_json(self.path, values, indent=2)
+        except OSError as e:
+            logging.error(f"Config change applied but not saved to {self.path}: {e}")
+            return
+        # Our own write is not a change to stage; an edit made since the last poll still is
+        self.file_mtime = seen if unpolled else os.stat(self.path).st_mtime_ns
+
+    def _audit(self, source, changes, errors=None):
+        if not self.audit_path:
+            return
+        entry = {"time": datetime.fromtimestamp(self.clock(), tz=timezone.utc).isoformat(timespec="seconds"),
+                 "source": source, "version": self.version}
+        if errors:
+            entry["rejected"] = errors
+        else:
+            entry["changes"] = {name: {"old": old, "new": new} for name, (old, new) in changes.items()}
+        try:
+            with open(self.audit_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            logging.error(f"Config audit log error: {e}")
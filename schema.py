@@ -0,0 +1,122 @@
+"""Typed payloads exchanged between the bot, the server and the dashboard.
+
+Values travel as JSON numbers; units and display precision live here, once, instead of being
+baked into strings like "1234.56 USDT" that every hop has to parse again. The server validates
+each /update_data payload with `validate_update` and serves `UNITS` with /api/data so the
+dashboard can format without guessing.
+
+    {"schema": 2,
+     "price_data": {"bot_start_price": 88185.0, "current_price": 88190.1, "price_change": 0.0058},
+     "balances": {"btc_balance": 0.00123, "usdt_balance": 98.2, "btc_value": 108.47, "total_balance": 206.67},
+     "transactions": [{"timestamp": "...", "type": "BUY", "amount": 1.5e-05, "price": 88185.0,
+                       "total_value": 1.32, "order_id": "..."}],
+     "accounting": {...}, "risk": {...}, "latency": {...}}
+"""
+import math
+
+from records import Transaction
+
+SCHEMA_VERSION = 2
+
+
+class Field:
+    __slots__ = ("unit", "decimals")
+
+    def __init__(self, unit, decimals):
+        self.unit = unit
+        self.decimals = decimals
+
+    def to_dict(self):
+        return {"unit": self.unit, "decimals": self.decimals}
+
+
+PRICE_DATA = {
+    "bot_start_price": Field("USDT", 2),
+    "current_price": Field("USDT", 2),
+    "price_change": Field("%", 4),
+}
+BALANCES = {
+    "btc_balance": Field("BTC", 8),
+    "usdt_balance": Field("USDT", 4),
+    "btc_value": Field("USDT", 2),  # btc_balance at the current price
+    "total_balance": Field("USDT", 2),
+}
+TRANSACTION = {
+    "amount": Field("BTC", 8),
+    "price": Field("USDT", 2),
+    "total_value": Field("USDT", 4),
+}
+
+UNITS = {
+    "price_data": {name: f.to_dict() for name, f in PRICE_DATA.items()},
+    "balances": {name: f.to_dict() for name, f in BALANCES.items()},
+    "transactions": {name: f.to_dict() for name, f in TRANSACTION.items()},
+}
+
+
+class SchemaError(ValueError):
+    """A payload field that is not a finite number (or null) where one is required."""
+
+
+def number(value, field_name="value"):
+    """Validates one numeric field: int/float or a numeric string; None stays None (unknown)."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise SchemaError(f"{field_name}: expected a number, got {value!r}")
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise SchemaError(f"{field_name}: expected a number, got {value!r}") from None
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise SchemaError(f"{field_name}: expected a finite number, got {value!r}")
+    return value
+
+
+def validate_section(values, fields, section):
+    """Returns the known fields of `values` as numbers rounded to their precision."""
+    if not isinstance(values, dict):
+        raise SchemaError(f"{section}: expected an object")
+    out = {}
+    for name, f in fields.items():
+        if name in values:
+            value = number(values[name], f"{section}.{name}")
+            out[name] = None if value is None else round(value, f.decimals)
+    return out
+
+
+def validate_transaction(tx):
+    """A records.Transaction with numeric amount/price/total_value; fields it does not define are dropped."""
+    if not isinstance(tx, dict):
+        raise SchemaError("transactions: expected a list of objects")
+    out = dict(tx)
+    out.update(validate_section(tx, TRANSACTION, "transactions"))
+    return Transaction.from_dict(out)
+
+
+def validate_update(data):
+    """Validates a bot /update_data payload; returns the cleaned sections present in it.
+
+    Raises SchemaError naming the first offending field, so a malformed payload is rejected as a
+    whole rather than half-applied.
+    """
+    if not isinstance(data, dict):
+        raise SchemaError("payload: expected an object")
+    if data.get("schema", SCHEMA_VERSION) != SCHEMA_VERSION:
+        raise SchemaError(f"schema: expected version {SCHEMA_VERSION}, got {data.get('schema')!r}")
+    out = {}
+    if "price_data" in data:
+        out["price_data"] = validate_section(data["price_data"], PRICE_DATA, "price_data")
+    if "balances" in data:
+        out["balances"] = validate_section(data["balances"], BALANCES, "balances")
+    for key in ("accounting", "risk", "latency"):
+        if key in data:
+            if not isinstance(data[key], dict):
+                raise SchemaError(f"{key}: expected an object")
+            out[key] = data[key]
+    transactions = data.get("transactions") or []
+    if not isinstance(transactions, list):
+        raise SchemaError("transactions: expected a list")
+    out["transactions"] = [validate_transaction(tx) for tx in transactions]
+    return out
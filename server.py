@@ -1,28 +1,34 @@
 import logging
 import os
+import re
 import time
 import threading
 from datetime import datetime
 import json
 
-import ccxt
-from dotenv import load_dotenv
 from flask import Flask, request, jsonify, abort, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_httpauth import HTTPTokenAuth
 
+from archive import TransactionArchive
+from command_queue import CLAIMED, QUEUED, CommandQueue
+from core import TRANSACTION_LOG, ExchangeSession, load_settings, read_transaction_log, request_state
+from records import Record, Transaction, columns
+from risk import KILL_SWITCH, NOTIONAL_RATE, ORDER_RATE, RiskEngine, limits_from_env
+from schema import SCHEMA_VERSION, UNITS, SchemaError, number, validate_update
+from timeseries import TimeSeriesStore
+from transaction_store import TransactionStore
+
 auth = HTTPTokenAuth(scheme="Bearer")
 
 # Global variables
 last_update_time = time.time()
 bot_status_lock = threading.Lock()
-
-# Load environment variables
-load_dotenv(".env")
-
-# Define DATA_DIR here, then create the directory if needed
-DATA_DIR = os.getenv("DATA_DIR", "./data")
-os.makedirs(DATA_DIR, exist_ok=True)
+bot_health = {"state": None, "polled_at": None}  # Latest watchdog state from the bot's state socket
+HEALTH_POLL_INTERVAL = float(os.getenv("HEALTH_POLL_INTERVAL", 0.25))  # Seconds between health polls
+BOT_UNREACHABLE_AFTER = float(os.getenv("BOT_UNREACHABLE_AFTER", 1.0))  # Socket silence before the bot is inactive
+BOT_TIMEOUT = float(os.getenv("BOT_TIMEOUT", 10))  # Same, for a remote bot's HTTP pushes
 
 logging.basicConfig(
     level=logging.INFO,
@@ -30,27 +36,65 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]  # Only print logs to console
 )
 
+# Same environment files, DATA_DIR and credentials check as the bot (core.py)
+settings = load_settings()
+DATA_DIR = settings.data_dir
+
 # Initialize Flask app
+class RecordJSONProvider(DefaultJSONProvider):
+    """jsonify() encodes records.Record rows (e.g. stored transactions) like the dicts they replace."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+
 app = Flask(__name__, static_folder='static')
+app.json = RecordJSONProvider(app)
 CORS(app)
 
-# Load API credentials
-KUCOIN_API_KEY = os.getenv("KUCOIN_API_KEY")
-KUCOIN_API_SECRET = os.getenv("KUCOIN_API_SECRET")
-KUCOIN_API_PASSPHRASE = os.getenv("KUCOIN_API_PASSPHRASE")
-
-if not all([KUCOIN_API_KEY, KUCOIN_API_SECRET, KUCOIN_API_PASSPHRASE]):
-    logging.error("KuCoin API credentials are missing. Set them in the .env file.")
-    exit(1)
+KUCOIN_API_KEY = settings.api_key
 
 # Initialize live data
 live_data = {
-    "price_data": {"bot_start_price": "N/A", "current_price": "N/A", "price_change": "N/A"},
-    "balances": {"btc_balance": "N/A", "usdt_balance": "N/A", "total_balance": "N/A"},
-    "transactions": [],
+    # Numbers in the units of schema.py; None until the bot reports them
+    "price_data": {"bot_start_price": None, "current_price": None, "price_change": None},
+    "balances": {"btc_balance": None, "usdt_balance": None, "btc_value": None, "total_balance": None},
+    "accounting": {},
+    "risk": {},
+    "latency": {},  # Bot clock offset and per-stage order latency (clock.py)
     "bot_status": "inactive"
 }
 
+# Transactions kept in memory (ring buffer) and journaled to disk
+TRANSACTION_RETENTION = int(os.getenv("TRANSACTION_RETENTION", 10000))
+MAX_TRANSACTIONS_PAGE = 500
+# Rows rotated out of the bot's transaction log, in compressed monthly segments (archive.py)
+transaction_archive = TransactionArchive(os.path.join(DATA_DIR, "archive"))
+MAX_ARCHIVE_ROWS = 10000
+
+# Same RISK_* limits as the bot, applied to trades submitted through the API
+risk_engine = RiskEngine(**limits_from_env(os.getenv, {"MAX_ORDERS_PER_SECOND": 2, "MAX_NOTIONAL_PER_MINUTE": 100}))
+
+# Manual trades are queued for the bot to execute; unclaimed commands expire after COMMAND_MAX_AGE seconds
+command_queue = CommandQueue(max_age=float(os.getenv("COMMAND_MAX_AGE", 60)),
+                             claim_timeout=float(os.getenv("COMMAND_CLAIM_TIMEOUT", 30)))
+MAX_COMMAND_WAIT = 30
+IDEMPOTENCY_KEY = re.compile(r"[A-Za-z0-9_-]{1,64}")  # Keys become command IDs in the bot's ack URL
+
+# Price and total balance history from each /update_data push, in raw / 1 m / 1 h tiers for /api/series
+SERIES = {"price": ("price_data", "current_price"), "total_balance": ("balances", "total_balance")}
+SERIES_SAVE_INTERVAL = float(os.getenv("SERIES_SAVE_INTERVAL", 60))
+MAX_SERIES_POINTS = 2000
+series_store = TimeSeriesStore(SERIES, path=os.path.join(DATA_DIR, "timeseries.npz"))
+
+# Multi-account mode (supervisor.py): the primary account feeds live_data as before; the others'
+# pushes are kept per account and everything is aggregated by /api/accounts
+SUPERVISOR_STATE = os.getenv("SUPERVISOR_STATE") or os.path.join(DATA_DIR, "supervisor.json")
+account_updates = {}  # Latest validated sections pushed by each non-primary account
+
 def update_last_update_time():
     global last_update_time
     last_update_time = time.time()
@@ -101,91 +145,139 @@ def favicon():
 def home():
     return app.send_static_file('index.html')
 
-# Add the missing check_connection_status function
-def check_connection_status(exchange) -> str:
-    if exchange is None:
-        return "Disconnected"
-    try:
-        exchange.fetch_balance()
-        return "Connected"
-    except Exception as e:
-        logging.error(f"API connection error: {e}")
-        return "Disconnected"
+transaction_store = TransactionStore(TRANSACTION_RETENTION, os.path.join(DATA_DIR, "transactions.jsonl"),
+                                     record_type=Transaction)
+if len(transaction_store) == 0:
+    # First start: seed the store from the bot's transaction log
+    transaction_store.extend(read_transaction_log(os.path.join(DATA_DIR, TRANSACTION_LOG)))
 
-def get_transactions_from_file():
-    try:
-        with open(os.path.join(DATA_DIR, "transaction_history.txt"), "r", encoding="utf-8") as file:
-            lines = file.readlines()
-        transactions = []
-        for line in lines:
-            parts = line.strip().split(" | ")
-            if len(parts) == 6:  # Ensure the line has all expected parts
-                timestamp, type_, amount_str, price_str, total_str, order_id = parts
-                amount = amount_str.split(": ")[1].split()[0]  # e.g., "0.000015"
-                price = price_str.split(": ")[1].split()[0]  # e.g., "88185.00"
-                total_value = total_str.split(": ")[1].split()[0]  # e.g., "1.32"
-                transactions.append({
-                    "timestamp": timestamp,
-                    "type": type_,
-                    "amount": amount,
-                    "price": price,
-                    "total_value": total_value,
-                    "order_id": order_id.split(": ")[1]  # e.g., "12345"
-                })
-        return transactions
-    except FileNotFoundError:
-        logging.info("transaction_history.txt not found, starting with empty transactions.")
-        return []
-    except Exception as e:
-        logging.error(f"Error reading transaction file: {e}")
-        return []
+# Only used when the bot's state socket is unreachable (e.g. the bot runs on another host)
+exchange_session = ExchangeSession(settings, load_markets=False, status_ttl=30.0)
+connection_status = "Disconnected"
 
-def initialize_exchange():
+def refresh_from_bot():
+    """Pulls live state from the bot over its Unix socket; returns its exchange status, or None."""
+    state = request_state(settings.ipc_socket)
+    if state is None:
+        return None
     try:
-        exchange_instance = ccxt.kucoin({
-            'apiKey': KUCOIN_API_KEY,
-            'secret': KUCOIN_API_SECRET,
-            'password': KUCOIN_API_PASSPHRASE,
-        })
-        logging.info("Connected to KuCoin exchange.")
-        return exchange_instance
-    except Exception as e:
-        logging.error(f"Error connecting to KuCoin: {e}")
+        sections = validate_update(state)
+    except SchemaError as e:
+        logging.error(f"Rejected bot state: {e}")
         return None
-
-exchange_instance = None
-connection_status = "Disconnected"
+    with bot_status_lock:
+        for key in ('price_data', 'balances', 'accounting', 'risk', 'latency'):
+            if key in sections:
+                live_data[key] = sections[key]
+    return state.get("exchange_status")
 
 @app.route('/api/data', methods=['GET'])
 def get_data():
-    global exchange_instance, connection_status
+    global connection_status
     try:
-        if not exchange_instance or check_connection_status(exchange_instance) != "Connected":
-            exchange_instance = initialize_exchange()
-        if not exchange_instance:
-            connection_status = "Disconnected"
-            live_data["connection_status"] = connection_status
-        else:
-            exchange_connection_status = "Connected" if check_connection_status(
-                exchange_instance) == "Connected" else "Disconnected"
-            bot_status = live_data.get("bot_status", "inactive")
-            connection_status = "Connected" if exchange_connection_status == "Connected" and bot_status == "active" else "Disconnected"
-            live_data["connection_status"] = connection_status
+        # The bot's own exchange health and latest tick when it is local; otherwise one cached probe
+        exchange_connection_status = refresh_from_bot() or exchange_session.status()
+        bot_status = live_data.get("bot_status", "inactive")
+        connection_status = "Connected" if exchange_connection_status == "Connected" and bot_status == "active" else "Disconnected"
+        live_data["connection_status"] = connection_status
 
         # Convert datetime fields in live_data to strings
         if isinstance(live_data.get("timestamp"), datetime):
             live_data["timestamp"] = live_data["timestamp"].strftime('%Y-%m-%d %H:%M:%S')
 
-        # Load transactions from file into live_data
-        live_data["transactions"] = get_transactions_from_file()
-
         logging.info(f"Sending live data with connection status: {connection_status}")
-        return jsonify({"status": "success", "data": live_data}), 200
+        return jsonify({"status": "success", "data": build_live_payload()}), 200
     except Exception as e:
         logging.error(f"Error in /api/data endpoint: {str(e)}")
         connection_status = "Disconnected"
         live_data["connection_status"] = connection_status
-        return jsonify({"status": "success", "data": live_data}), 200
+        return jsonify({"status": "success", "data": build_live_payload()}), 200
+
+def build_live_payload():
+    """Constant-size dashboard payload; transaction rows are served by /api/transactions."""
+    with bot_status_lock:
+        payload = dict(live_data)
+    payload["transaction_summary"] = transaction_store.aggregates()
+    payload["schema"] = SCHEMA_VERSION
+    payload["units"] = UNITS
+    return payload
+
+def split_param(name):
+    value = request.args.get(name)
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+@app.route('/api/transactions', methods=['GET'])
+def get_transactions():
+    """Paginated transaction history, newest first.
+
+    Query parameters: type / exclude (comma-separated, e.g. BUY,SELL or FAILED), start / end
+    (timestamp or epoch seconds), cursor (next_cursor of the previous page), limit, and
+    format=columns for {field: [values]} instead of a list of rows.
+    """
+    try:
+        limit = min(int(request.args.get("limit", 50)), MAX_TRANSACTIONS_PAGE)
+        cursor = request.args.get("cursor")
+        cursor = int(cursor) if cursor not in (None, "") else None
+    except ValueError:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+    if limit <= 0:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+
+    start = request.args.get("start")
+    end = request.args.get("end")
+    transactions, next_cursor = transaction_store.query(
+        start=start, end=end, cursor=cursor, limit=limit,
+        types=split_param("type"), exclude=split_param("exclude"))
+    return jsonify({
+        "status": "success",
+        "data": {
+            "transactions": columns(transactions, Transaction.FIELDS)
+            if request.args.get("format") == "columns" else transactions,
+            "next_cursor": next_cursor,
+            "aggregates": transaction_store.aggregates(start=start, end=end),
+        },
+    }), 200
+
+@app.route('/api/archive', methods=['GET'])
+def get_archive():
+    """Index of the archived transaction segments (time range, counts and totals per month)."""
+    segments = transaction_archive.segments(request.args.get("start"), request.args.get("end"))
+    return jsonify({"status": "success", "data": {"segments": segments}}), 200
+
+@app.route('/api/archive/transactions', methods=['GET'])
+def get_archived_transactions():
+    """Archived transactions in [start, end), oldest first.
+
+    Same type / exclude / format parameters as /api/transactions; at most `limit` rows
+    (MAX_ARCHIVE_ROWS), with `truncated` set when more matched. Only the monthly segments
+    overlapping the range are decompressed.
+    """
+    try:
+        limit = min(int(request.args.get("limit", MAX_ARCHIVE_ROWS)), MAX_ARCHIVE_ROWS)
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    if limit <= 0:
+        return jsonify({"error": "Invalid limit"}), 400
+    transactions, read = transaction_archive.query(
+        start=request.args.get("start"), end=request.args.get("end"),
+        types=split_param("type"), exclude=split_param("exclude"), limit=limit + 1)
+    truncated = len(transactions) > limit
+    transactions = transactions[:limit]
+    return jsonify({
+        "status": "success",
+        "data": {
+            "transactions": columns(transactions, Transaction.FIELDS)
+            if request.args.get("format") == "columns" else transactions,
+            "truncated": truncated,
+            "segments_read": read,
+        },
+    }), 200
+
+@app.route('/api/archive/report', methods=['GET'])
+def get_archive_report():
+    """Counts, traded volume per side and realized P&L of the archived history in [start, end)."""
+    report = transaction_archive.report(request.args.get("start"), request.args.get("end"))
+    return jsonify({"status": "success", "data": report}), 200
 
 @app.route("/update_data", methods=["POST"])
 def update_data():
@@ -195,89 +287,322 @@ def update_data():
         data = request.json
         if not data:
             return jsonify({"error": "Invalid JSON format"}), 400
-
-        logging.info(f"Received data: {data}")
+        account = data.get("account") if isinstance(data, dict) else None
+        try:
+            data = validate_update(data)  # Numbers checked and rounded once, here
+        except SchemaError as e:
+            logging.error(f"Rejected update: {e}")
+            return jsonify({"error": f"Invalid payload: {e}"}), 400
+
+        accounts = supervisor_accounts()
+        if account and accounts and account != accounts[0]["name"]:
+            with bot_status_lock:
+                account_updates[account] = {**data, "updated_at": time.time()}
+            return jsonify({"status": "success", "account": account}), 200
 
         with bot_status_lock:
-            for key in ('price_data', 'balances', 'transactions'):
+            for key in ('price_data', 'balances', 'accounting', 'risk', 'latency'):
                 if key in data:
-                    if key == "transactions" and data[key]:
-                        # Avoid duplicating transactions
-                        existing_transactions = {tx['order_id'] for tx in live_data[key]}
-                        new_transactions = [tx for tx in data[key] if tx['order_id'] not in existing_transactions]
-                        live_data[key].extend(new_transactions)  # Append new transactions
-                    elif key != "transactions":
-                        live_data[key] = data[key]
-
-            if not data.get("transactions"):
-                logging.warning("Received empty or missing transactions data")
-
-        logging.info(f"Updated live data: {live_data}")
-        return jsonify({"status": "success", "updated_data": live_data}), 200
+                    live_data[key] = data[key]
+
+        series_store.record(time.time() * 1000, **{name: data.get(section, {}).get(field)
+                                                   for name, (section, field) in SERIES.items()})
+
+        # Duplicates are skipped via the store's order ID index
+        new_transactions = transaction_store.extend(data["transactions"])
+        if not data["transactions"]:
+            logging.warning("Received empty or missing transactions data")
+
+        logging.info(f"Updated live data: {len(new_transactions)} new transactions, {len(transaction_store)} retained")
+        return jsonify({"status": "success", "new_transactions": len(new_transactions)}), 200
     except Exception as e:
         logging.error(f"Error updating data: {str(e)}")
         return jsonify({"error": "Failed to update data"}), 500
 
 @app.route("/execute_trade", methods=["POST"])
 def execute_trade():
+    """Queues a manual trade for the bot, which executes it through its own order path.
+
+    JSON body: action ("buy"/"sell"), amount (BTC) or amount_usd, optional price (reference for
+    the funds and risk checks, defaults to the last price) and optional wait (seconds to block
+    for the fill, at most MAX_COMMAND_WAIT). An Idempotency-Key header (or idempotency_key field)
+    makes retries return the original command instead of trading twice; keys are 1-64 letters,
+    digits, '_' or '-'.
+    """
     authenticate()
     try:
         data = request.json
         if not data:
             return jsonify({"error": "Invalid JSON format"}), 400
-        action = data.get("action")
-        amount = data.get("amount")
-        price = data.get("price", "N/A")
-        total_value = data.get("total_value", "N/A")
-        timestamp = data.get("timestamp", "N/A")
-        if action not in ["buy", "sell"] or not isinstance(amount, (int, float)) or amount <= 0:
-            return jsonify({"error": "Invalid action or amount"}), 400
-
-        # Check for sufficient funds before executing trade
-        if action == "buy":
-            usdt_balance = float(live_data["balances"]["usdt_balance"].replace(" USDT", ""))
-            if usdt_balance < total_value:
-                return jsonify({"error": "Insufficient funds for buy transaction"}), 400
-        elif action == "sell":
-            btc_balance = float(live_data["balances"]["btc_balance"].replace(" BTC", ""))
-            if btc_balance < amount:
-                return jsonify({"error": "Insufficient funds for sell transaction"}), 400
-
-        transaction = {
-            "timestamp": timestamp,
-            "type": action,
-            "amount": amount,
-            "price": price,
-            "total_value": total_value
-        }
-        # Write to a transaction history file
-        file_path = os.path.join(DATA_DIR, "transaction_history.txt")
-        log_entry = f"{timestamp} | {action} | Amount: {amount} BTC | Price: {price} USDT | Total: {total_value} USDT | Order ID: N/A\n"
-        with open(file_path, "a", encoding="utf-8") as file:
-            file.write(log_entry)
+        key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+        if key is not None and not (isinstance(key, str) and IDEMPOTENCY_KEY.fullmatch(key)):
+            return jsonify({"error": "Invalid idempotency key: 1-64 letters, digits, '_' or '-'"}), 400
+        if key and (existing := command_queue.get(key)):
+            return jsonify({"status": "duplicate", "command": existing}), 200
 
+        action = data.get("action")
+        amount_btc = data.get("amount")
+        amount_usd = data.get("amount_usd")
+        if action not in ("buy", "sell") or (amount_btc is None) == (amount_usd is None):
+            return jsonify({"error": "Invalid action, or not exactly one of amount / amount_usd"}), 400
+        try:
+            amount_btc = number(amount_btc, "amount")
+            amount_usd = number(amount_usd, "amount_usd")
+            price = number(data.get("price"), "price")
+            wait = number(data.get("wait"), "wait") or 0  # Parsed before queuing: a bad value must not trade
+        except SchemaError as e:
+            return jsonify({"error": f"Invalid payload: {e}"}), 400
+        if any(v is not None and v <= 0 for v in (amount_btc, amount_usd, price)):
+            return jsonify({"error": "Invalid amount or price"}), 400
+        if wait < 0:
+            return jsonify({"error": "Invalid wait"}), 400
         with bot_status_lock:
-            live_data["transactions"].append(transaction)
-        logging.info(f"Transaction added: {transaction}")
-        return jsonify({"status": "success", "message": f"Executed {action} of {amount} USDT"}), 200
+            balances = dict(live_data["balances"])
+            price = price or live_data["price_data"].get("current_price")
+        if not price:
+            return jsonify({"error": "No reference price available"}), 409
+        btc = amount_btc if amount_btc is not None else amount_usd / price
+
+        # Funds check against the balances the bot last reported (skipped while unknown)
+        usdt_balance, btc_balance = balances.get("usdt_balance"), balances.get("btc_balance")
+        if action == "buy" and usdt_balance is not None and usdt_balance < btc * price:
+            return jsonify({"error": "Insufficient funds for buy transaction"}), 400
+        if action == "sell" and btc_balance is not None and btc_balance < btc:
+            return jsonify({"error": "Insufficient funds for sell transaction"}), 400
+
+        # Pre-trade risk checks, with the bot's reported kill switch, position and P&L
+        rejection = check_trade_risk(action, btc, price)
+        if rejection:
+            status = 429 if rejection in (ORDER_RATE, NOTIONAL_RATE) else 403
+            return jsonify({"error": "Rejected by risk engine", "reason": rejection}), status
+
+        command, created = command_queue.submit(action, amount_btc=amount_btc, amount_usd=amount_usd,
+                                                price=price, key=key)
+        if not created:
+            return jsonify({"status": "duplicate", "command": command}), 200
+        logging.info(f"Trade command queued: {command['id']} {action} "
+                     f"{amount_btc if amount_btc is not None else amount_usd} {'BTC' if amount_btc is not None else 'USDT'}")
+
+        wait = min(wait, MAX_COMMAND_WAIT)
+        if wait > 0:
+            command = command_queue.wait(command["id"], wait)
+        finished = command["status"] not in (QUEUED, CLAIMED)
+        return jsonify({"status": command["status"], "command": command}), 200 if finished else 202
     except Exception as e:
         logging.error(f"Error executing trade: {str(e)}")
         return jsonify({"error": "Failed to execute trade"}), 500
 
+@app.route("/commands/claim", methods=["POST"])
+def claim_commands():
+    """Polled by the bot: hands out queued commands for execution."""
+    authenticate()
+    limit = (request.get_json(silent=True) or {}).get("limit", 1)
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    return jsonify({"status": "success", "commands": command_queue.claim(limit)}), 200
+
+@app.route("/commands/<command_id>/ack", methods=["POST"])
+def ack_command(command_id):
+    """The bot's outcome for a claimed command: {"status": "filled"|"failed"|"rejected", "result": {...}}."""
+    authenticate()
+    data = request.json or {}
+    try:
+        command = command_queue.ack(command_id, data.get("status"), data.get("result"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if command is None:
+        return jsonify({"error": "Unknown command"}), 404
+    logging.info(f"Trade command {command_id} {command['status']} "
+                 f"(queue {command.get('queue_ms')} ms, end to end {command.get('end_to_end_ms')} ms)")
+    return jsonify({"status": "success", "command": command}), 200
+
+@app.route("/api/commands", methods=["GET"])
+def get_commands():
+    return jsonify({"status": "success", "data": {"commands": command_queue.recent(),
+                                                  "metrics": command_queue.metrics()}}), 200
+
+@app.route("/api/commands/<command_id>", methods=["GET"])
+def get_command(command_id):
+    command = command_queue.get(command_id)
+    if command is None:
+        return jsonify({"error": "Unknown command"}), 404
+    return jsonify({"status": "success", "data": command}), 200
+
+def check_trade_risk(action, amount, price):
+    with bot_status_lock:
+        bot_risk = dict(live_data["risk"])
+        accounting = dict(live_data["accounting"])
+    if bot_risk.get("kill_switch"):
+        risk_engine.reject(KILL_SWITCH)
+        return KILL_SWITCH
+    return risk_engine.admit(action, amount, price, accounting.get("position_btc") or 0.0,
+                             accounting.get("net_pnl") or 0.0)
+
+@app.route("/api/risk", methods=["GET"])
+def get_risk():
+    """Server-side risk metrics next to the bot's latest reported ones."""
+    with bot_status_lock:
+        bot_risk = dict(live_data["risk"])
+    return jsonify({"status": "success", "data": {"server": risk_engine.metrics(), "bot": bot_risk}}), 200
+
+def supervisor_accounts():
+    """Worker entries from supervisor.py's state file, primary first; [] in single-account mode."""
+    try:
+        with open(SUPERVISOR_STATE, "r", encoding="utf-8") as f:
+            return json.load(f).get("accounts") or []
+    except (OSError, ValueError):
+        return []
+
+@app.route("/api/accounts", methods=["GET"])
+def get_accounts():
+    """Every account's latest state (from its state socket, else its last push) plus totals."""
+    accounts = supervisor_accounts()
+    if not accounts:
+        with bot_status_lock:
+            single = {key: live_data[key] for key in ('price_data', 'balances', 'accounting')}
+        rows = [{"name": "default", "status": live_data.get("bot_status"), **single}]
+    else:
+        rows = []
+        for worker in accounts:
+            state = request_state(worker["ipc_socket"])
+            try:
+                sections = validate_update(state) if state is not None else None
+            except SchemaError as e:
+                logging.error(f"Rejected state of account {worker['name']}: {e}")
+                sections = None
+            if sections is None:
+                with bot_status_lock:
+                    sections = account_updates.get(worker["name"], {})
+            rows.append({"name": worker["name"], "status": worker["status"], "restarts": worker["restarts"],
+                         "reachable": state is not None,
+                         **{key: sections.get(key, {}) for key in ('price_data', 'balances', 'accounting')}})
+    totals = {}
+    for section, field in (("balances", "btc_balance"), ("balances", "usdt_balance"),
+                           ("balances", "total_balance"), ("accounting", "net_pnl")):
+        values = [row[section].get(field) for row in rows if row[section].get(field) is not None]
+        totals[field] = sum(values) if values else None
+    return jsonify({"status": "success", "data": {"accounts": rows, "totals": totals}}), 200
+
+@app.route("/config", methods=["POST"])
+def update_config():
+    """Stages runtime config changes in the bot ({"setting": value, ...}); applied between ticks
+    and saved to the bot's config file (BOT_CONFIG) so they survive a restart."""
+    authenticate()
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, dict) or not changes:
+        return jsonify({"error": "Expected a JSON object of settings"}), 400
+    result = request_state(settings.ipc_socket, "config_update", timeout=2.0,
+                           params={"changes": changes, "source": f"server:{request.remote_addr}"})
+    if result is None:
+        return jsonify({"error": "Bot is not reachable over the state socket"}), 503
+    if result.get("errors"):
+        return jsonify({"error": "Invalid config", "errors": result["errors"]}), 400
+    logging.info(f"Config change staged in the bot: {result['staged']}")
+    return jsonify({"status": "staged", **result}), 202
+
+@app.route("/api/config", methods=["GET"])
+def get_config():
+    """The bot's current runtime config and any changes waiting for the next tick."""
+    config = request_state(settings.ipc_socket, "config")
+    if config is None:
+        return jsonify({"error": "Bot is not reachable over the state socket"}), 503
+    return jsonify({"status": "success", "data": config}), 200
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Loop liveness from the bot's watchdog: status, mark ages, queue depths and open breaches.
+
+    503 when the loop is stalled or the bot has not answered a health check within
+    BOT_UNREACHABLE_AFTER seconds, so load balancers and uptime monitors can use it directly.
+    """
+    with bot_status_lock:
+        state = bot_health["state"]
+        polled_at = bot_health["polled_at"]
+        bot_status = live_data["bot_status"]
+    stale = polled_at is None or time.time() - polled_at > BOT_UNREACHABLE_AFTER
+    if state is None or stale:
+        status = "unreachable"
+        body = {"status": status, "bot_status": bot_status,
+                "last_seen_ms_ago": None if polled_at is None else round((time.time() - polled_at) * 1000, 1)}
+    else:
+        status = state["status"]
+        body = {"bot_status": bot_status, **state}
+    return jsonify(body), 503 if status in ("stalled", "unreachable") else 200
+
+@app.route('/api/series', methods=['GET'])
+def get_series():
+    """Downsampled history for charts.
+
+    Query parameters: name (comma-separated, default all of SERIES), start / end (epoch ms,
+    default the last 24 h) and points (rows per series, at most MAX_SERIES_POINTS). Rows are
+    [t, min, max, last] so spikes survive downsampling.
+    """
+    try:
+        end = int(request.args.get("end") or time.time() * 1000)
+        start = int(request.args.get("start") or end - 86_400_000)
+        points = min(int(request.args.get("points", 500)), MAX_SERIES_POINTS)
+    except ValueError:
+        return jsonify({"error": "Invalid start, end or points"}), 400
+    names = split_param("name") or list(SERIES)
+    unknown = [n for n in names if n not in SERIES]
+    if unknown or points <= 0 or start >= end:
+        return jsonify({"error": f"Invalid series or range (available: {', '.join(SERIES)})"}), 400
+    series = {}
+    for name in names:
+        series[name] = series_store.query(name, start, end, points)
+        section, field = SERIES[name]
+        series[name]["unit"] = UNITS[section][field]
+    return jsonify({"status": "success", "data": {"start": start, "end": end, "series": series}}), 200
+
+def save_series_periodically():
+    while True:
+        time.sleep(SERIES_SAVE_INTERVAL)
+        try:
+            series_store.save()
+        except Exception as e:
+            logging.error(f"Error saving time series: {e}")
+
+threading.Thread(target=save_series_periodically, daemon=True).start()
+
+def poll_bot_health():
+    """Fetches the bot's watchdog state over its state socket; returns it, or None if unreachable."""
+    state = request_state(settings.ipc_socket, "health", timeout=HEALTH_POLL_INTERVAL)
+    now = time.time()
+    with bot_status_lock:
+        if state is not None:
+            bot_health.update(state=state, polled_at=now)
+        elif bot_health["state"] is not None:
+            bot_health["state"] = None
+            logging.warning("Bot state socket stopped answering health checks")
+    return state
+
 def check_bot_status():
-    global last_update_time, live_data
+    """Marks the bot inactive once it stops responding.
+
+    A local bot is polled over its state socket every HEALTH_POLL_INTERVAL seconds and counts as
+    gone BOT_UNREACHABLE_AFTER seconds after its last answer; a bot that was never reachable
+    that way (e.g. on another host) is judged by its HTTP pushes, with BOT_TIMEOUT.
+    """
+    global last_update_time
     while True:
+        state = poll_bot_health()
         current_time = time.time()
-        if current_time - last_update_time > 10:
-            with bot_status_lock:
-                if live_data["bot_status"] != "inactive":
-                    live_data["bot_status"] = "inactive"
-                    logging.info(
-                        f"Bot status set to 'inactive' due to inactivity (last update: {time.ctime(last_update_time)})")
-        time.sleep(10)
+        with bot_status_lock:
+            if state is not None:
+                last_update_time = current_time
+                if live_data["bot_status"] != "active":
+                    live_data["bot_status"] = "active"
+                    logging.info("Bot status set to 'active' (state socket answering)")
+            polled_at = bot_health["polled_at"]
+            timeout = BOT_TIMEOUT if polled_at is None else BOT_UNREACHABLE_AFTER
+            if current_time - last_update_time > timeout and live_data["bot_status"] != "inactive":
+                live_data["bot_status"] = "inactive"
+                logging.info(
+                    f"Bot status set to 'inactive' due to inactivity (last update: {time.ctime(last_update_time)})")
+        time.sleep(HEALTH_POLL_INTERVAL)
 
 threading.Thread(target=check_bot_status, daemon=True).start()
 
 if __name__ == "__main__":
-    PORT = int(os.getenv("PORT", 5000))
+    PORT = int(settings.server_port)
     app.run(host="0.0.0.0", port=PORT, debug=False)
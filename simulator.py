@@ -0,0 +1,209 @@
+import itertools
+import math
+import random
+
+try:
+    import ccxt
+    OrderImmediatelyFillable = ccxt.OrderImmediatelyFillable
+    OrderNotFound = ccxt.OrderNotFound
+except ImportError:  # Keeps the simulator usable for offline benchmarks without ccxt
+    class OrderImmediatelyFillable(Exception):
+        pass
+
+    class OrderNotFound(Exception):
+        pass
+
+
+class SimulatedExchange:
+    """In-process stand-in for the ccxt KuCoin client, with a synthetic order book on a virtual clock.
+
+    The mid price follows a random walk advanced by `sleep()`/`advance()`. Market orders walk the
+    book and pay the taker fee; limit orders rest until the market trades through them (or, while
+    at the touch, fill with `fill_probability` per step to model queue position) and pay the maker
+    fee. Only the subset of the ccxt API used by the bot is implemented.
+    """
+
+    STEP = 0.1  # Seconds of virtual time per simulation step
+
+    def __init__(self, symbol="BTC/USDT", mid=100_000.0, spread=1.0, tick=0.1, levels=20, level_size=0.05,
+                 volatility_bps=0.3, maker_fee=0.0008, taker_fee=0.001, fill_probability=0.05,
+                 balances=None, seed=None, start_time=1_700_000_000.0):
+        self.symbol = symbol
+        self.base, self.quote = symbol.split("/")
+        self.mid = mid
+        self.spread = spread
+        self.tick = tick
+        self.levels = levels
+        self.level_size = level_size
+        self.volatility = volatility_bps / 1e4
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.fill_probability = fill_probability
+        self.rng = random.Random(seed)
+        self.clock = start_time
+        self.sequence = 0
+        self.balances = dict(balances or {self.base: 1.0, self.quote: 100_000.0})
+        self.orders = {}
+        self._ids = itertools.count(1)
+        self.rateLimit = 0
+
+    # --- Market dynamics ---
+    def advance(self, seconds):
+        steps = max(1, int(round(seconds / self.STEP)))
+        for _ in range(steps):
+            self.clock += self.STEP
+            self.mid *= math.exp(self.rng.gauss(0, self.volatility))
+            self.sequence += 1
+            self._match_resting()
+
+    def sleep(self, seconds):
+        """Drop-in for time.sleep that advances virtual time instead of waiting."""
+        self.advance(seconds)
+
+    def monotonic(self):
+        return self.clock
+
+    def best_bid(self):
+        return math.floor((self.mid - self.spread / 2) / self.tick) * self.tick
+
+    def best_ask(self):
+        return self.best_bid() + max(self.tick, round(self.spread / self.tick) * self.tick)
+
+    def _match_resting(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        for order in list(self.orders.values()):
+            if order["status"] != "open" or order["type"] != "limit":
+                continue
+            price = order["price"]
+            if order["side"] == "buy":
+                crossed, at_touch = ask <= price, price >= bid - 1e-9
+            else:
+                crossed, at_touch = bid >= price, price <= ask + 1e-9
+            if crossed:
+                self._fill(order, order["remaining"], price, self.maker_fee)
+            elif at_touch and self.rng.random() < self.fill_probability:
+                qty = order["remaining"] * self.rng.choice((0.25, 0.5, 1.0))
+                self._fill(order, qty, price, self.maker_fee)
+
+    # --- ccxt-like API ---
+    def load_markets(self):
+        return {self.symbol: {"symbol": self.symbol, "precision": {"price": self.tick, "amount": 1e-8}}}
+
+    def fetch_time(self):
+        return int(self.clock * 1000)
+
+    def fetch_ticker(self, symbol):
+        return {"symbol": symbol, "last": self.mid, "bid": self.best_bid(), "ask": self.best_ask(),
+                "timestamp": int(self.clock * 1000)}
+
+    def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        """Synthetic candles up to the virtual clock; each candle depends only on its timestamp."""
+        step = {"m": 60, "h": 3600, "d": 86400}[timeframe[-1]] * int(timeframe[:-1]) * 1000
+        now = int(self.clock * 1000) // step * step
+        limit = min(limit or 500, 1500)
+        since = now - limit * step if since is None else -(-since // step) * step
+        candles = []
+        for ts in range(since, min(since + limit * step, now), step):
+            rng = random.Random(ts)
+            base = self.mid * (1 + 0.01 * math.sin(ts / step / 720))
+            prices = [base * (1 + rng.gauss(0, 5e-4)) for _ in range(4)]
+            candles.append([ts, prices[0], max(prices), min(prices), prices[-1], rng.random()])
+        return candles
+
+    def fetch_order_book(self, symbol, limit=None):
+        depth = min(limit or self.levels, self.levels)
+        bid, ask = self.best_bid(), self.best_ask()
+        sizes = [self.level_size * (1 + 0.5 * i) for i in range(depth)]
+        return {
+            "symbol": symbol,
+            "bids": [[round(bid - i * self.tick, 8), sizes[i]] for i in range(depth)],
+            "asks": [[round(ask + i * self.tick, 8), sizes[i]] for i in range(depth)],
+            "timestamp": int(self.clock * 1000),
+            "nonce": self.sequence,
+        }
+
+    def fetch_balance(self, params=None):
+        result = {}
+        for currency, free in self.balances.items():
+            used = sum(o["remaining"] * (1 if currency == self.base else o["price"])
+                       for o in self.orders.values()
+                       if o["status"] == "open" and (o["side"] == "sell") == (currency == self.base))
+            result[currency] = {"free": free - used, "used": used, "total": free}
+        return result
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        params = params or {}
+        order = {
+            "id": str(next(self._ids)), "symbol": symbol, "type": type, "side": side, "price": price,
+            "amount": amount, "filled": 0.0, "remaining": amount, "cost": 0.0, "average": None,
+            "status": "open", "timestamp": int(self.clock * 1000),
+            "fee": {"cost": 0.0, "currency": self.quote},
+        }
+        if type == "market":
+            self.orders[order["id"]] = order
+            self._fill_market(order)
+            return dict(order)
+        crosses = (side == "buy" and price >= self.best_ask()) or (side == "sell" and price <= self.best_bid())
+        if crosses and params.get("postOnly"):
+            raise OrderImmediatelyFillable(f"Post-only {side} at {price} would take liquidity")
+        self.orders[order["id"]] = order
+        if crosses:
+            self._fill_market(order, limit_price=price)
+        return dict(order)
+
+    def create_market_buy_order(self, symbol, amount, params=None):
+        return self.create_order(symbol, "market", "buy", amount, None, params)
+
+    def create_market_sell_order(self, symbol, amount, params=None):
+        return self.create_order(symbol, "market", "sell", amount, None, params)
+
+    def create_limit_buy_order(self, symbol, amount, price, params=None):
+        return self.create_order(symbol, "limit", "buy", amount, price, params)
+
+    def create_limit_sell_order(self, symbol, amount, price, params=None):
+        return self.create_order(symbol, "limit", "sell", amount, price, params)
+
+    def fetch_order(self, id, symbol=None):
+        if id not in self.orders:
+            raise OrderNotFound(f"Order {id} not found")
+        return dict(self.orders[id])
+
+    def cancel_order(self, id, symbol=None):
+        order = self.orders.get(id)
+        if order is None:
+            raise OrderNotFound(f"Order {id} not found")
+        if order["status"] == "open":
+            order["status"] = "canceled"
+        return dict(order)
+
+    def fetch_open_orders(self, symbol=None):
+        return [dict(o) for o in self.orders.values() if o["status"] == "open"]
+
+    # --- Fills ---
+    def _fill_market(self, order, limit_price=None):
+        levels = self.fetch_order_book(self.symbol)["asks" if order["side"] == "buy" else "bids"]
+        for level_price, size in levels:
+            if order["remaining"] <= 1e-12:
+                break
+            if limit_price is not None and ((order["side"] == "buy" and level_price > limit_price) or
+                                            (order["side"] == "sell" and level_price < limit_price)):
+                break
+            self._fill(order, min(size, order["remaining"]), level_price, self.taker_fee)
+        if order["type"] == "market" and order["status"] == "open":
+            order["status"] = "closed"  # Unfilled remainder of a market order is dropped
+
+    def _fill(self, order, qty, price, fee_rate):
+        qty = min(qty, order["remaining"])
+        if qty <= 0:
+            return
+        order["filled"] += qty
+        order["remaining"] -= qty
+        order["cost"] += qty * price
+        order["average"] = order["cost"] / order["filled"]
+        order["fee"]["cost"] += qty * price * fee_rate
+        if order["remaining"] <= 1e-12:
+            order["remaining"] = 0.0
+            order["status"] = "closed"
+        sign = 1 if order["side"] == "buy" else -1
+        self.balances[self.base] = self.balances.get(self.base, 0.0) + sign * qty
+        self.balances[self.quote] = self.balances.get(self.quote, 0.0) - sign * qty * price - qty * price * fee_rate
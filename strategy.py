@@ -0,0 +1,258 @@
+"""Strategy plugin API for the trading loop.
+
+The bot builds a `records.Tick` every loop iteration and passes it to `on_tick`:
+
+    Tick(ts=epoch seconds, price=ticker last, quote=order book quote or None,
+         btc_balance=float, usdt_balance=float, trading_enabled=bool)
+
+Fields are read as attributes (`tick.price`); the backtest reuses one Tick for every tick, so
+strategies must not keep a reference to it.
+
+`quote` is `KucoinBookFeed.quote()` for one trade (bid/ask/mid/microprice plus 'buy'/'sell'
+fill estimates). `trading_enabled` is False during the trade cooldown or while paused; strategies
+should keep updating their indicators then but not ask for orders.
+
+`on_tick` returns None or a decision dict:
+
+    {"action": "buy", "amount_usd": float, "price": trigger price, "reason": str}
+    {"action": "sell", "amount_btc": float, "price": trigger price, "reason": str}
+    {"action": "reject", "type": "FAILED ...", "price": float, "reason": str, "cooldown": seconds}
+
+A reject is logged as a failed transaction with `type` and counted in the risk metrics; no new
+orders are placed for `cooldown` seconds while ticks keep flowing. `on_fill` receives every
+booked fill (the fill store record, including fills reconciled after a restart).
+`on_order_done(order)` follows every buy/sell decision once the bot is done with it, with the
+execution summary, or None when no order was placed (risk rejection, error). `on_timer` is
+called once per loop iteration with the time.
+"""
+import logging
+import math
+
+from indicators import RollingVolatility
+
+STRATEGIES = {}
+
+
+def register(name):
+    """Class decorator adding a strategy to the registry used by `create_strategy`."""
+    def decorator(cls):
+        STRATEGIES[name] = cls
+        cls.name = name
+        return cls
+    return decorator
+
+
+def create_strategy(name, **params):
+    try:
+        cls = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}; available: {sorted(STRATEGIES)}") from None
+    return cls(**params)
+
+
+class Strategy:
+    """Base class: override the hooks you need. `base_price` is shown on the dashboard and /status."""
+
+    name = "base"
+    base_price = None
+
+    def on_tick(self, tick):
+        return None
+
+    def on_fill(self, fill):
+        pass
+
+    def on_order_done(self, order):
+        pass
+
+    def on_timer(self, now):
+        pass
+
+    def reset(self):
+        """Forgets the reference price so the next tick re-anchors it."""
+        self.base_price = None
+
+    def state(self):
+        """JSON-serializable state for checkpoints."""
+        return {"base_price": self.base_price}
+
+    def restore(self, state, current_price):
+        """Restores checkpointed state; a base price too far from `current_price` is dropped."""
+        saved = state.get("base_price")
+        if saved and abs(current_price - saved) / saved * 100 <= getattr(self, "tolerance_pct", 0.5):
+            self.base_price = saved
+
+    def indicators(self):
+        """Current indicator values for logs and the dashboard."""
+        return {}
+
+    def warm_up(self, closes, interval, tick_interval=1.0):
+        """Seeds indicators from historical closes `interval` seconds apart; returns how many were used."""
+        return 0
+
+
+@register("threshold")
+class ThresholdStrategy(Strategy):
+    """Fixed percentage moves against a base price that re-anchors after every trade.
+
+    Sells `trade_amount_usd` worth when the executable sell price is `sell_pct` above the base,
+    buys when the executable buy price is `buy_pct` below it, and rejects ticks that moved more
+    than `tolerance_pct` from the base as slippage.
+    """
+
+    def __init__(self, trade_amount_usd=1.3, sell_pct=0.1, buy_pct=0.05, tolerance_pct=0.5,
+                 failure_cooldown=10, slippage_cooldown=5):
+        self.trade_amount_usd = trade_amount_usd
+        self.sell_pct = sell_pct
+        self.buy_pct = buy_pct
+        self.tolerance_pct = tolerance_pct
+        self.failure_cooldown = failure_cooldown
+        self.slippage_cooldown = slippage_cooldown
+        self.base_price = None
+        self._signal_price = None
+
+    def on_tick(self, tick):
+        price = tick.price
+        if self.base_price is None:
+            self.base_price = price
+            logging.info(f"Base price set to {price:.2f}")
+            return None
+
+        price_diff = abs(price - self.base_price) / self.base_price * 100
+        if price_diff > self.tolerance_pct:
+            return {"action": "reject", "type": "FAILED PRICE CHANGE", "price": price,
+                    "reason": f"Price change exceeded tolerance: {price_diff:.2f}%",
+                    "cooldown": self.slippage_cooldown}
+        if not tick.trading_enabled:
+            return None
+        return self.decide(tick, self.sell_pct, self.buy_pct, self.trade_amount_usd)
+
+    def decide(self, tick, sell_pct, buy_pct, amount_usd):
+        """Checks both sides against the base at their executable prices (ticker when no book)."""
+        price, quote = tick.price, tick.quote
+        sell_price = buy_price = price
+        if quote:
+            sell_price = quote["sell"]["average"] or price
+            buy_price = quote["buy"]["average"] or price
+        sell_change = (sell_price - self.base_price) / self.base_price * 100
+        buy_change = (buy_price - self.base_price) / self.base_price * 100
+
+        if sell_change >= sell_pct:
+            amount_btc = amount_usd / price
+            if tick.btc_balance < amount_btc:
+                self.base_price = price  # Reset base price after failed trade
+                return {"action": "reject", "type": "FAILED SELL", "price": price, "cooldown": self.failure_cooldown,
+                        "reason": f"Insufficient BTC. Required: {amount_btc:.8f} BTC, "
+                                  f"Available: {tick.btc_balance:.8f} BTC"}
+            self._signal_price = price
+            return {"action": "sell", "amount_btc": amount_btc, "price": sell_price,
+                    "reason": f"sell price {sell_change:+.3f}% vs base {self.base_price:.2f}"}
+        if buy_change <= -buy_pct:
+            if tick.usdt_balance < amount_usd:
+                self.base_price = price  # Reset base price after failed trade
+                return {"action": "reject", "type": "FAILED BUY", "price": price, "cooldown": self.failure_cooldown,
+                        "reason": f"Insufficient USDT. Required: {amount_usd} USDT, "
+                                  f"Available: {tick.usdt_balance:.2f} USDT"}
+            self._signal_price = price
+            return {"action": "buy", "amount_usd": amount_usd, "price": buy_price,
+                    "reason": f"buy price {buy_change:+.3f}% vs base {self.base_price:.2f}"}
+        return None
+
+    def on_fill(self, fill):
+        # Re-anchor on the ticker price that triggered the trade (the fill price for reconciled fills)
+        self.base_price = self._signal_price or float(fill["price"])
+        self._signal_price = None
+
+    def on_order_done(self, order):
+        # An order placed but not filled still re-anchors; a rejected or failed one keeps the base
+        if order is not None and not float(order.get("filled") or 0) and self._signal_price:
+            self.base_price = self._signal_price
+        self._signal_price = None  # Never carried over to an unrelated later fill
+
+
+@register("adaptive")
+class AdaptiveStrategy(ThresholdStrategy):
+    """ThresholdStrategy with thresholds, slippage guard and order size scaled by realized volatility.
+
+    Volatility is the rolling standard deviation of tick returns over `window` ticks, scaled to a
+    `horizon`-tick move: sigma% = vol * sqrt(horizon) * 100. The sell/buy thresholds are
+    `sell_k`/`buy_k` sigmas and the guard is `guard_k` sigmas, each clamped to its (min, max)
+    limits in percent. Order size is `trade_amount_usd` scaled by target_vol_pct / sigma%, clamped
+    to `size_limits` multiples, so quiet markets trade less often with larger clips and fast
+    markets trade smaller. A guard breach re-anchors the base instead of freezing the loop. Until
+    the window fills (from live ticks, or at startup from cached candles via `warm_up`), the
+    static rule applies.
+    """
+
+    def __init__(self, trade_amount_usd=1.3, window=300, horizon=60, sell_k=1.5, buy_k=0.75, guard_k=8.0,
+                 sell_pct_limits=(0.05, 1.0), buy_pct_limits=(0.025, 0.5), tolerance_limits=(0.5, 5.0),
+                 target_vol_pct=0.07, size_limits=(0.5, 2.0), **static):
+        super().__init__(trade_amount_usd=trade_amount_usd, **static)
+        self.volatility = RollingVolatility(window)
+        self.horizon = horizon
+        self.sell_k = sell_k
+        self.buy_k = buy_k
+        self.guard_k = guard_k
+        self.sell_pct_limits = sell_pct_limits
+        self.buy_pct_limits = buy_pct_limits
+        self.tolerance_limits = tolerance_limits
+        self.target_vol_pct = target_vol_pct
+        self.size_limits = size_limits
+
+    def sigma_pct(self):
+        vol = self.volatility.value
+        return None if vol is None else vol * math.sqrt(self.horizon) * 100
+
+    def current(self):
+        """Thresholds in effect for the latest tick, or None during warm-up."""
+        sigma = self.sigma_pct()
+        if sigma is None:
+            return None
+        size = self.target_vol_pct / sigma if sigma > 0 else self.size_limits[1]
+        return {
+            "sigma_pct": sigma,
+            "sell_pct": _clamp(self.sell_k * sigma, self.sell_pct_limits),
+            "buy_pct": _clamp(self.buy_k * sigma, self.buy_pct_limits),
+            "tolerance_pct": _clamp(self.guard_k * sigma, self.tolerance_limits),
+            "amount_usd": self.trade_amount_usd * _clamp(size, self.size_limits),
+        }
+
+    def on_tick(self, tick):
+        price = tick.price
+        self.volatility.update(price)
+        params = self.current()
+        if params is None or self.base_price is None:
+            return super().on_tick(tick)
+
+        price_diff = abs(price - self.base_price) / self.base_price * 100
+        if price_diff > params["tolerance_pct"]:
+            self.base_price = price  # Re-anchor rather than wait for the market to come back
+            return {"action": "reject", "type": "FAILED PRICE CHANGE", "price": price, "cooldown": 0,
+                    "reason": f"Price change {price_diff:.2f}% exceeded adaptive tolerance "
+                              f"{params['tolerance_pct']:.2f}%; base re-anchored"}
+        if not tick.trading_enabled:
+            return None
+        return self.decide(tick, params["sell_pct"], params["buy_pct"], params["amount_usd"])
+
+    def indicators(self):
+        return self.current() or {}
+
+    def warm_up(self, closes, interval, tick_interval=1.0):
+        """Fills the volatility window with candle returns rescaled to tick size.
+
+        Under a random walk the standard deviation grows with sqrt(time), so a return over
+        `interval` seconds is scaled by sqrt(tick_interval / interval) to stand in for one tick.
+        """
+        window = self.volatility.returns
+        closes = list(closes)[-(window.size + 1):]
+        scale = math.sqrt(tick_interval / interval)
+        for previous, close in zip(closes, closes[1:]):
+            window.push((close / previous - 1.0) * scale)
+        if window.full:
+            self.volatility.value = window.std()
+        return max(len(closes) - 1, 0)
+
+
+def _clamp(value, limits):
+    low, high = limits
+    return min(max(value, low), high)
@@ -0,0 +1,236 @@
+"""Runs one bot process per KuCoin (sub-)account from a single deployment.
+
+    python supervisor.py accounts.json            # bots only
+    python supervisor.py accounts.json --server   # plus one server.py for all of them
+
+accounts.json lists the accounts; credentials stay in per-account env files, never in it:
+
+    {"accounts": [
+        {"name": "main", "env_file": ".env.main"},
+        {"name": "sub1", "env_file": ".env.sub1", "env": {"STRATEGY": "adaptive"}}
+    ]}
+
+Each worker is `bot.py` with the supervisor's environment plus the account's env file and `env`,
+its own DATA_DIR (DATA_DIR/accounts/<name>) and state socket, and ACCOUNT_NAME. Workers are
+pinned round-robin to the available cores, leaving the first core to the supervisor and server
+when there are several.
+
+The supervisor fetches the ticker once per MARKET_DATA_INTERVAL seconds with a public client and
+publishes it in shared memory (core.SharedTicker), which every worker reads instead of polling
+KuCoin itself. Crashed workers are restarted with exponential backoff (reset after a minute of
+uptime) and resume from the checkpoint in their DATA_DIR. The first account is the primary: it
+alone executes the server's trade commands and feeds the main dashboard panels; the others are
+aggregated from their state sockets into GET /api/accounts. Worker states are written to
+DATA_DIR/supervisor.json for the server.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from dotenv import dotenv_values
+
+from core import ExchangeSession, SharedTicker, load_settings
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TRADE_PAIR = 'BTC/USDT'
+MARKET_DATA_INTERVAL = float(os.getenv("MARKET_DATA_INTERVAL", 1))  # Seconds between shared ticker updates
+RESTART_BACKOFF = (1.0, 60.0)  # First and longest delay before restarting a crashed worker, in seconds
+STABLE_AFTER = 60.0            # Uptime after which a worker's backoff starts over
+STOP_TIMEOUT = 15.0            # Seconds a worker gets to checkpoint and exit before it is killed
+
+
+class Worker:
+    """One account's bot process and its restart bookkeeping."""
+
+    def __init__(self, name, env, core=None, command=None):
+        self.name = name
+        self.env = env
+        self.core = core
+        self.command = command or [sys.executable, os.path.join(HERE, "bot.py")]
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF[0]
+        self.restart_at = None
+        self.last_exit = None
+        self.stopped = False
+
+    @property
+    def data_dir(self):
+        return self.env["DATA_DIR"]
+
+    def start(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        log = open(os.path.join(self.data_dir, "bot.log"), "ab")
+        self.process = subprocess.Popen(self.command, env=self.env, cwd=HERE, stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        if self.core is not None and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(self.process.pid, {self.core})
+            except OSError as e:
+                logging.warning(f"Could not pin {self.name} to core {self.core}: {e}")
+        logging.info(f"Started {self.name} (pid {self.process.pid}, core {self.core})")
+
+    def check(self, now):
+        """Schedules a restart when the process has exited and performs it when due."""
+        if self.process is not None:
+            code = self.process.poll()
+            if code is None:
+                if now - self.started_at >= STABLE_AFTER:
+                    self.backoff = RESTART_BACKOFF[0]
+                return
+            self.last_exit = code
+            self.process = None
+            self.restart_at = now + self.backoff
+            logging.error(f"{self.name} exited with code {code}; restarting in {self.backoff:.0f}s")
+            self.backoff = min(self.backoff * 2, RESTART_BACKOFF[1])
+        elif self.restart_at is not None and now >= self.restart_at:
+            self.restarts += 1
+            self.start()
+
+    def stop(self):
+        self.stopped = True
+        self.restart_at = None
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)  # bot.request_stop: ends the loop, checkpoints and exits
+        try:
+            self.process.wait(STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logging.warning(f"{self.name} did not stop within {STOP_TIMEOUT:.0f}s; killing it")
+            self.process.kill()
+            self.process.wait()
+
+    def state(self):
+        running = self.process is not None and self.process.poll() is None
+        return {"name": self.name, "data_dir": self.data_dir, "ipc_socket": self.env["BOT_IPC_SOCKET"],
+                "pid": self.process.pid if running else None, "core": self.core,
+                "status": "running" if running else "stopped" if self.stopped else "restarting",
+                "restarts": self.restarts, "last_exit": self.last_exit}
+
+
+class Supervisor:
+    def __init__(self, accounts, data_dir, shm_name=None, base_env=None):
+        if not accounts:
+            raise ValueError("No accounts configured")
+        names = [a["name"] for a in accounts]
+        if len(set(names)) != len(names):
+            raise ValueError("Account names must be unique")
+        self.data_dir = data_dir
+        self.state_path = os.path.join(data_dir, "supervisor.json")
+        self.shm_name = shm_name or f"bot-ticker-{os.getpid()}"
+        base_env = dict(os.environ if base_env is None else base_env)
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        worker_cores = cores[1:] or cores  # Keep the first core for the supervisor and server
+        self.workers = []
+        for i, account in enumerate(accounts):
+            self.workers.append(Worker(account["name"], self.worker_env(account, base_env, primary=i == 0),
+                                       core=worker_cores[i % len(worker_cores)] if worker_cores else None))
+        self.ticker = None
+        self.server = None
+        self.stopping = threading.Event()
+
+    def worker_env(self, account, base_env, primary):
+        env = dict(base_env)
+        if account.get("env_file"):
+            env.update({k: v for k, v in dotenv_values(account["env_file"]).items() if v is not None})
+        env.update({k: str(v) for k, v in (account.get("env") or {}).items()})
+        data_dir = os.path.join(self.data_dir, "accounts", account["name"])
+        env.update({"ACCOUNT_NAME": account["name"], "DATA_DIR": data_dir,
+                    "BOT_IPC_SOCKET": os.path.join(data_dir, "bot.sock"), "MARKET_DATA_SHM": self.shm_name})
+        if not primary:
+            env["COMMAND_POLL_INTERVAL"] = "0"  # Server trade commands go to the primary account only
+        return env
+
+    # --- Market data ---
+    def publish_market_data(self, exchange):
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            try:
+                self.ticker.write(exchange.fetch_ticker(TRADE_PAIR))
+            except Exception as e:
+                logging.warning(f"Shared ticker update failed: {e}")  # Workers fall back to their own requests
+            self.stopping.wait(max(0.0, MARKET_DATA_INTERVAL - (time.monotonic() - started)))
+
+    # --- Lifecycle ---
+    def run(self, exchange, server=False):
+        self.ticker = SharedTicker(self.shm_name, create=True)
+        threading.Thread(target=self.publish_market_data, args=(exchange,), name="market-data",
+                         daemon=True).start()
+        for worker in self.workers:
+            worker.start()
+        if server:
+            self.start_server()
+        try:
+            while not self.stopping.is_set():
+                now = time.monotonic()
+                for worker in self.workers:
+                    worker.check(now)
+                self.write_state()
+                self.stopping.wait(1.0)
+        finally:
+            self.shutdown()
+
+    def start_server(self):
+        env = dict(os.environ, DATA_DIR=self.data_dir, SUPERVISOR_STATE=self.state_path,
+                   BOT_IPC_SOCKET=self.workers[0].env["BOT_IPC_SOCKET"])
+        self.server = subprocess.Popen([sys.executable, os.path.join(HERE, "server.py")], env=env, cwd=HERE)
+        logging.info(f"Started server.py (pid {self.server.pid})")
+
+    def shutdown(self):
+        self.stopping.set()
+        logging.info("Stopping workers...")
+        threads = [threading.Thread(target=w.stop) for w in self.workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.server is not None and self.server.poll() is None:
+            self.server.terminate()
+            self.server.wait(STOP_TIMEOUT)
+        if self.ticker is not None:
+            self.ticker.close()
+            self.ticker = None
+        self.write_state()
+
+    def write_state(self):
+        state = {"updated_at": time.time(), "market_data": self.shm_name,
+                 "accounts": [worker.state() for worker in self.workers]}
+        fd, tmp_path = tempfile.mkstemp(prefix="supervisor.", suffix=".tmp", dir=self.data_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accounts", help="JSON file listing the accounts")
+    parser.add_argument("--server", action="store_true", help="also run server.py for all accounts")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    with open(args.accounts, "r", encoding="utf-8") as f:
+        accounts = json.load(f)["accounts"]
+    settings = load_settings(require_credentials=False)
+    exchange = ExchangeSession(settings, load_markets=False).connect()  # Public endpoints only
+    if exchange is None:
+        sys.exit(1)
+    supervisor = Supervisor(accounts, settings.data_dir)
+    signal.signal(signal.SIGTERM, lambda *_: supervisor.stopping.set())
+    try:
+        supervisor.run(exchange, server=args.server)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 import os
 import logging
 import asyncio
-from telegram import Bot
-from telegram.error import TelegramError
 from dotenv import load_dotenv
 
+from notifier import TelegramNotifier
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -20,35 +20,15 @@ CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 if not TOKEN or not CHAT_ID:
     raise ValueError("Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID in environment variables.")
 
-# Initialize the bot
-bot = Bot(token=TOKEN)
-
-
-async def send_file(file_path):
-    """Sends a file to the Telegram chat."""
-    try:
-        # Check if the file exists and is not empty
-        if not os.path.exists(file_path):
-            logger.warning(f"File {file_path} does not exist.")
-            return
-        if os.path.getsize(file_path) == 0:
-            logger.warning(f"File {file_path} is empty.")
-            return
 
-        # Send the file asynchronously
-        with open(file_path, 'rb') as file:
-            await bot.send_document(chat_id=CHAT_ID, document=file)
+def create_notifier(**kwargs):
+    """Builds the Telegram notifier for the configured bot token and chat."""
+    return TelegramNotifier(TOKEN, CHAT_ID, **kwargs)
 
-        logger.info(f"File {file_path} sent successfully.")
-    except TelegramError as e:
-        logger.error(f"Failed to send file: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
 
-
-async def send_data_to_telegram():
-    """Sends the trading summary report to Telegram."""
-    data_dir = os.getenv("DATA_DIR", "./data")
+def send_data_to_telegram(notifier, data_dir=None):
+    """Queues the trading summary report for delivery to Telegram."""
+    data_dir = data_dir or os.getenv("DATA_DIR", "./data")
 
     if not os.path.exists(data_dir):
         logger.warning(f"Data directory '{data_dir}' does not exist.")
@@ -57,16 +37,20 @@ async def send_data_to_telegram():
     # Path to the trading summary report
     summary_file_path = os.path.join(data_dir, "trading_summary_report.txt")
 
-    if os.path.exists(summary_file_path):
-        try:
-            # Send the file
-            await send_file(summary_file_path)
-        except Exception as e:
-            logger.error(f"Error sending the file: {e}")
+    if os.path.exists(summary_file_path) and os.path.getsize(summary_file_path) > 0:
+        notifier.send_document(summary_file_path)
     else:
-        logger.warning(f"Summary file {summary_file_path} does not exist.")
+        logger.warning(f"Summary file {summary_file_path} is empty or does not exist.")
+
+
+async def main():
+    """Sends the current trading summary report once."""
+    notifier = create_notifier()
+    await notifier.start()
+    send_data_to_telegram(notifier)
+    await notifier.stop()
 
 
 # Run the function asynchronously
 if __name__ == "__main__":
-    asyncio.run(send_data_to_telegram())
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+import logging
+import time
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes, filters
+
+MAX_TRADES_LISTED = 50
+
+
+class CommandInterface:
+    """Telegram commands (/status, /pnl, /trades N, /pause, /resume, /risk, /kill, /unkill) for the bot.
+
+    Handlers only read the bot's in-process state (the state cache dict, the accountant and the
+    in-memory fill store) and flip the pause event or the risk engine's kill switch, so answering
+    a command never calls the exchange, parses a file or blocks the trading thread.
+    """
+
+    def __init__(self, token, chat_id, state_cache, accountant, fill_store, trading_paused, risk_engine=None):
+        self.token = token
+        self.chat_id = int(chat_id)
+        self.state_cache = state_cache
+        self.accountant = accountant
+        self.fill_store = fill_store
+        self.trading_paused = trading_paused
+        self.risk_engine = risk_engine
+        self.application = None
+
+    async def start(self):
+        """Starts long polling on the running event loop."""
+        self.application = Application.builder().token(self.token).build()
+        only_owner = filters.Chat(chat_id=self.chat_id)
+        for name, handler in (("status", self.status), ("pnl", self.pnl), ("trades", self.trades),
+                              ("pause", self.pause), ("resume", self.resume), ("help", self.help),
+                              ("risk", self.risk), ("kill", self.kill), ("unkill", self.unkill)):
+            self.application.add_handler(CommandHandler(name, handler, filters=only_owner))
+        await self.application.initialize()
+        await self.application.start()
+        await self.application.updater.start_polling(drop_pending_updates=True)
+        logging.info("Telegram command interface started.")
+
+    async def stop(self):
+        if self.application is None:
+            return
+        await self.application.updater.stop()
+        await self.application.stop()
+        await self.application.shutdown()
+        self.application = None
+
+    # --- Handlers ---
+    async def help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(
+            "/status - price, balances and bot state\n"
+            "/pnl - live P&L and position\n"
+            "/trades N - last N fills (default 10)\n"
+            "/pause - stop placing new orders\n"
+            "/resume - resume trading\n"
+            "/risk - risk limits usage and rejections\n"
+            "/kill [reason] - engage the kill switch (blocks all orders)\n"
+            "/unkill - release the kill switch")
+
+    async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        state = dict(self.state_cache)
+        updated_at = state.get("updated_at")
+        age = f"{time.time() - updated_at:.1f}s ago" if updated_at else "never"
+
+        def num(key, spec):
+            value = state.get(key)
+            return "N/A" if value is None else f"{value:{spec}}"
+
+        killed = self.risk_engine is not None and self.risk_engine.kill_switch
+        await update.message.reply_text(
+            f"🤖 Trading: {'⏸️ PAUSED' if self.trading_paused.is_set() else '▶️ ACTIVE'}"
+            f"{' | 🛑 KILL SWITCH' if killed else ''}\n"
+            f"💹 Price: {num('price', '.2f')} USDT (base {num('base_price', '.2f')}, change {num('price_change', '+.2f')}%)\n"
+            f"🟢 BTC: {num('btc_balance', '.8f')} BTC\n"
+            f"💵 USDT: {num('usdt_balance', '.2f')} USDT\n"
+            f"🕒 Last tick: {age}")
+
+    async def pnl(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        acct = self.accountant.snapshot()
+        await update.message.reply_text(
+            f"📦 Position: {acct['position_btc']:.8f} BTC @ {acct['avg_entry_price']:.2f}\n"
+            f"✅ Realized: {acct['realized_pnl']:+.4f} USDT\n"
+            f"⏳ Unrealized: {acct['unrealized_pnl']:+.4f} USDT\n"
+            f"💸 Fees: {acct['fees_paid']:.4f} USDT\n"
+            f"📊 Net: {acct['net_pnl']:+.4f} USDT\n"
+            f"📈 Exposure: {acct['exposure_usdt']:.2f} USDT | Turnover: {acct['turnover_usdt']:.2f} USDT\n"
+            f"📉 Drawdown: {acct['drawdown']:.4f} (max {acct['max_drawdown']:.4f}) USDT")
+
+    async def trades(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            count = int(context.args[0]) if context.args else 10
+        except ValueError:
+            await update.message.reply_text("Usage: /trades N")
+            return
+        count = max(1, min(count, MAX_TRADES_LISTED))
+        fills = self.fill_store.latest(count)
+        if not fills:
+            await update.message.reply_text("No trades yet.")
+            return
+        lines = [f"{f['timestamp']} {f['type']} {float(f['amount']):.8f} BTC @ {float(f['price']):.2f} "
+                 f"(P&L {float(f.get('realized_pnl') or 0):+.4f})" for f in reversed(fills)]
+        await update.message.reply_text("\n".join(lines))
+
+    async def pause(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        self.trading_paused.set()
+        logging.warning("Trading paused via Telegram.")
+        await update.message.reply_text("⏸️ Trading paused. Monitoring continues; /resume to continue.")
+
+    async def resume(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        self.trading_paused.clear()
+        logging.warning("Trading resumed via Telegram.")
+        await update.message.reply_text("▶️ Trading resumed.")
+
+    async def risk(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.risk_engine is None:
+            await update.message.reply_text("Risk engine not available.")
+            return
+        m = self.risk_engine.metrics()
+        rejections = ", ".join(f"{k}: {v}" for k, v in sorted(m["rejections"].items())) or "none"
+        await update.message.reply_text(
+            f"🛑 Kill switch: {'ON (' + str(m['kill_reason']) + ')' if m['kill_switch'] else 'off'}\n"
+            f"✅ Accepted {m['accepted']} / {m['checks']} checks (avg {m['avg_check_us']:.1f} us)\n"
+            f"🚫 Rejections: {rejections}\n"
+            f"💵 Notional last minute: {m['notional_last_minute']:.2f} USDT\n"
+            f"📉 Daily P&L: {m['daily_pnl']:+.4f} USDT")
+
+    async def kill(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.risk_engine is None:
+            await update.message.reply_text("Risk engine not available.")
+            return
+        reason = " ".join(context.args) if context.args else "telegram"
+        self.risk_engine.engage_kill_switch(reason)
+        logging.warning(f"Kill switch engaged via Telegram: {reason}")
+        await update.message.reply_text("🛑 Kill switch engaged. All orders are blocked; /unkill to release.")
+
+    async def unkill(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.risk_engine is None:
+            await update.message.reply_text("Risk engine not available.")
+            return
+        self.risk_engine.release_kill_switch()
+        logging.warning("Kill switch released via Telegram.")
+        await update.message.reply_text("✅ Kill switch released.")
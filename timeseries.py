@@ -0,0 +1,173 @@
+"""Embedded time-series store for the dashboard's price and balance charts.
+
+Each series is kept in tiers: raw points plus 1 minute and 1 hour rollups. A rollup is updated
+in place while its bucket is open, so recording a point is O(1) per tier and nothing is ever
+recomputed. Every tier is a set of parallel array columns (bucket time in ms, min, max, last)
+with its own retention; the oldest rows are dropped from the head as new ones arrive.
+
+`query()` serves any [start, end) range in milliseconds: it picks the coarsest tier that still
+has at least the requested number of points over the range (and still retains its start),
+then folds rows into at most `points` buckets, keeping each bucket's min and max so spikes
+survive downsampling.
+"""
+import os
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+
+# (resolution ms, rows kept): raw pushes (5 s apart) for ~2 days, minutes for 30 days, hours for 2 years
+DEFAULT_TIERS = ((0, 40_000), (MINUTE_MS, 43_200), (HOUR_MS, 17_520))
+
+
+class _Tier:
+    """Parallel columns of one resolution; resolution 0 stores raw points."""
+
+    __slots__ = ("resolution", "capacity", "t", "lo", "hi", "last", "head")
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.t = array("q")
+        self.lo = array("d")
+        self.hi = array("d")
+        self.last = array("d")
+        self.head = 0  # Rows before head have expired
+
+    def __len__(self):
+        return len(self.t) - self.head
+
+    @property
+    def oldest(self):
+        return self.t[self.head] if len(self) else None
+
+    def add(self, ts, value):
+        bucket = ts - ts % self.resolution if self.resolution else ts
+        if len(self) and bucket <= self.t[-1]:
+            if bucket < self.t[-1] or not self.resolution:
+                return  # Out of order (or a duplicate raw timestamp): history is append-only
+            self.lo[-1] = min(self.lo[-1], value)
+            self.hi[-1] = max(self.hi[-1], value)
+            self.last[-1] = value
+            return
+        self.t.append(bucket)
+        self.lo.append(value)
+        self.hi.append(value)
+        self.last.append(value)
+        if len(self) > self.capacity:
+            self.head += 1
+            if self.head >= self.capacity:  # Amortized O(1) compaction
+                for column in (self.t, self.lo, self.hi, self.last):
+                    del column[:self.head]
+                self.head = 0
+
+    def rows(self, start, end):
+        """Copies of the columns for bucket times in [start, end) as NumPy arrays."""
+        i0 = bisect_left(self.t, start, self.head)
+        i1 = bisect_left(self.t, end, i0)
+        return (np.array(self.t[i0:i1], dtype=np.int64), np.array(self.lo[i0:i1]),
+                np.array(self.hi[i0:i1]), np.array(self.last[i0:i1]))
+
+
+class Series:
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [_Tier(resolution, capacity) for resolution, capacity in tiers]
+        self.first = None  # Earliest timestamp ever recorded
+
+    def add(self, ts, value):
+        if self.first is None:
+            self.first = ts
+        for tier in self.tiers:
+            tier.add(ts, value)
+
+    def pick_tier(self, start, end, points):
+        """Coarsest tier with enough resolution that still covers `start`; else the one reaching furthest back."""
+        wanted = max((end - start) / max(points, 1), 0)
+        # A range starting before the first point is covered by every tier that still holds it
+        since = max(start, self.first) if self.first is not None else start
+        covering = [t for t in self.tiers if len(t) and t.oldest <= since]
+        for tier in sorted(covering, key=lambda t: -t.resolution):
+            if tier.resolution <= wanted:
+                return tier
+        if covering:
+            return min(covering, key=lambda t: t.resolution)
+        filled = [t for t in self.tiers if len(t)]
+        return min(filled, key=lambda t: t.oldest) if filled else self.tiers[0]
+
+    def query(self, start, end, points):
+        tier = self.pick_tier(start, end, points)
+        t, lo, hi, last = tier.rows(start, end)
+        if len(t) > points:
+            # Fold into equal-width time buckets, keeping min, max and the closing value of each
+            width = max((end - start) // points, 1)
+            groups = (t - start) // width
+            starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+            ends = np.r_[starts[1:], len(t)] - 1
+            t, lo, hi, last = t[starts], np.minimum.reduceat(lo, starts), np.maximum.reduceat(hi, starts), last[ends]
+        return tier.resolution, [list(row) for row in zip(t.tolist(), lo.tolist(), hi.tolist(), last.tolist())]
+
+
+class TimeSeriesStore:
+    """Named series recorded together; thread-safe. Values are plain floats in the units of schema.py."""
+
+    def __init__(self, names, tiers=DEFAULT_TIERS, path=None):
+        self.tiers = tiers
+        self.series = {name: Series(tiers) for name in names}
+        self.path = path
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def record(self, ts_ms, **values):
+        with self.lock:
+            for name, value in values.items():
+                if value is not None and name in self.series:
+                    self.series[name].add(int(ts_ms), float(value))
+
+    def query(self, name, start, end, points=500):
+        """Returns {"name", "resolution_ms", "columns", "rows"} with at most `points` rows of [t, min, max, last]."""
+        with self.lock:
+            resolution, rows = self.series[name].query(int(start), int(end), int(points))
+        return {"name": name, "resolution_ms": resolution, "columns": ["t", "min", "max", "last"], "rows": rows}
+
+    def save(self, path=None):
+        """Atomically snapshots every tier to a .npz file."""
+        path = path or self.path
+        with self.lock:
+            arrays = {}
+            for name, series in self.series.items():
+                if series.first is not None:
+                    arrays[f"{name}.first"] = np.array([series.first], dtype=np.int64)
+                for i, tier in enumerate(series.tiers):
+                    for column in ("t", "lo", "hi", "last"):
+                        arrays[f"{name}.{i}.{column}"] = np.array(getattr(tier, column)[tier.head:])
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def load(self, path):
+        with np.load(path) as data, self.lock:
+            for name, series in self.series.items():
+                if f"{name}.first" in data:
+                    series.first = int(data[f"{name}.first"][0])
+                for i, tier in enumerate(series.tiers):
+                    if f"{name}.{i}.t" not in data:
+                        continue
+                    tier.t = array("q", data[f"{name}.{i}.t"].astype(np.int64).tobytes())
+                    for column in ("lo", "hi", "last"):
+                        setattr(tier, column, array("d", data[f"{name}.{i}.{column}"].astype(float).tobytes()))
+                    tier.head = max(0, len(tier.t) - tier.capacity)
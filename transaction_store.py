@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from heapq import merge
+from datetime import datetime, timezone
+
+from records import json_default
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_timestamp(value, default=None):
+    """Converts a transaction timestamp ('YYYY-mm-dd HH:MM:SS' UTC, ISO or epoch) to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp() if value.tzinfo else value.replace(tzinfo=timezone.utc).timestamp()
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        for parse in (lambda v: datetime.strptime(v, TIMESTAMP_FORMAT), datetime.fromisoformat):
+            try:
+                dt = parse(value)
+            except ValueError:
+                continue
+            return dt.timestamp() if dt.tzinfo else dt.replace(tzinfo=timezone.utc).timestamp()
+    return default
+
+
+def transaction_category(tx):
+    """Filter category of a transaction: 'FAILED' for every FAILED* row, otherwise the upper-cased type."""
+    t_type = str(tx.get("type") or "UNKNOWN").upper()
+    return "FAILED" if t_type.startswith("FAILED") else t_type
+
+
+def transaction_key(tx):
+    """Dedup key of a transaction: failed/manual rows share order IDs like 'N/A', so the time and type are included."""
+    return f"{tx.get('timestamp')}|{tx.get('type')}|{tx.get('order_id')}"
+
+
+class _SeqIndex:
+    """Ascending list of sequence numbers for one category; evictions only ever remove the head."""
+
+    __slots__ = ("seqs", "head")
+
+    def __init__(self):
+        self.seqs = []
+        self.head = 0
+
+    def __len__(self):
+        return len(self.seqs) - self.head
+
+    def append(self, seq):
+        self.seqs.append(seq)
+
+    def pop_head(self):
+        self.head += 1
+        if self.head > 1024 and self.head * 2 > len(self.seqs):
+            del self.seqs[:self.head]
+            self.head = 0
+
+    def position(self, seq):
+        """Index of the first entry >= seq."""
+        return bisect_left(self.seqs, seq, self.head)
+
+    def count_between(self, lo, hi):
+        return max(0, self.position(hi) - self.position(lo))
+
+    def descending(self, lo, hi):
+        """Yields seqs in [lo, hi) newest first."""
+        stop = self.position(lo)
+        for i in range(self.position(hi) - 1, stop - 1, -1):
+            yield self.seqs[i]
+
+
+class TransactionStore:
+    """Bounded, ordered ring buffer of transactions with an O(1) dedup index and an append-only journal.
+
+    Every record gets a monotonically increasing sequence number ("seq") that doubles as the
+    pagination cursor. Once `capacity` records are held, the oldest one is evicted on each insert.
+    Records are dict copies unless `record_type` (a records.Record class with a `seq` field) is
+    given; then they are stored as that type, and an instance of it without a seq is stored as is.
+    """
+
+    def __init__(self, capacity=10000, path=None, record_type=None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.path = path
+        self.record_type = record_type
+        self._slots = [None] * capacity
+        self._times = [0.0] * capacity   # Sort key for time range queries (non-decreasing by seq)
+        self._first_seq = 0
+        self._next_seq = 0
+        self._index = {}                 # transaction_key -> seq
+        self._categories = {}            # transaction_category -> _SeqIndex
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_lines = 0
+        if path:
+            self._load()
+
+    def __len__(self):
+        return self._next_seq - self._first_seq
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest retained record; every record before it was evicted."""
+        return self._first_seq
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest record, or -1 when nothing was ever added."""
+        return self._next_seq - 1
+
+    # --- Insertion ---
+    def add(self, tx):
+        """Adds a transaction unless it is already stored. Returns the stored record or None for duplicates."""
+        with self._lock:
+            record = self._insert(tx)
+            if record is not None and self.path:
+                self._append_to_journal([record])
+            return record
+
+    def extend(self, txs):
+        """Adds many transactions in order, skipping duplicates. Returns the list of new records."""
+        with self._lock:
+            added = [record for record in map(self._insert, txs) if record is not None]
+            if added and self.path:
+                self._append_to_journal(added)
+            return added
+
+    def _insert(self, tx):
+        key = transaction_key(tx)
+        if key in self._index:
+            return None
+
+        seq = self._next_seq
+        if seq - self._first_seq == self.capacity:
+            self._evict_oldest()
+
+        if self.record_type is None:
+            record = dict(tx)
+        elif type(tx) is self.record_type and tx.seq is None:
+            record = tx  # Already a fresh record (e.g. from schema.validate_transaction): no copy
+        else:
+            record = self.record_type.from_dict(tx)
+        record["seq"] = seq
+        slot = seq % self.capacity
+        ts = parse_timestamp(record.get("timestamp"), default=time.time())
+        if seq > self._first_seq:
+            # Records arrive in log order; clamping keeps the time column sorted for bisection
+            ts = max(ts, self._times[(seq - 1) % self.capacity])
+        self._slots[slot] = record
+        self._times[slot] = ts
+        self._index[key] = seq
+        category = transaction_category(record)
+        if category not in self._categories:
+            self._categories[category] = _SeqIndex()
+        self._categories[category].append(seq)
+        self._next_seq = seq + 1
+        return record
+
+    def _evict_oldest(self):
+        slot = self._first_seq % self.capacity
+        old = self._slots[slot]
+        self._index.pop(transaction_key(old), None)
+        self._categories[transaction_category(old)].pop_head()
+        self._slots[slot] = None
+        self._first_seq += 1
+
+    # --- Queries ---
+    def get(self, seq):
+        """Returns the record with the given sequence number, or None if evicted/unknown."""
+        with self._lock:
+            if self._first_seq <= seq < self._next_seq:
+                return self._slots[seq % self.capacity]
+            return None
+
+    def contains(self, tx):
+        return transaction_key(tx) in self._index
+
+    def since(self, seq):
+        """Returns the retained records with a sequence number greater than `seq`, oldest first."""
+        with self._lock:
+            start = max(self._first_seq, seq + 1)
+            return [self._slots[s % self.capacity] for s in range(start, self._next_seq)]
+
+    def latest(self, n):
+        """Returns the `n` most recent records, oldest first."""
+        with self._lock:
+            start = max(self._first_seq, self._next_seq - n)
+            return [self._slots[seq % self.capacity] for seq in range(start, self._next_seq)]
+
+    def query(self, start=None, end=None, cursor=None, limit=50, types=None, exclude=None):
+        """Returns (records, next_cursor) for one page, newest first.
+
+        `start`/`end` bound the record time (epoch seconds or timestamp strings, end exclusive).
+        `types`/`exclude` are iterables of categories (see transaction_category) to keep/drop.
+        `cursor` is the `seq` of the last record of the previous page; pass back `next_cursor`
+        to continue. `next_cursor` is None when there are no older matching records.
+        """
+        with self._lock:
+            lo, hi = self._seq_range(start, end)
+            if cursor is not None:
+                hi = min(hi, int(cursor))
+            if types is None and exclude is None:
+                first = max(lo, hi - limit)
+                seqs = range(hi - 1, first - 1, -1)
+                has_more = first > lo
+            else:
+                streams = [self._categories[c].descending(lo, hi) for c in self._select_categories(types, exclude)]
+                merged = merge(*streams, reverse=True)
+                seqs = [seq for _, seq in zip(range(limit + 1), merged)]
+                has_more = len(seqs) > limit
+                seqs = seqs[:limit]
+            records = [self._slots[seq % self.capacity] for seq in seqs]
+            next_cursor = records[-1]["seq"] if has_more and records else None
+            return records, next_cursor
+
+    def aggregates(self, start=None, end=None):
+        """Per-category counts over the retained records (optionally within a time range)."""
+        with self._lock:
+            lo, hi = self._seq_range(start, end)
+            if lo == self._first_seq and hi == self._next_seq:
+                by_type = {c: len(index) for c, index in self._categories.items() if len(index)}
+            else:
+                by_type = {c: n for c, index in self._categories.items() if (n := index.count_between(lo, hi))}
+            return {"total": sum(by_type.values()), "failed": by_type.get("FAILED", 0), "by_type": by_type}
+
+    def _select_categories(self, types, exclude):
+        selected = {c.upper() for c in types} if types else set(self._categories)
+        if exclude:
+            selected -= {c.upper() for c in exclude}
+        return [c for c in selected if c in self._categories]
+
+    def _seq_range(self, start, end):
+        lo = self._first_seq
+        hi = self._next_seq
+        if start is not None:
+            lo = self._bisect_time(parse_timestamp(start, default=0.0))
+        if end is not None:
+            hi = self._bisect_time(parse_timestamp(end, default=float("inf")))
+        return lo, max(lo, hi)
+
+    def _bisect_time(self, ts):
+        """First seq whose time is >= ts."""
+        lo, hi = self._first_seq, self._next_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times[mid % self.capacity] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # --- Persistence ---
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = deque(f, maxlen=self.capacity)
+                self._journal_lines = len(lines)
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping corrupt line in {self.path}")
+                    continue
+                if len(self) == 0 and isinstance(record.get("seq"), int):
+                    # Keep sequence numbers (and therefore cursors) stable across restarts
+                    self._first_seq = self._next_seq = record["seq"]
+                self._insert(record)
+            logging.info(f"Loaded {len(self)} transactions from {self.path}")
+        except Exception as e:
+            logging.error(f"Error loading transaction store {self.path}: {e}")
+
+    def _append_to_journal(self, records):
+        try:
+            if self._journal is None:
+                self._journal = open(self.path, "a", encoding="utf-8")
+            self._journal.write("".join(json.dumps(r, default=json_default) + "\n" for r in records))
+            self._journal.flush()
+            self._journal_lines += len(records)
+            if self._journal_lines > 2 * self.capacity:
+                self._compact()
+        except Exception as e:
+            logging.error(f"Error writing transaction journal {self.path}: {e}")
+
+    def _compact(self):
+        """Rewrites the journal with only the retained records (write-temp-then-rename)."""
+        tmp_path = self.path + ".tmp"
+        records = self.latest(self.capacity)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, default=json_default) + "\n" for r in records)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.path)
+        self._journal = open(self.path, "a", encoding="utf-8")
+        self._journal_lines = len(records)
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None